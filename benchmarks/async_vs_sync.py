@@ -0,0 +1,51 @@
+"""Compares the sync (threadpool + psycopg2) and async (asyncpg) routes on the same queries.
+
+Start the API with a single worker first, e.g.
+
+    python -m uvicorn main:app --workers 1
+
+then run
+
+    python -m benchmarks.async_vs_sync --concurrency 200 --requests 5000
+"""
+import argparse
+import json
+
+from benchmarks.load import run_load
+
+ENDPOINTS = [
+    ("product/get_by_id", "/product/get_by_id/{id}"),
+    ("product/get_by_category", "/product/get_by_category/{id}"),
+    ("product/get_cheaper", "/product/get_cheaper/100"),
+    ("orders/get_by_id", "/orders/get_by_id/{id}"),
+]
+
+def build_requests(prefix: str, ids):
+    """Builds the request mix for one path, cycling over the given IDs."""
+    return [
+        (label, "GET", prefix + path.format(id=record_id), None)
+        for record_id in ids
+        for label, path in ENDPOINTS
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-id", type=int, default=40, help="Cycle through IDs 1..max-id")
+    args = parser.parse_args()
+
+    ids = range(1, args.max_id + 1)
+    report = {}
+    for name, prefix in (("sync", ""), ("async", "/async")):
+        report[name] = run_load(args.base_url, build_requests(prefix, ids), args.concurrency, args.requests)
+
+    print(json.dumps(report, indent=2))
+    sync_rps = report["sync"]["overall"]["throughput_rps"]
+    async_rps = report["async"]["overall"]["throughput_rps"]
+    if sync_rps:
+        print(f"async/sync throughput ratio: {async_rps / sync_rps:.2f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Runs the end-to-end benchmark against each database backend and compares them.
+
+Each backend is benchmarked by `benchmarks.e2e` with DB_BACKEND set, the same
+request count, concurrency and seed, and the same sampled keys, so both
+engines serve the same request sequence. The mix writes, so both databases
+should start from the same disposable data set: seed Postgres with
+generate_data_scaled, create the MySQL schema with inicialization/mysql_init.sql
+and let --copy-data load it from Postgres before the runs.
+
+    python -m benchmarks.backends --copy-data --requests 20000 --output-dir benchmarks/results
+
+The table lists each endpoint's p95 latency per backend and which one was
+faster; the per-backend reports are saved as JSON next to it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from connections import MySQLDatabaseConnection, PostgresDatabaseConnection
+from connections.dialect import POSTGRESQL
+
+# Loaded in this order, parents first. order_totals and product_rating_stats
+# are not copied: the MySQL triggers rebuild them as the rows arrive.
+COPIED_TABLES = [
+    "Category", "Seller", "Customer", "Payment_Method", "Shipping", "Coupons", "Product", "Offer",
+    "Orders", "Order_Items", "Shopping_Cart", "Shopping_Cart_Product", "Review", "Returns",
+    "Product_Recommendations", "Search_History", "product_co_purchases", "product_purchase_counts",
+    "product_similarities", "recommendation_runs",
+]
+COPY_BATCH_SIZE = 1000
+
+def _columns(connection, table: str) -> list:
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT * FROM {table} LIMIT 0;")
+    columns = [column[0].lower() for column in cursor.description]
+    cursor.fetchall()
+    cursor.close()
+    return columns
+
+def copy_data(source: PostgresDatabaseConnection, target: MySQLDatabaseConnection) -> dict:
+    """Replaces the rows of every COPIED_TABLES table in MySQL with those in Postgres.
+
+    Only the columns both schemas have are copied (Product.search_vector, for
+    one, is Postgres-only), keeping the primary keys so the sampled keys are
+    valid on both engines.
+
+    Returns:
+        dict: The number of rows copied per table.
+    """
+    counts = {}
+    with source.acquire() as pg_connection, target.acquire() as mysql_connection:
+        mysql_cursor = mysql_connection.cursor()
+        mysql_cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
+        for table in ["order_totals", "product_rating_stats"] + COPIED_TABLES:
+            mysql_cursor.execute(f"TRUNCATE TABLE {table};")
+        for table in COPIED_TABLES:
+            target_columns = set(_columns(mysql_connection, table))
+            columns = [column for column in _columns(pg_connection, table) if column in target_columns]
+            insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))});"
+            pg_cursor = POSTGRESQL.streaming_cursor(pg_connection)
+            pg_cursor.execute(f"SELECT {', '.join(columns)} FROM {table};")
+            counts[table] = 0
+            while True:
+                rows = pg_cursor.fetchmany(COPY_BATCH_SIZE)
+                if not rows:
+                    break
+                mysql_cursor.executemany(insert, rows)
+                counts[table] += len(rows)
+            pg_cursor.close()
+            mysql_connection.commit()
+            print(f"Copied {counts[table]} rows into {table}")
+        mysql_cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
+        mysql_cursor.close()
+        pg_connection.rollback()
+    return counts
+
+def run_backend(backend: str, args, report_path: str, ids_path: str):
+    """Runs benchmarks.e2e in a subprocess with DB_BACKEND=backend, saving its report to `report_path`."""
+    command = [sys.executable, "-m", "benchmarks.e2e", "--requests", str(args.requests),
+               "--concurrency", str(args.concurrency), "--warmup", str(args.warmup), "--seed", str(args.seed),
+               "--server-workers", str(args.server_workers), "--ids-file", ids_path, "--save-baseline", report_path]
+    print(f"=== {backend}")
+    subprocess.run(command, env={**os.environ, "DB_BACKEND": backend}, check=True)
+    with open(report_path, encoding="utf-8") as report_file:
+        return json.load(report_file)["results"]
+
+def print_comparison(results: dict):
+    """Prints each endpoint's p95 latency per backend, the overall throughput, and the faster backend."""
+    backends = list(results)
+    labels = sorted(set().union(*(results[backend] for backend in backends)), key=lambda label: (label == "overall", label))
+    print(f"{'endpoint':<36}" + "".join(f"{backend + ' p95':>18}" for backend in backends) + f"{'faster':>14}")
+    for label in labels:
+        p95 = {backend: results[backend][label]["p95_ms"] for backend in backends if label in results[backend]}
+        print(f"{label:<36}" + "".join(f"{p95.get(backend, '-'):>18}" for backend in backends)
+              + f"{min(p95, key=p95.get):>14}")
+    throughput = {backend: results[backend]["overall"]["throughput_rps"] for backend in backends}
+    print(f"{'throughput (req/s)':<36}" + "".join(f"{throughput[backend]:>18}" for backend in backends)
+          + f"{max(throughput, key=throughput.get):>14}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="postgresql,mysql", help="Comma-separated DB_BACKEND values to compare")
+    parser.add_argument("--copy-data", action="store_true", help="Load the Postgres data into MySQL first")
+    parser.add_argument("--output-dir", default="benchmarks/results")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.copy_data:
+        source, target = PostgresDatabaseConnection(), MySQLDatabaseConnection()
+        copy_data(source, target)
+        source.close()
+        target.close()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    ids_path = os.path.join(args.output_dir, "ids.json")
+    if os.path.exists(ids_path):
+        os.remove(ids_path)  # Sampled again by the first run, then shared by the others
+    results = {}
+    for backend in args.backends.split(","):
+        backend = backend.strip()
+        results[backend] = run_backend(backend, args, os.path.join(args.output_dir, f"e2e_{backend}.json"), ids_path)
+    print_comparison(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""End-to-end HTTP load benchmark over every router, with regression gating.
+
+Starts `main:app` under uvicorn (unless --base-url points at a running
+server), replays a weighted traffic mix of catalog browsing, search,
+reviews, recommendations, cart updates and checkout against the database
+selected by DB_BACKEND and its PG_* or MYSQL_* variables, and reports throughput and p50/p95/p99
+latency per endpoint. The mix writes (carts, searches, orders), so point it
+at a disposable database; --seed-scale loads one with generate_data_scaled
+first.
+
+    python -m benchmarks.e2e --seed-scale 1 --requests 20000 --save-baseline benchmarks/baselines/e2e.json
+    python -m benchmarks.e2e --requests 20000 --baseline benchmarks/baselines/e2e.json --max-regression 0.15
+
+With --baseline, the exit status is 1 when an endpoint's p95 latency grows,
+or the overall throughput drops, by more than --max-regression, or when an
+endpoint's error rate rises by more than --max-error-rate.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+from benchmarks.load import run_load
+from connections import database_backend, get_database_connection
+
+ID_SAMPLE_SIZE = 1000
+SEARCH_TERMS = ("wireless", "smart watch", "lamp", "portable speaker", "kitchen", "usb charger", "gaming mouse", "tent")
+
+# (label, weight): the share of each request type in the mix.
+MIX = [
+    ("product/get_by_id", 14), ("product/get_all", 4), ("product/get_by_category", 6), ("product/search", 8),
+    ("category/get_by_id", 3), ("seller/get_by_id", 2), ("offer/get_by_product", 2), ("coupons/get_by_id", 1),
+    ("review/product", 4), ("review/summary", 4), ("product_recommendations/customer", 4),
+    ("product_recommendations/similar", 2), ("customer/get_by_id", 2), ("customer/orders", 3),
+    ("orders/get_by_id", 3), ("order_items/get_by_order", 2), ("payment_method/customer", 1),
+    ("returns/order_item", 1), ("shipping/get_by_id", 1), ("search_history/log", 6),
+    ("shopping_cart/view", 4), ("shopping_cart_product/add", 4), ("shopping_cart_product/update", 2),
+    ("orders/checkout", 2),
+]
+
+def sample_ids(db_connection) -> dict:
+    """Reads a random sample of existing keys, so requests hit rows that exist."""
+    queries = {
+        "product": "SELECT product_id FROM Product",
+        "category": "SELECT category_id FROM Category",
+        "seller": "SELECT seller_id FROM Seller",
+        "coupons": "SELECT coupons_id FROM Coupons",
+        "customer": "SELECT customer_id FROM Customer",
+        "orders": "SELECT orders_id FROM Orders",
+        "shipping": "SELECT shipping_id FROM Shipping",
+        "returned_item": "SELECT order_item_id FROM Returns WHERE order_item_id IS NOT NULL",
+        "cart": "SELECT shopping_cart_id FROM Shopping_Cart",
+        "payment": "SELECT customer_id, payment_method_id FROM Payment_Method WHERE customer_id IS NOT NULL",
+    }
+    ids = {}
+    with db_connection.acquire() as connection:
+        cursor = connection.cursor()
+        for name, query in queries.items():
+            cursor.execute(f"{query} ORDER BY {db_connection.dialect.random} LIMIT {ID_SAMPLE_SIZE};")
+            rows = cursor.fetchall()
+            ids[name] = [row if len(row) > 1 else row[0] for row in rows]
+        cursor.close()
+    missing = [name for name, values in ids.items() if not values and name != "returned_item"]
+    if missing:
+        raise SystemExit(f"No rows in {', '.join(missing)}; seed the database first (--seed-scale).")
+    return ids
+
+def load_ids(path: str) -> dict:
+    """Reads the keys saved by an earlier run from `path`, or samples them and saves them there."""
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as ids_file:
+            return json.load(ids_file)
+    db = get_database_connection()
+    ids = sample_ids(db)
+    db.close()
+    if path:
+        with open(path, "w", encoding="utf-8") as ids_file:
+            json.dump(ids, ids_file)
+    return ids
+
+def build_request(label: str, rng: random.Random, ids: dict) -> tuple:
+    """Builds one (label, method, path, body) request of the given type."""
+    pick = lambda name: rng.choice(ids[name])
+    if label == "product/get_by_id":
+        return label, "GET", f"/product/get_by_id/{pick('product')}", None
+    if label == "product/get_all":
+        return label, "GET", f"/product/get_all?limit=50&after={rng.randint(0, max(ids['product']))}", None
+    if label == "product/get_by_category":
+        return label, "GET", f"/product/get_by_category/{pick('category')}", None
+    if label == "product/search":
+        return label, "GET", f"/product/search?q={rng.choice(SEARCH_TERMS).replace(' ', '+')}&limit=20", None
+    if label == "category/get_by_id":
+        return label, "GET", f"/category/get_by_id/{pick('category')}", None
+    if label == "seller/get_by_id":
+        return label, "GET", f"/seller/get_by_id/{pick('seller')}", None
+    if label == "offer/get_by_product":
+        return label, "GET", f"/offer/get_by_product/{pick('product')}", None
+    if label == "coupons/get_by_id":
+        return label, "GET", f"/coupons/get_by_id/{pick('coupons')}", None
+    if label == "review/product":
+        return label, "GET", f"/review/product/{pick('product')}", None
+    if label == "review/summary":
+        return label, "GET", f"/review/product/{pick('product')}/summary", None
+    if label == "product_recommendations/customer":
+        return label, "GET", f"/product_recommendations/customer/{pick('customer')}", None
+    if label == "product_recommendations/similar":
+        return label, "GET", f"/product_recommendations/similar/{pick('product')}", None
+    if label == "customer/get_by_id":
+        return label, "GET", f"/customer/get_by_id/{pick('customer')}", None
+    if label == "customer/orders":
+        return label, "GET", f"/customer/{pick('customer')}/orders?limit=10", None
+    if label == "orders/get_by_id":
+        return label, "GET", f"/orders/get_by_id/{pick('orders')}", None
+    if label == "order_items/get_by_order":
+        return label, "GET", f"/order_items/get_by_order/{pick('orders')}", None
+    if label == "payment_method/customer":
+        return label, "GET", f"/payment_method/customer/{pick('customer')}", None
+    if label == "returns/order_item":
+        return label, "GET", f"/returns/order_item/{pick('returned_item') if ids['returned_item'] else 1}", None
+    if label == "shipping/get_by_id":
+        return label, "GET", f"/shipping/get_by_id/{pick('shipping')}", None
+    if label == "search_history/log":
+        body = {"search_term": rng.choice(SEARCH_TERMS), "search_date": datetime.now().date().isoformat(), "customer_id": pick("customer")}
+        return label, "POST", "/search_history/log", json.dumps(body)
+    if label == "shopping_cart/view":
+        return label, "GET", f"/shopping_cart/{pick('cart')}/view", None
+    if label == "shopping_cart_product/add":
+        body = {"product_id": pick("product"), "quantity": 1}
+        return label, "POST", f"/shopping_cart_product/{pick('cart')}/add", json.dumps(body)
+    if label == "shopping_cart_product/update":
+        body = {"product_id": pick("product"), "quantity": rng.randint(1, 3)}
+        return label, "PUT", f"/shopping_cart_product/{pick('cart')}/{body['product_id']}", json.dumps(body)
+    if label == "orders/checkout":
+        customer_id, payment_method_id = pick("payment")
+        products = rng.sample(ids["product"], min(len(ids["product"]), rng.randint(1, 3)))
+        body = {"customer_id": customer_id, "payment_method_id": payment_method_id, "shipping_id": pick("shipping"),
+                "items": [{"product_id": product_id, "quantity": 1} for product_id in products]}
+        return label, "POST", "/orders/checkout", json.dumps(body)
+    raise ValueError(f"Unknown request type: {label}")
+
+def build_mix(count: int, ids: dict, seed: int) -> list:
+    """Draws `count` requests from MIX; the same seed and IDs give the same sequence."""
+    rng = random.Random(seed)
+    labels, weights = zip(*MIX)
+    return [build_request(label, rng, ids) for label in rng.choices(labels, weights=weights, k=count)]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, timeout: float = 60.0):
+    """Starts uvicorn on a free port and waits until the root route answers."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(base_url + "/", timeout=1):
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn did not start in time")
+
+def compare(results: dict, baseline: dict, max_regression: float, max_error_rate: float) -> list:
+    """Returns a description of every regression of `results` against `baseline`."""
+    failures = []
+    for label, current in results.items():
+        previous = baseline.get(label)
+        if previous is None:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            failures.append(f"{label}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        previous_errors = previous["errors"] / max(previous["requests"], 1)
+        current_errors = current["errors"] / max(current["requests"], 1)
+        if current_errors > previous_errors + max_error_rate:
+            failures.append(f"{label}: error rate {previous_errors:.2%} -> {current_errors:.2%}")
+    previous_rps, current_rps = baseline["overall"]["throughput_rps"], results["overall"]["throughput_rps"]
+    if current_rps < previous_rps * (1 - max_regression):
+        failures.append(f"overall: throughput {previous_rps} -> {current_rps} req/s")
+    return failures
+
+def print_table(results: dict):
+    print(f"{'endpoint':<36}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label in sorted(results, key=lambda label: (label == "overall", label)):
+        row = results[label]
+        print(f"{label:<36}{row['requests']:>9}{row['errors']:>8}{row['throughput_rps']:>10}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of starting one")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn workers when the server is started here")
+    parser.add_argument("--seed-scale", type=float, help="Reload the database with generate_data_scaled at this scale first")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=500, help="Requests sent before measuring")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the request mix")
+    parser.add_argument("--ids-file", help="Reuse the sampled keys in this JSON file, writing it if it does not exist")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this JSON file and fail on regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth and throughput drop (0.2 = 20%%)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Allowed growth of each endpoint's error rate")
+    args = parser.parse_args()
+
+    if args.seed_scale is not None:
+        subprocess.run([sys.executable, "-m", "inicialization.generate_data_scaled", "--scale", str(args.seed_scale),
+                        "--seed", str(args.seed), "--truncate"], check=True)
+    ids = load_ids(args.ids_file)
+    warmup = build_mix(args.warmup, ids, args.seed + 1)
+    requests = build_mix(args.requests, ids, args.seed)
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_server(args.server_workers)
+    try:
+        if warmup:
+            run_load(base_url, warmup, args.concurrency, len(warmup))
+        results = run_load(base_url, requests, args.concurrency, len(requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_table(results)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "server_workers": args.server_workers if args.base_url is None else None,
+            "seed": args.seed,
+            "backend": database_backend(),
+        },
+        "results": results,
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        failures = compare(results, baseline["results"], args.max_regression, args.max_error_rate)
+        if failures:
+            print("Regressions against " + args.baseline + ":")
+            for failure in failures:
+                print("  " + failure)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (commit {baseline['meta'].get('commit')}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measures the CPU spent turning a 100k-row /product/get_all page into JSON.
+
+ProductCRUD.get_all is replaced by a stub returning rows built with the real
+row mapper, so only the response path is measured (no database needed):
+with FAST_JSON the page is encoded once with orjson, without it FastAPI
+validates it against Page[ProductData] and serializes it with json.
+
+    python -m benchmarks.json_response --rows 100000 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+import services.responses
+from crud.product import _product_from_row
+from main import app
+from services import product
+
+def build_page(rows: int) -> dict:
+    """Builds a page of `rows` products shaped like psycopg2 rows (NUMERIC prices as Decimal)."""
+    items = [
+        _product_from_row((f"Product {i}", f"Description of product {i}", Decimal(f"{i % 1000}.99"), i % 100, i % 10 + 1, i % 20 + 1))
+        for i in range(rows)
+    ]
+    return {"items": items, "next_cursor": None}
+
+def measure(client: TestClient, fast: bool, repeat: int) -> dict:
+    """Requests the page `repeat` times and reports CPU and wall time per request."""
+    services.responses.FAST_JSON = fast
+    cpu, wall, size = [], [], 0
+    for _ in range(repeat):
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        response = client.get("/product/get_all")
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+        response.raise_for_status()
+        size = len(response.content)
+    return {
+        "cpu_ms_per_request": round(statistics.median(cpu) * 1000, 1),
+        "wall_ms_per_request": round(statistics.median(wall) * 1000, 1),
+        "response_bytes": size,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    page = build_page(args.rows)
+    product.crud.get_all = lambda limit=None, after=None: page
+    client = TestClient(app)
+    report = {
+        "rows": args.rows,
+        "validated": measure(client, fast=False, repeat=args.repeat),
+        "fast_json": measure(client, fast=True, repeat=args.repeat),
+    }
+    saved = report["validated"]["cpu_ms_per_request"] - report["fast_json"]["cpu_ms_per_request"]
+    report["cpu_ms_saved_per_request"] = round(saved, 1)
+    report["speedup"] = round(report["validated"]["cpu_ms_per_request"] / max(report["fast_json"]["cpu_ms_per_request"], 0.1), 1)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Small dependency-free HTTP load generator shared by the benchmark scripts."""
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.parse import urlparse
+
+def percentile(samples, fraction: float) -> float:
+    """Returns the given percentile (0-1) of a list of samples, or 0 when empty."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    """Builds a throughput/latency summary from latencies in seconds."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+def run_load(base_url: str, requests, concurrency: int = 50, total: int = 1000, timeout: float = 30.0) -> dict:
+    """Sends `total` requests using `concurrency` keep-alive connections.
+
+    Args:
+        base_url (str): Server root, e.g. http://localhost:8000.
+        requests: Sequence of (label, method, path, body) tuples, cycled in order.
+        concurrency (int): Number of requests kept in flight.
+        total (int): Number of requests to send.
+        timeout (float): Socket timeout per request in seconds.
+
+    Returns:
+        dict: Per-label summaries plus an "overall" entry.
+    """
+    url = urlparse(base_url)
+    schedule = cycle(requests)
+    schedule_lock = threading.Lock()
+    remaining = [total]
+    results = {}  # label -> (latencies, errors)
+    results_lock = threading.Lock()
+
+    def next_request():
+        with schedule_lock:
+            if remaining[0] <= 0:
+                return None
+            remaining[0] -= 1
+            return next(schedule)
+
+    def worker():
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        local = {}
+        while True:
+            request = next_request()
+            if request is None:
+                break
+            label, method, path, body = request
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            latencies, errors = local.setdefault(label, ([], [0]))
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[0] += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                errors[0] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        connection.close()
+        with results_lock:
+            for label, (latencies, errors) in local.items():
+                merged = results.setdefault(label, ([], [0]))
+                merged[0].extend(latencies)
+                merged[1][0] += errors[0]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    summary = {label: summarize(latencies, errors[0], elapsed) for label, (latencies, errors) in results.items()}
+    all_latencies = [latency for latencies, _ in results.values() for latency in latencies]
+    all_errors = sum(errors[0] for _, errors in results.values())
+    summary["overall"] = summarize(all_latencies, all_errors, elapsed)
+    return summary
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Measures how long the API takes to import, start, become ready and shut down.
+
+Every run starts a fresh interpreter, like a restarted worker or a new
+replica scaled out under load:
+
+- import_ms: `import main` in a new process, timed inside it
+- listening_ms: from spawning uvicorn to the first answer from /health, i.e.
+  until the lifespan startup (pool warm-up included) has finished
+- ready_ms: from spawning uvicorn to the first 200 from /ready
+- shutdown_ms: from SIGTERM to the process exiting, pools closed
+
+    python -m benchmarks.startup --runs 10 --save-baseline benchmarks/baselines/startup.json
+    python -m benchmarks.startup --runs 10 --baseline benchmarks/baselines/startup.json --max-regression 0.2
+    python -m benchmarks.startup --top 15   # the modules that take longest to import
+
+With --baseline, the exit status is 1 when the median of any measure grows
+by more than --max-regression.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from benchmarks.e2e import free_port, git_commit
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+MEASURES = ("import_ms", "listening_ms", "ready_ms", "shutdown_ms")
+
+def measure_import() -> float:
+    """Imports main in a new interpreter and returns the time it took, in milliseconds."""
+    result = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+def _status(url: str) -> int:
+    """Status of a GET to `url`, or 0 if nothing answers yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+def measure_server(timeout: float = 60.0) -> dict:
+    """Starts uvicorn on a free port and times it until /health answers, /ready passes and it exits after SIGTERM."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(), stdout=subprocess.DEVNULL,
+    )
+    timings = {}
+    try:
+        while "ready_ms" not in timings:
+            if process.poll() is not None:
+                raise SystemExit(f"uvicorn exited with status {process.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise SystemExit(f"The API was not ready after {timeout} seconds")
+            if "listening_ms" not in timings:
+                if _status(base_url + "/health") == 200:
+                    timings["listening_ms"] = (time.perf_counter() - start) * 1000
+            elif _status(base_url + "/ready") == 200:
+                timings["ready_ms"] = (time.perf_counter() - start) * 1000
+            time.sleep(0.005)
+        stop = time.perf_counter()
+        process.terminate()
+        process.wait(timeout=30)
+        timings["shutdown_ms"] = (time.perf_counter() - stop) * 1000
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    return timings
+
+def slowest_imports(top: int) -> list:
+    """Returns the `top` modules with the largest own import time, from `python -X importtime -c "import main"`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(own) / 1000, int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+def summarize(samples: list) -> dict:
+    return {
+        "median": round(statistics.median(samples), 1),
+        "min": round(min(samples), 1),
+        "max": round(max(samples), 1),
+    }
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Returns a description of every measure whose median grew by more than `max_regression`."""
+    failures = []
+    for measure, current in results.items():
+        previous = baseline.get(measure)
+        if previous and current["median"] > previous["median"] * (1 + max_regression):
+            failures.append(f"{measure}: median {previous['median']} ms -> {current['median']} ms")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, help="Only list the N slowest modules to import")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this JSON file and fail on regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed growth of each median (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.top:
+        print(f"{'self ms':>9}{'cumulative ms':>15}  module")
+        for own, cumulative, name in slowest_imports(args.top):
+            print(f"{own:>9.1f}{cumulative:>15.1f}  {name}")
+        return
+
+    samples = {measure: [] for measure in MEASURES}
+    for _ in range(args.runs):
+        samples["import_ms"].append(measure_import())
+        for measure, value in measure_server().items():
+            samples[measure].append(value)
+    results = {measure: summarize(values) for measure, values in samples.items()}
+
+    print(f"{'measure':<16}{'median':>10}{'min':>10}{'max':>10}")
+    for measure, row in results.items():
+        print(f"{measure:<16}{row['median']:>10}{row['min']:>10}{row['max']:>10}")
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "runs": args.runs,
+            "pool_min": int(os.getenv("PG_POOL_MIN", "1")),
+        },
+        "results": results,
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        failures = compare(results, baseline["results"], args.max_regression)
+        if failures:
+            print("Regressions against " + args.baseline + ":")
+            for failure in failures:
+                print("  " + failure)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (commit {baseline['meta'].get('commit')}).")
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,6 @@
-from .pg_connection import PostgresDatabaseConnection
+from .pg_connection import PostgresDatabaseConnection, PostgresConnectionPool, PoolTimeoutError, get_pool, get_replica_set, close_pool
+from .mysql_connection import MySQLDatabaseConnection, close_mysql_pool
+from .backend import database_backend, get_database_connection
+from .prepared import prepared, registry as statement_registry
+from .async_pg_connection import AsyncPostgresDatabaseConnection, get_async_pool, close_async_pool
+from .lifecycle import open_pools, check_readiness, close_pools
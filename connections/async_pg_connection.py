@@ -0,0 +1,115 @@
+import asyncio
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+
+from .metrics import db_pool_wait
+
+try:
+    import asyncpg
+except ImportError:  # The async path is optional; the sync API works without it.
+    asyncpg = None
+
+_pool = None
+_pool_lock = None
+_pool_loop = None
+
+def _terminate(pool, loop):
+    """Closes the connections of a pool left behind by another event loop.
+
+    The pool cannot be awaited there any more, so its connections are closed
+    without the graceful handshake instead of being leaked until the garbage
+    collector finds them. Once that loop is closed, its transports cannot run
+    their close callbacks either, so their sockets are shut down directly,
+    which ends the server backends just the same.
+    """
+    try:
+        if not loop.is_closed():
+            if loop.is_running():
+                loop.call_soon_threadsafe(pool.terminate)
+            else:
+                pool.terminate()
+            return
+        for holder in pool._holders:
+            connection = holder._con
+            if connection is not None and not connection.is_closed():
+                connection._transport.get_extra_info("socket").shutdown(socket.SHUT_RDWR)
+    except Exception as e:
+        print(f"Error terminating the asyncpg pool of a previous event loop: {e}")
+
+async def get_async_pool(**connect_kwargs):
+    """Return the process-wide asyncpg pool, creating it on first use.
+
+    The pool is bound to the running event loop, so it is created lazily from
+    inside a request rather than at import time. Sizing follows the same
+    PG_POOL_MIN and PG_POOL_MAX variables as the sync pool.
+    """
+    global _pool, _pool_lock, _pool_loop
+    if asyncpg is None:
+        raise RuntimeError("asyncpg is not installed; install it to use the async routes")
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        # A pool cannot be shared across event loops (e.g. successive test clients).
+        if _pool is not None:
+            _terminate(_pool, _pool_loop)
+        _pool, _pool_lock, _pool_loop = None, asyncio.Lock(), loop
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                min_size=int(os.getenv("PG_POOL_MIN", "1")),
+                max_size=int(os.getenv("PG_POOL_MAX", "20")),
+                **connect_kwargs
+            )
+    return _pool
+
+async def close_async_pool():
+    """Close the process-wide asyncpg pool."""
+    global _pool
+    if _pool is not None:
+        if _pool_loop is asyncio.get_running_loop():
+            await _pool.close()
+        else:
+            _terminate(_pool, _pool_loop)
+        _pool = None
+
+class AsyncPostgresDatabaseConnection:
+    """Asyncio counterpart of PostgresDatabaseConnection backed by an asyncpg pool."""
+
+    def __init__(self):
+        """Initialize the database connection parameters."""
+        self._dbname = os.getenv("PG_DBNAME", "amazon")
+        self._duser = os.getenv("PG_USER", "postgres")
+        self._dpass = os.getenv("PG_PASSWORD", "admin123")
+        self._dhost = os.getenv("PG_HOST", "localhost")
+        self._dport = int(os.getenv("PG_PORT", "5432"))
+        self._timeout = float(os.getenv("PG_POOL_TIMEOUT", "5"))
+        self._dsn = os.getenv("PG_DSN")
+
+    async def _get_pool(self):
+        """Return the shared asyncpg pool."""
+        if self._dsn:
+            return await get_async_pool(dsn=self._dsn)
+        return await get_async_pool(
+            database=self._dbname,
+            user=self._duser,
+            password=self._dpass,
+            host=self._dhost,
+            port=self._dport
+        )
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a pooled connection for the duration of an `async with` block."""
+        pool = await self._get_pool()
+        start = time.monotonic()
+        connection = await pool.acquire(timeout=self._timeout)
+        db_pool_wait.observe(time.monotonic() - start, "async")
+        try:
+            yield connection
+        finally:
+            await pool.release(connection)
+
+    async def close(self):
+        """Close the shared asyncpg pool."""
+        await close_async_pool()
\ No newline at end of file
@@ -0,0 +1,25 @@
+import os
+
+from .mysql_connection import MySQLDatabaseConnection
+from .pg_connection import PostgresDatabaseConnection
+
+BACKENDS = {
+    "postgresql": PostgresDatabaseConnection,
+    "postgres": PostgresDatabaseConnection,
+    "mysql": MySQLDatabaseConnection,
+}
+
+def database_backend() -> str:
+    """Returns the engine selected by DB_BACKEND: "postgresql" (the default) or "mysql"."""
+    backend = os.getenv("DB_BACKEND", "postgresql").strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND {backend!r}; expected one of {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[backend].dialect.name
+
+def get_database_connection():
+    """Creates a connection to the engine selected by DB_BACKEND.
+
+    The CRUD classes only rely on what both connection classes provide:
+    `connect`, `acquire` and `dialect`.
+    """
+    return BACKENDS[database_backend()]()
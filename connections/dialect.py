@@ -0,0 +1,162 @@
+"""SQL that differs between the supported database engines.
+
+The CRUD classes write portable SQL where they can and ask their connection's
+`dialect` for the rest: generated keys, list parameters, upserts, date
+arithmetic, full-text search, streaming cursors and row versions.
+"""
+import json
+from typing import List, Sequence
+from uuid import uuid4
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+class PostgresDialect:
+    """PostgreSQL: the reference dialect the queries were written for."""
+
+    name = "postgresql"
+    writable_ctes = True  # INSERT/UPDATE ... RETURNING inside WITH, used by the one-statement checkout
+    Error = psycopg2.Error
+    random = "random()"
+    row_version = "xmin"  # Id of the transaction that wrote the row version, new on every UPDATE
+
+    def insert(self, cursor, query: str, values, key: str) -> int:
+        """Runs an INSERT of one row and returns its generated `key`."""
+        cursor.execute(f"{query.strip().rstrip(';')} RETURNING {key};", values)
+        return cursor.fetchone()[0]
+
+    def insert_rows(self, cursor, table: str, columns: Sequence[str], key: str, rows: List[tuple], page_size: int) -> List[int]:
+        """Inserts rows as multi-row INSERTs of `page_size` rows and returns their keys in order."""
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s RETURNING {key};"
+        return [row[0] for row in execute_values(cursor, query, rows, page_size=page_size, fetch=True)]
+
+    def error_message(self, error) -> str:
+        return (error.pgerror or str(error)).strip()
+
+    def any_of(self, column: str) -> str:
+        """Condition matching `column` against a list passed through `array`."""
+        return f"{column} = ANY(%s)"
+
+    def array(self, values) -> list:
+        return list(values)
+
+    def in_subquery(self, column: str, subquery: str) -> str:
+        """Condition matching `column` against the rows of a subquery that may use LIMIT."""
+        return f"{column} = ANY(ARRAY({subquery}))"
+
+    def day_after(self, placeholder: str = "%s") -> str:
+        """The day after a date parameter, as the exclusive upper bound of a day range."""
+        return f"{placeholder}::date + 1"
+
+    def upsert(self, *conflict_columns: str) -> str:
+        """Clause that turns an INSERT into an update of the row with the same key; follow it with assignments."""
+        return f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET"
+
+    def excluded(self, column: str) -> str:
+        """The value the upserted row tried to insert into `column`."""
+        return f"EXCLUDED.{column}"
+
+    def desc_nulls_last(self, column: str) -> str:
+        return f"{column} DESC NULLS LAST"
+
+    def text_search(self, terms: List[str]) -> tuple:
+        """Full-text prefix search over product name and description (migration 002_product_search).
+
+        Returns:
+            tuple: The match condition, the rank expression (each with one %s
+            placeholder) and the value to bind to both.
+        """
+        query = " & ".join(term + ":*" for term in terms)
+        return "search_vector @@ to_tsquery('english', %s)", "ts_rank(search_vector, to_tsquery('english', %s))", query
+
+    def width_bucket(self, expression: str, bounds: List[float]) -> tuple:
+        """Index of the bucket of `expression` among ascending `bounds`: 0 below the first, len(bounds) above the last.
+
+        Returns:
+            tuple: The SQL expression and its values.
+        """
+        return f"width_bucket({expression}, %s::numeric[])", [list(bounds)]
+
+    def streaming_cursor(self, connection):
+        """A cursor that fetches the result set in batches instead of all at once."""
+        return connection.cursor(name=f"stream_{uuid4().hex}")
+
+class MySQLDialect:
+    """MySQL 8.0.14 or later, with the schema of inicialization/mysql_init.sql."""
+
+    name = "mysql"
+    writable_ctes = False
+    random = "RAND()"
+    row_version = "updated_at"  # Kept by ON UPDATE CURRENT_TIMESTAMP(6) on the catalog tables
+
+    @property
+    def Error(self):
+        # Imported on first use: the driver is optional and slow to import.
+        from .mysql_connection import mysql_driver
+        return mysql_driver().Error
+
+    def insert(self, cursor, query: str, values, key: str) -> int:
+        cursor.execute(query, values)
+        return cursor.lastrowid
+
+    def insert_rows(self, cursor, table: str, columns: Sequence[str], key: str, rows: List[tuple], page_size: int) -> List[int]:
+        # lastrowid is the first key of a multi-row INSERT. The others can be
+        # derived from it only when the statement holds the AUTO_INCREMENT lock
+        # while it allocates them (innodb_autoinc_lock_mode 0 or 1), and then
+        # they step by auto_increment_increment. With 2, the default since 8.0,
+        # concurrent inserts may interleave their values, so each row is
+        # inserted on its own and its key read back.
+        cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment;")
+        lock_mode, increment = (int(value) for value in cursor.fetchone())
+        row_placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        if lock_mode == 2:
+            row_query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {row_placeholders};"
+            return [self.insert(cursor, row_query, row, key) for row in rows]
+        ids = []
+        for start in range(0, len(rows), page_size):
+            page = rows[start:start + page_size]
+            query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_placeholders] * len(page))};"
+            cursor.execute(query, [value for row in page for value in row])
+            ids.extend(range(cursor.lastrowid, cursor.lastrowid + len(page) * increment, increment))
+        return ids
+
+    def error_message(self, error) -> str:
+        return (getattr(error, "msg", None) or str(error)).strip()
+
+    def any_of(self, column: str) -> str:
+        # One JSON parameter instead of a placeholder per value keeps the SQL text constant.
+        return f"{column} IN (SELECT id FROM JSON_TABLE(%s, '$[*]' COLUMNS (id BIGINT PATH '$')) AS ids)"
+
+    def array(self, values) -> str:
+        return json.dumps(list(values))
+
+    def in_subquery(self, column: str, subquery: str) -> str:
+        # MySQL rejects LIMIT directly inside IN (...), but not inside a derived table.
+        return f"{column} IN (SELECT * FROM ({subquery}) AS ids)"
+
+    def day_after(self, placeholder: str = "%s") -> str:
+        return f"DATE({placeholder}) + INTERVAL 1 DAY"
+
+    def upsert(self, *conflict_columns: str) -> str:
+        return "ON DUPLICATE KEY UPDATE"
+
+    def excluded(self, column: str) -> str:
+        return f"VALUES({column})"
+
+    def desc_nulls_last(self, column: str) -> str:
+        return f"{column} DESC"  # NULLs sort first ascending, so last descending
+
+    def text_search(self, terms: List[str]) -> tuple:
+        # Uses the FULLTEXT index on (product_name, description); every word is required as a prefix.
+        match = "MATCH(product_name, description) AGAINST (%s IN BOOLEAN MODE)"
+        return match, match, " ".join(f"+{term}*" for term in terms)
+
+    def width_bucket(self, expression: str, bounds: List[float]) -> tuple:
+        # INTERVAL() returns -1 for NULL, where width_bucket returns NULL.
+        return f"NULLIF(INTERVAL({expression}, {', '.join(['%s'] * len(bounds))}), -1)", list(bounds)
+
+    def streaming_cursor(self, connection):
+        return connection.cursor(buffered=False)
+
+POSTGRESQL = PostgresDialect()
+MYSQL = MySQLDialect()
@@ -0,0 +1,90 @@
+"""Opens the database pools when the API starts, checks readiness and closes them on shutdown.
+
+Nothing connects at import time: the CRUD classes only create their
+connection objects, and each pool is created on first use. The API's
+lifespan calls `open_pools` before serving, so the first requests do not pay
+for the connection handshakes, and `close_pools` when it stops.
+"""
+import asyncio
+import os
+import time
+from typing import Dict
+
+from .async_pg_connection import AsyncPostgresDatabaseConnection, asyncpg, close_async_pool
+from .backend import database_backend, get_database_connection
+from .mysql_connection import close_mysql_pool
+from .pg_connection import close_pool
+
+READY_CHECK_TIMEOUT = 2.0
+
+def _uses_async_pool() -> bool:
+    """The /async routes run on asyncpg, which only exists for the Postgres backend."""
+    return asyncpg is not None and database_backend() == "postgresql"
+
+async def _warm():
+    """Opens the sync and async pools concurrently."""
+    connection = get_database_connection()
+    tasks = [asyncio.to_thread(connection.warm)]
+    if _uses_async_pool():
+        tasks.append(AsyncPostgresDatabaseConnection()._get_pool())
+    await asyncio.gather(*tasks)
+
+async def open_pools(timeout: float = None) -> bool:
+    """Warms the pools, retrying until the database answers or `timeout` seconds have passed.
+
+    A database that is still down when the time is up does not stop the API
+    from starting: the pools are created on the first request that needs
+    them, and `/ready` reports the database as unavailable until then.
+
+    Args:
+        timeout (float, optional): Seconds to keep retrying; DB_STARTUP_TIMEOUT (30) by default.
+
+    Returns:
+        bool: True if the pools were opened.
+    """
+    if timeout is None:
+        timeout = float(os.getenv("DB_STARTUP_TIMEOUT", "30"))
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while True:
+        try:
+            await _warm()
+            return True
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                print(f"❌ Database not reachable at startup, continuing without warm pools: {e}")
+                return False
+            print(f"Database not reachable at startup, retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+async def _check(name: str, check) -> tuple:
+    try:
+        await asyncio.wait_for(check, READY_CHECK_TIMEOUT)
+        return name, "ok"
+    except asyncio.TimeoutError:
+        return name, f"no answer within {READY_CHECK_TIMEOUT} seconds"
+    except Exception as e:
+        return name, str(e).strip() or type(e).__name__
+
+async def _ping_async_pool():
+    pool = await AsyncPostgresDatabaseConnection()._get_pool()
+    await pool.fetchval("SELECT 1;")
+
+async def check_readiness() -> Dict:
+    """Runs a trivial query on every pool the API serves from.
+
+    Returns:
+        Dict: "ready", True if every check passed, and "checks", the outcome of each check.
+    """
+    checks = [_check("database", asyncio.to_thread(get_database_connection().ping))]
+    if _uses_async_pool():
+        checks.append(_check("async_pool", _ping_async_pool()))
+    results = dict(await asyncio.gather(*checks))
+    return {"ready": all(result == "ok" for result in results.values()), "checks": results}
+
+async def close_pools():
+    """Closes every pool, including the replica pools, so no connection outlives the process."""
+    close_pool()
+    close_mysql_pool()
+    await close_async_pool()
@@ -1,47 +1,179 @@
-import mysql.connector
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .dialect import MYSQL
+from .pg_connection import PostgresConnectionPool
+
+def mysql_driver():
+    """Returns the mysql.connector module, imported on first use.
+
+    The MySQL backend is optional, and importing the driver takes longer than
+    the rest of the connections package, so Postgres deployments never load it.
+    """
+    try:
+        import mysql.connector
+    except ImportError:
+        raise RuntimeError("mysql-connector-python is not installed; install it to use DB_BACKEND=mysql") from None
+    return mysql.connector
+
+# OrdersCRUD aggregates an order's items to JSON with GROUP_CONCAT, whose
+# result is cut at group_concat_max_len bytes (1024 by default).
+SESSION_SETUP = "SET SESSION group_concat_max_len = 16777216;"
+
+class MySQLConnectionPool(PostgresConnectionPool):
+    """The same bounded, thread-safe pool, over mysql.connector connections."""
+
+    def _connect(self):
+        """Open a new physical connection and configure its session."""
+        connection = mysql_driver().connect(**self._connect_kwargs)
+        cursor = connection.cursor()
+        cursor.execute(SESSION_SETUP)
+        cursor.close()
+        return connection
+
+    def _is_healthy(self, connection, returned_at: float) -> bool:
+        """Ping an idle connection before reuse, if health checks are on."""
+        if not self.health_check or time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql_driver().Error:
+            return False
+
+    def _reset(self, connection) -> bool:
+        """Roll back an open transaction so the connection can be reused; False if it is broken."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            return True
+        except mysql_driver().Error:
+            return False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_mysql_pool(**connect_kwargs) -> MySQLConnectionPool:
+    """Return the process-wide MySQL pool, creating it on first use.
+
+    It is sized by the same PG_POOL_MIN, PG_POOL_MAX, PG_POOL_TIMEOUT and
+    PG_POOL_HEALTH_CHECK variables as the Postgres pool.
+    """
+    global _pool
+    mysql_driver()  # Fail with an install hint before opening anything
+    with _pool_lock:
+        if _pool is None:
+            _pool = MySQLConnectionPool(
+                minconn=int(os.getenv("PG_POOL_MIN", "1")),
+                maxconn=int(os.getenv("PG_POOL_MAX", "20")),
+                timeout=float(os.getenv("PG_POOL_TIMEOUT", "5")),
+                health_check=os.getenv("PG_POOL_HEALTH_CHECK", "1") != "0",
+                name="mysql",
+                **connect_kwargs
+            )
+        return _pool
+
+def close_mysql_pool():
+    """Close the process-wide MySQL pool so the next `get_mysql_pool` call starts fresh."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
 
 class MySQLDatabaseConnection:
     """This class is responsible for connecting to the MySQL database."""
 
+    dialect = MYSQL
+
     def __init__(self):
-        self._dbname = "amazon"
-        self._duser = "usql"
-        self._dpass = "admin123"
-        self._dhost = "localhost"
-        self._dport = "3306"
-        self.connection = None
+        """Initialize the database connection parameters."""
+        self._dbname = os.getenv("MYSQL_DBNAME", "amazon")
+        self._duser = os.getenv("MYSQL_USER", "usql")
+        self._dpass = os.getenv("MYSQL_PASSWORD", "admin123")
+        self._dhost = os.getenv("MYSQL_HOST", "localhost")
+        self._dport = os.getenv("MYSQL_PORT", "3306")
+        self.pool = None
+
+    def _get_pool(self) -> MySQLConnectionPool:
+        """Return the shared pool, creating it if it is missing or was closed."""
+        self.pool = get_mysql_pool(
+            database=self._dbname,
+            user=self._duser,
+            password=self._dpass,
+            host=self._dhost,
+            port=self._dport,
+            consume_results=True  # so an abandoned streaming cursor does not block the connection
+        )
+        return self.pool
 
     def connect(self):
-        """This method connects to the MySQL database."""
+        """This method attaches to the shared MySQL connection pool."""
         try:
-            self.connection = mysql.connector.connect(
-                database=self._dbname,
-                user=self._duser,
-                password=self._dpass,
-                host=self._dhost,
-                port=self._dport
-            )
+            self._get_pool()
             print("✅ MySQL connection successful!")
         except Exception as e:
             print(f"❌ MySQL connection failed: {e}")
 
+    def warm(self):
+        """Open the PG_POOL_MIN connections of the pool, concurrently."""
+        self._get_pool().warm()
+
+    def ping(self):
+        """Run a trivial query; raises if the database does not answer."""
+        pool = self._get_pool()
+        connection = pool.getconn()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.fetchall()
+            cursor.close()
+        finally:
+            pool.putconn(connection)
+
+    @contextmanager
+    def acquire(self, read_only: bool = False):
+        """Borrow a pooled connection for the duration of a `with` block.
+
+        The transaction is rolled back if the block raises, and the connection
+        always goes back to the pool afterwards.
+
+        Args:
+            read_only (bool): Accepted for parity with PostgresDatabaseConnection;
+                MySQL reads are not routed to replicas.
+        """
+        pool = self._get_pool()
+        connection = pool.getconn()
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except mysql_driver().Error:
+                pass
+            raise
+        finally:
+            pool.putconn(connection)
+
     def test_query(self):
         """This method tests a simple query to check the MySQL connection."""
-        if self.connection:
-            try:
-                cursor = self.connection.cursor()
+        try:
+            with self.acquire() as connection:
+                cursor = connection.cursor()
                 cursor.execute("SHOW TABLES;")
                 tables = cursor.fetchall()
-                print("📋 Tables in 'amazon' database:", tables)
-            except Exception as e:
-                print(f"❌ MySQL query failed: {e}")
-        else:
-            print("⚠️ No active MySQL connection.")
+                cursor.close()
+                print(f"📋 Tables in '{self._dbname}' database:", tables)
+        except Exception as e:
+            print(f"❌ MySQL query failed: {e}")
 
     def close(self):
-        """This method closes the MySQL database connection."""
-        if self.connection:
-            self.connection.close()
+        """This method closes the shared MySQL connection pool."""
+        if self.pool:
+            close_mysql_pool()
+            self.pool = None
             print("🔌 MySQL connection closed.")
 
 # Test the MySQL connection
@@ -49,4 +181,4 @@ if __name__ == "__main__":
     db = MySQLDatabaseConnection()
     db.connect()
     db.test_query()
-    db.close()
\ No newline at end of file
+    db.close()
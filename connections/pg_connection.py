@@ -1,48 +1,388 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from .dialect import POSTGRESQL
+from .metrics import Gauge, db_pool_wait, registry as metrics_registry
+from .prepared import connect
+from .replicas import Replica, ReplicaSet, mark_write
+
+class PoolTimeoutError(PoolError):
+    """Raised when no pooled connection becomes available within the checkout timeout."""
+
+class PostgresConnectionPool:
+    """Thread-safe pool of PostgreSQL connections shared by every CRUD class."""
+
+    def __init__(self, minconn: int = 1, maxconn: int = 10, timeout: float = 5.0,
+                 health_check: bool = True, health_check_interval: float = 5.0, name: str = "sync", **connect_kwargs):
+        """Initialize the pool and open the first `minconn` connections.
+
+        Args:
+            minconn (int): Connections opened up front and kept idle.
+            maxconn (int): Upper bound on open connections.
+            timeout (float): Seconds to wait for a free connection before giving up.
+            health_check (bool): Ping idle connections before handing them out.
+            health_check_interval (float): Only ping connections idle for longer than this many seconds.
+            name (str): Label of the pool in the pool wait metric.
+            **connect_kwargs: Arguments passed to `psycopg2.connect`.
+        """
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Pool size must satisfy 0 <= minconn <= maxconn and maxconn >= 1")
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        self.name = name
+        self._connect_kwargs = connect_kwargs
+        self._idle = []  # (connection, returned_at) pairs, most recently used last
+        self._size = 0  # Open connections, idle or checked out
+        self._condition = threading.Condition()
+        self._closed = False
+        try:
+            self.warm(minconn)
+        except Exception:
+            self.closeall()
+            raise
+
+    def _connect(self):
+        """Open a new physical connection, able to run prepared statements."""
+        return connect(**self._connect_kwargs)
+
+    def _is_healthy(self, connection, returned_at: float) -> bool:
+        """Check that an idle connection can still talk to the server."""
+        if connection.closed:
+            return False
+        if not self.health_check or time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Open idle connections concurrently until `count` connections are open.
+
+        Opening them one after another costs a full connection handshake each,
+        which is what slows down a cold start.
+
+        Args:
+            count (int, optional): Open connections wanted; `minconn` by default, capped at `maxconn`.
+
+        Returns:
+            int: The number of connections opened. If some could not be opened
+            the others are kept and the first error is raised.
+        """
+        with self._condition:
+            if self._closed:
+                raise PoolError("Connection pool is closed")
+            missing = min(self.minconn if count is None else count, self.maxconn) - self._size
+            if missing <= 0:
+                return 0
+            self._size += missing  # Reserve the slots before connecting outside the lock
+        opened, error = [], None
+        with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="pool-warm") as executor:
+            for future in [executor.submit(self._connect) for _ in range(missing)]:
+                try:
+                    opened.append(future.result())
+                except Exception as e:
+                    error = error or e
+        with self._condition:
+            self._size -= missing - len(opened)
+            if self._closed:
+                for connection in opened:
+                    self._close_quietly(connection)
+                self._size -= len(opened)
+            else:
+                self._idle.extend((connection, time.monotonic()) for connection in opened)
+            self._condition.notify_all()
+        if error is not None:
+            raise error
+        return len(opened)
+
+    def getconn(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up.
+
+        Returns:
+            connection: A psycopg2 connection that must be given back with `putconn`.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1  # Reserve the slot before connecting outside the lock
+                    connection, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {self.timeout} seconds")
+                self._condition.wait(remaining)
+
+        if connection is not None and not self._is_healthy(connection, returned_at):
+            self._close_quietly(connection)
+            connection = None  # Reuse the slot for a fresh connection
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+        db_pool_wait.observe(time.monotonic() - start, self.name)
+        return connection
+
+    def putconn(self, connection, close: bool = False):
+        """Return a borrowed connection to the pool.
+
+        Args:
+            connection: The connection obtained from `getconn`.
+            close (bool): Discard the connection instead of keeping it idle.
+        """
+        if not close and not self._reset(connection):
+            close = True
+        with self._condition:
+            if close or self._closed:
+                self._close_quietly(connection)
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _reset(self, connection) -> bool:
+        """Roll back an open transaction so the connection can be reused; False if it is broken."""
+        if connection.closed:
+            return False
+        try:
+            if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()  # Never hand out a connection with an open transaction
+            return True
+        except psycopg2.Error:
+            return False
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts."""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+                self._size -= 1
+            self._idle = []
+            self._condition.notify_all()
+
+    @staticmethod
+    def _close_quietly(connection):
+        """Close a connection, ignoring errors from an already broken socket."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+_pool = None
+_replica_set = None
+_pool_lock = threading.Lock()
+
+def _create_pool(minconn: int, name: str, **connect_kwargs) -> PostgresConnectionPool:
+    """Create a pool sized by PG_POOL_MAX, PG_POOL_TIMEOUT and PG_POOL_HEALTH_CHECK."""
+    return PostgresConnectionPool(
+        minconn=minconn,
+        maxconn=int(os.getenv("PG_POOL_MAX", "20")),
+        timeout=float(os.getenv("PG_POOL_TIMEOUT", "5")),
+        health_check=os.getenv("PG_POOL_HEALTH_CHECK", "1") != "0",
+        name=name,
+        **connect_kwargs
+    )
+
+def get_pool(**connect_kwargs) -> PostgresConnectionPool:
+    """Return the process-wide pool, creating it on first use.
+
+    Pool sizing comes from the PG_POOL_MIN, PG_POOL_MAX, PG_POOL_TIMEOUT and
+    PG_POOL_HEALTH_CHECK environment variables.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _create_pool(int(os.getenv("PG_POOL_MIN", "1")), "sync", **connect_kwargs)
+        return _pool
+
+def _replica_name(dsn: str) -> str:
+    """Names a replica by host, port and database, leaving the credentials out."""
+    params = extensions.parse_dsn(dsn)
+    return f"{params.get('host', 'localhost')}:{params.get('port', '5432')}/{params.get('dbname', '')}"
+
+def get_replica_set() -> Optional[ReplicaSet]:
+    """Return the process-wide replica set, or None if PG_REPLICA_DSNS is empty.
+
+    PG_REPLICA_DSNS is a comma-separated list of libpq connection URIs. Each
+    replica gets a pool sized like the primary's, opened lazily. Reads skip a
+    replica more than PG_REPLICA_MAX_LAG seconds behind, measured at most every
+    PG_REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+    global _replica_set
+    dsns = [dsn.strip() for dsn in os.getenv("PG_REPLICA_DSNS", "").split(",") if dsn.strip()]
+    if not dsns:
+        return None
+    with _pool_lock:
+        if _replica_set is None:
+            _replica_set = ReplicaSet(
+                [Replica(_replica_name(dsn), _create_pool(0, "replica", dsn=dsn)) for dsn in dsns],
+                max_lag=float(os.getenv("PG_REPLICA_MAX_LAG", "1")),
+                check_interval=float(os.getenv("PG_REPLICA_LAG_CHECK_INTERVAL", "1")),
+            )
+        return _replica_set
+
+def _pool_connections():
+    """Open connections of the process-wide pool by state, for the metrics endpoint."""
+    pool = _pool
+    if pool is None:
+        return {}
+    with pool._condition:
+        idle = len(pool._idle)
+        return {("idle",): idle, ("in_use",): pool._size - idle, ("max",): pool.maxconn}
+
+metrics_registry.register(Gauge("db_pool_connections", "Connections of the sync pool by state.", ("state",), _pool_connections))
+metrics_registry.register(Gauge(
+    "db_replica_lag_seconds", "Last measured lag of each replica (+Inf if unreachable).", ("replica",),
+    lambda: _replica_set.lags() if _replica_set is not None else {}))
+
+def close_pool():
+    """Close the process-wide pool and replica pools so the next `get_pool` call starts fresh."""
+    global _pool, _replica_set
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+        if _replica_set is not None:
+            _replica_set.closeall()
+            _replica_set = None
 
 class PostgresDatabaseConnection:
     """This class is responsible for connecting to the PostgreSQL database."""
 
+    dialect = POSTGRESQL
+
     def __init__(self):
         """Initialize the database connection parameters."""
-        self._dbname = "amazon"
-        self._duser = "postgres"
-        self._dpass = "admin123"
-        self._dhost = "localhost"
-        self._dport = "5432"
-        self.connection = None
+        self._dbname = os.getenv("PG_DBNAME", "amazon")
+        self._duser = os.getenv("PG_USER", "postgres")
+        self._dpass = os.getenv("PG_PASSWORD", "admin123")
+        self._dhost = os.getenv("PG_HOST", "localhost")
+        self._dport = os.getenv("PG_PORT", "5432")
+        self._dsn = os.getenv("PG_DSN")  # Connection URI of the primary; replaces the PG_* parameters above
+        self.pool = None
+
+    def _get_pool(self) -> PostgresConnectionPool:
+        """Return the shared pool, creating it if it is missing or was closed."""
+        if self._dsn:
+            self.pool = get_pool(dsn=self._dsn)
+            return self.pool
+        self.pool = get_pool(
+            dbname=self._dbname,
+            user=self._duser,
+            password=self._dpass,
+            host=self._dhost,
+            port=self._dport
+        )
+        return self.pool
 
     def connect(self):
-        """This method connects to the PostgreSQL database."""
-        try:
-            self.connection = psycopg2.connect(
-                dbname=self._dbname,
-                user=self._duser,
-                password=self._dpass,
-                host=self._dhost,
-                port=self._dport
-            )
+        """This method attaches to the shared PostgreSQL connection pool."""
+        try:
+            self._get_pool()
             print("✅ Connection successful!")
         except Exception as e:
             print(f"❌ Connection failed: {e}")
 
+    def warm(self):
+        """Open the PG_POOL_MIN connections of the primary's pool and of each replica's, concurrently.
+
+        A replica that cannot be reached is only reported: reads fall back to
+        the primary until it is back.
+        """
+        pool = self._get_pool()
+        pool.warm()
+        replica_set = get_replica_set()
+        if replica_set is not None:
+            for replica in replica_set.replicas:
+                try:
+                    replica.pool.warm(pool.minconn)
+                except Exception as e:
+                    print(f"Error warming replica {replica.name}: {e}")
+
+    def ping(self):
+        """Run a trivial query on the primary; raises if the database does not answer."""
+        pool = self._get_pool()
+        connection = pool.getconn()
+        try:
+            # A plain cursor: the check is not a CRUD query to time or sample.
+            with extensions.cursor(connection) as cursor:
+                cursor.execute("SELECT 1;")
+        finally:
+            pool.putconn(connection)
+
+    @contextmanager
+    def acquire(self, read_only: bool = False):
+        """Borrow a pooled connection for the duration of a `with` block.
+
+        The transaction is rolled back if the block raises, and the connection
+        always goes back to the pool afterwards.
+
+        Args:
+            read_only (bool): The block only reads, so it may run on a replica
+                (see `get_replica_set`). Any other block counts as a write and
+                pins the session's next reads to the primary.
+        """
+        pool, connection = None, None
+        if read_only:
+            replica_set = get_replica_set()
+            if replica_set is not None:
+                pool, connection = replica_set.checkout()
+        if connection is None:
+            pool = self._get_pool()
+            connection = pool.getconn()
+        try:
+            yield connection
+        except Exception:
+            if not connection.closed:
+                connection.rollback()
+            raise
+        finally:
+            pool.putconn(connection)
+        if not read_only:
+            mark_write()
+
     def test_query(self):
         """This method tests a simple query to check the connection."""
-        if self.connection:
-            try:
-                with self.connection.cursor() as cursor:
+        try:
+            with self.acquire() as connection:
+                with connection.cursor() as cursor:
                     cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';")
                     tables = cursor.fetchall()
                     print("📋 Tables in 'public' schema:", tables)
-            except Exception as e:
-                print(f"❌ Query failed: {e}")
-        else:
-            print("⚠️ No active connection.")
+        except Exception as e:
+            print(f"❌ Query failed: {e}")
 
     def close(self):
-        """This method closes the database connection."""
-        if self.connection:
-            self.connection.close()
+        """This method closes the shared connection pool."""
+        if self.pool:
+            close_pool()
+            self.pool = None
             print("🔌 Connection closed.")
 
 # Test the connection
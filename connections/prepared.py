@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import errors, extensions
+
+from .metrics import crud_operation, db_query_duration, db_query_errors, db_query_rows
+from .slow_query_log import slow_query_log
+
+class PreparedQuery(str):
+    """SQL text registered as a server-side prepared statement.
+
+    It is still a plain string, so code that does not know about prepared
+    statements (EXPLAIN wrappers, named cursors, other drivers) can run it
+    as ordinary SQL. Only positional `%s` placeholders are supported.
+    """
+
+    def __new__(cls, query: str):
+        self = super().__new__(cls, query)
+        self.name = "stmt_" + hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+        param_count = query.count("%s")
+        sql = query.strip().rstrip(";")
+        for number in range(1, param_count + 1):
+            sql = sql.replace("%s", f"${number}", 1)
+        self.prepare_sql = f"PREPARE {self.name} AS {sql};"
+        self.execute_sql = f"EXECUTE {self.name}" + (f" ({', '.join(['%s'] * param_count)});" if param_count else ";")
+        return self
+
+class StatementRegistry:
+    """Process-wide registry of the hot queries to run as prepared statements.
+
+    Each query is prepared once per pooled connection, the first time that
+    connection runs it, and executed by name afterwards. A reconnected
+    connection starts with nothing prepared, so statements are prepared again
+    transparently. Set PG_PREPARED_STATEMENTS=0 (or `enabled = False`) to send
+    the plain SQL instead, e.g. behind a transaction-mode PgBouncer.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> PreparedQuery:
+        """Returns the registered statement for `query`, registering it on first use."""
+        prepared_query = self._queries.get(query)
+        if prepared_query is None:
+            with self._lock:
+                prepared_query = self._queries.setdefault(query, PreparedQuery(query))
+        return prepared_query
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+registry = StatementRegistry(enabled=os.getenv("PG_PREPARED_STATEMENTS", "1") != "0")
+
+def prepared(query: str) -> PreparedQuery:
+    """Marks a query as hot: pooled connections run it as a prepared statement."""
+    return registry.get(query)
+
+class PreparingCursor(extensions.cursor):
+    """Cursor that executes PreparedQuery objects by statement name.
+
+    Every execute is timed and counted in the query metrics, labelled by the
+    CRUD method that issued it, and slow ones are offered to the slow query log.
+    """
+
+    def execute(self, query, vars=None):
+        operation = crud_operation()
+        start = time.perf_counter()
+        try:
+            result = self._execute(query, vars)
+        except psycopg2.Error:
+            db_query_errors.inc(operation)
+            db_query_duration.observe(time.perf_counter() - start, operation)
+            raise
+        duration = time.perf_counter() - start
+        db_query_duration.observe(duration, operation)
+        if self.rowcount > 0:
+            db_query_rows.inc(operation, amount=self.rowcount)
+        if slow_query_log.is_slow(duration) and self.name is None:
+            slow_query_log.record(self, query, vars, duration, operation)
+        return result
+
+    def _execute(self, query, vars):
+        if not isinstance(query, PreparedQuery) or self.name is not None or not registry.enabled:
+            return super().execute(query, vars)  # Named (server-side) cursors cannot DECLARE ... FOR EXECUTE
+        connection = self.connection
+        first_statement = connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+        try:
+            return self._execute_prepared(query, vars)
+        except errors.InvalidSqlStatementName:
+            # Deallocated behind our back (DEALLOCATE ALL, DISCARD ALL): prepare it again.
+            connection.prepared.clear()
+            if not first_statement:
+                raise  # Retrying would hide that the rest of the transaction was aborted
+            connection.rollback()
+            return self._execute_prepared(query, vars)
+
+    def _execute_prepared(self, query: PreparedQuery, vars):
+        connection = self.connection
+        if query.name not in connection.prepared:
+            super().execute(query.prepare_sql)
+            connection.prepared.add(query.name)
+        return super().execute(query.execute_sql, vars)
+
+class PreparingConnection(extensions.connection):
+    """psycopg2 connection that remembers which statements its session has prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.cursor_factory = PreparingCursor
+
+def connect(**connect_kwargs):
+    """Opens a connection able to run prepared statements."""
+    return psycopg2.connect(connection_factory=PreparingConnection, **connect_kwargs)
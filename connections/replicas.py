@@ -0,0 +1,203 @@
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2 import extensions
+
+from .metrics import Counter, Gauge, registry as metrics_registry
+
+# Seconds the replica is behind the primary. A replica that has replayed all
+# the WAL it received while still streaming is caught up; otherwise the lag is
+# the age of the last replayed transaction (infinite if it never replayed one).
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity')
+    END;
+"""
+
+db_reads = metrics_registry.register(Counter(
+    "db_reads_total", "Read-only checkouts by the server they went to and why.", ("route",)))
+
+# ReadSession.server once a request's reads fell back to the primary.
+PRIMARY = "primary"
+
+class ReadSession:
+    """Read routing state of one client session for the duration of a request.
+
+    Reads go to the primary while `primary_until` (a Unix time carried by the
+    client from an earlier write) has not passed, and for the rest of the
+    request once it has written. Otherwise they all go to the server the
+    first one went to, so they see one replay position: a table version read
+    before a list is then never newer than the list.
+    """
+
+    def __init__(self, primary_until: float = 0.0):
+        self.primary_until = primary_until
+        self.wrote = False
+        self.server = None  # The Replica the request reads from, or PRIMARY
+
+    def reads_from_primary(self) -> bool:
+        return self.wrote or time.time() < self.primary_until
+
+_session: ContextVar[Optional[ReadSession]] = ContextVar("read_session", default=None)
+
+def begin_session(session: ReadSession):
+    """Makes `session` the current one; pass the returned token to `end_session`."""
+    return _session.set(session)
+
+def end_session(token):
+    _session.reset(token)
+
+def mark_write():
+    """Records that the current session wrote, pinning its next reads to the primary."""
+    session = _session.get()
+    if session is not None:
+        session.wrote = True
+
+def reads_pinned_to_primary() -> bool:
+    session = _session.get()
+    return session is not None and session.reads_from_primary()
+
+_primary_only: ContextVar[bool] = ContextVar("primary_only", default=False)
+
+@contextmanager
+def primary_reads():
+    """Sends the reads made inside the block to the primary, whatever the session.
+
+    For reads whose result outlives the request, like a cache fill: a value
+    read from a lagging replica would be served to every client, including
+    the one that just wrote, until it expires.
+    """
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+class Replica:
+    """A replica's pool and its last measured lag."""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.lag = math.inf  # Unknown until the first check
+        self.checked_at = -math.inf
+        self._lock = threading.Lock()
+
+    def current_lag(self, check_interval: float) -> float:
+        """Returns the lag, measuring it again if the last check is older than `check_interval`.
+
+        Only one thread measures at a time; the others use the last value.
+        """
+        if time.monotonic() - self.checked_at >= check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._measure()
+            finally:
+                self._lock.release()
+        return self.lag
+
+    def _measure(self):
+        try:
+            connection = self.pool.getconn()
+            try:
+                # A plain cursor: the check is not a CRUD query to time or sample.
+                with connection.cursor(cursor_factory=extensions.cursor) as cursor:
+                    cursor.execute(LAG_QUERY)
+                    self.lag = cursor.fetchone()[0]
+                connection.rollback()
+            finally:
+                self.pool.putconn(connection)
+        except Exception as e:
+            print(f"Error checking replica {self.name}: {e}")
+            self.lag = math.inf
+        self.checked_at = time.monotonic()
+
+    def mark_down(self):
+        """Skips the replica until its next check."""
+        self.lag = math.inf
+        self.checked_at = time.monotonic()
+
+class ReplicaSet:
+    """Replicas that read-only checkouts are spread over, round robin.
+
+    A replica whose lag exceeds `max_lag` seconds, or that cannot be reached,
+    is skipped; when every replica is skipped the read goes to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica], max_lag: float = 1.0, check_interval: float = 1.0):
+        """Creates the set.
+
+        Args:
+            replicas (List[Replica]): The replicas and their pools.
+            max_lag (float): Seconds behind the primary a replica may be and still serve reads.
+            check_interval (float): Seconds a lag measurement is reused before measuring again.
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = itertools.count()
+
+    def choose(self) -> Optional[Replica]:
+        """Returns the next replica within the lag threshold, or None."""
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.current_lag(self.check_interval) <= self.max_lag:
+                return replica
+        return None
+
+    def checkout(self) -> Tuple[Optional[object], Optional[object]]:
+        """Borrows a connection from a replica for a read outside a pinned session.
+
+        Returns:
+            Tuple: (pool, connection), or (None, None) if the read must go to the primary.
+        """
+        if _primary_only.get():
+            db_reads.inc("primary_forced")
+            return None, None
+        if reads_pinned_to_primary():
+            db_reads.inc("primary_session")
+            return None, None
+        session = _session.get()
+        if session is not None and session.server is not None:
+            # Stay on the request's replica while it is usable. Falling back to
+            # the primary is safe, since it is never behind; the reverse is not.
+            replica = session.server
+            if replica is PRIMARY or replica.current_lag(self.check_interval) > self.max_lag:
+                replica = None
+        else:
+            replica = self.choose()
+        if replica is None:
+            self._stay(session, PRIMARY)
+            db_reads.inc("primary_lag")
+            return None, None
+        try:
+            connection = replica.pool.getconn()
+        except Exception as e:
+            print(f"Error connecting to replica {replica.name}: {e}")
+            replica.mark_down()
+            self._stay(session, PRIMARY)
+            db_reads.inc("primary_error")
+            return None, None
+        self._stay(session, replica)
+        db_reads.inc("replica")
+        return replica.pool, connection
+
+    @staticmethod
+    def _stay(session: Optional[ReadSession], server):
+        if session is not None:
+            session.server = server
+
+    def lags(self) -> Dict[Tuple[str, ...], float]:
+        return {(replica.name,): replica.lag for replica in self.replicas}
+
+    def closeall(self):
+        for replica in self.replicas:
+            replica.pool.closeall()
@@ -0,0 +1,141 @@
+import os
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from psycopg2 import extensions
+
+MAX_SQL_LENGTH = 10000  # Bulk inserts inline their rows; keep the stored text bounded
+
+# What a read-only transaction does not stop a SELECT from doing again: row
+# locking clauses (refused there, so the plan would be lost) and advisory locks.
+SIDE_EFFECTS = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bpg_(try_)?advisory", re.IGNORECASE)
+
+class SlowQueryLog:
+    """Bounded ring buffer of slow queries, each with its execution plan.
+
+    A query slower than `threshold_ms` is captured with probability
+    `sample_rate`: its SQL, parameters, duration and the plan from running
+    EXPLAIN on the same connection. Plain SELECTs are explained with
+    (ANALYZE, BUFFERS), which runs them a second time, in a read-only
+    savepoint: a function with side effects then fails instead of writing
+    twice. SELECTs that lock rows or take advisory locks, and every other
+    statement, get a plain EXPLAIN. The savepoint also keeps a failing plan
+    from aborting the caller's transaction, but the EXPLAIN does add to the
+    latency of the request that hit the slow query.
+    """
+
+    def __init__(self, threshold_ms: float = 200.0, sample_rate: float = 0.1, max_entries: int = 100, redact_params: bool = True):
+        """Creates the log.
+
+        Args:
+            threshold_ms (float): Queries at least this slow are candidates.
+            sample_rate (float): Fraction of the slow queries captured (0 disables the log).
+            max_entries (int): Captures kept; the oldest are discarded first.
+            redact_params (bool): Store "?" instead of the parameter values.
+        """
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.redact_params = redact_params
+        self._entries = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self.stats = {"slow": 0, "captured": 0, "explain_errors": 0}
+
+    def is_slow(self, duration: float) -> bool:
+        return self.sample_rate > 0 and duration >= self.threshold
+
+    def record(self, cursor, query, vars, duration: float, operation: str):
+        """Counts a slow query and, if it is sampled, captures it with its plan."""
+        with self._lock:
+            self.stats["slow"] += 1
+        if random.random() >= self.sample_rate:
+            return
+        sql = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+        analyze = self._analyzable(cursor.connection, sql)
+        plan, error = self._explain(cursor.connection, sql, vars, analyze)
+        entry = {
+            "captured_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "operation": operation,
+            "duration_ms": round(duration * 1000, 2),
+            "sql": sql[:MAX_SQL_LENGTH],
+            "params": self._params(vars),
+            "plan": plan,
+            "analyzed": analyze,
+            "explain_error": error,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.stats["captured"] += 1
+            if error is not None:
+                self.stats["explain_errors"] += 1
+
+    def _params(self, vars):
+        if vars is None:
+            return None
+        if self.redact_params:
+            return ["?"] * len(vars) if isinstance(vars, (list, tuple)) else {key: "?" for key in vars}
+        return [repr(value) for value in vars] if isinstance(vars, (list, tuple)) else {key: repr(value) for key, value in vars.items()}
+
+    @staticmethod
+    def _analyzable(connection, sql: str) -> bool:
+        """True for a SELECT that can safely run again under EXPLAIN ANALYZE.
+
+        An autocommit connection has no transaction to make read-only, so its
+        queries are never run again.
+        """
+        return not connection.autocommit and sql.lstrip().upper().startswith("SELECT") and not SIDE_EFFECTS.search(sql)
+
+    @staticmethod
+    def _explain(connection, sql: str, vars, analyze: bool):
+        """Returns (plan, None) or (None, error) from running EXPLAIN on `connection`."""
+        explain = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        in_transaction = not connection.autocommit and connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+        # A plain cursor: the EXPLAIN itself is neither timed nor captured.
+        cursor = connection.cursor(cursor_factory=extensions.cursor)
+        try:
+            if in_transaction:
+                cursor.execute("SAVEPOINT slow_query_explain;")
+            try:
+                if analyze:
+                    cursor.execute("SET TRANSACTION READ ONLY;")  # Undone with the savepoint
+                cursor.execute(explain + sql, vars)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                error = None
+            except Exception as e:
+                plan, error = None, str(e).strip()
+            if in_transaction:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain; RELEASE SAVEPOINT slow_query_explain;")
+            elif (analyze or error is not None) and not connection.autocommit:
+                connection.rollback()  # The EXPLAIN opened the transaction, read-only or failed
+            return plan, error
+        finally:
+            cursor.close()
+
+    def get_entries(self) -> List[Dict]:
+        """Returns the captured queries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "sample_rate": self.sample_rate,
+                "entries": len(self._entries),
+                "max_entries": self._entries.maxlen,
+                **self.stats,
+            }
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.getenv("SLOW_QUERY_MS", "200")),
+    sample_rate=float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "0.1")),
+    max_entries=int(os.getenv("SLOW_QUERY_LOG_SIZE", "100")),
+    redact_params=os.getenv("SLOW_QUERY_REDACT_PARAMS", "1") != "0",
+)
@@ -0,0 +1,51 @@
+from typing import Dict, List, Sequence
+
+BULK_PAGE_SIZE = 1000
+
+def bulk_insert(db_connection, table: str, columns: Sequence[str], key: str, rows: List[tuple]) -> Dict:
+    """Inserts many rows in one transaction and returns their generated keys.
+
+    The rows are sent as multi-row INSERTs of BULK_PAGE_SIZE rows each. If the
+    batch is rejected (a foreign key or check constraint failing on some row),
+    it is replayed row by row, each behind a savepoint, so the valid rows are
+    still inserted and every failing row gets its own error. Everything is
+    committed once at the end.
+
+    Args:
+        db_connection: The connection to borrow from (Postgres or MySQL).
+        table (str): The table to insert into.
+        columns (Sequence[str]): The columns set by each row, in row order.
+        key (str): The generated primary key column to return.
+        rows (List[tuple]): The values of each row.
+
+    Returns:
+        Dict: "ids", the generated key of each row in input order (None for
+        rejected rows), and "errors", a list of {"index", "error"} entries.
+    """
+    ids = [None] * len(rows)
+    errors = []
+    if not rows:
+        return {"ids": ids, "errors": errors}
+    dialect = db_connection.dialect
+    row_query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))});"
+    try:
+        with db_connection.acquire() as connection:
+            cursor = connection.cursor()
+            try:
+                ids = dialect.insert_rows(cursor, table, columns, key, rows, BULK_PAGE_SIZE)
+            except dialect.Error:
+                connection.rollback()
+                for index, row in enumerate(rows):
+                    cursor.execute("SAVEPOINT bulk_row;")
+                    try:
+                        ids[index] = dialect.insert(cursor, row_query, row, key)
+                        cursor.execute("RELEASE SAVEPOINT bulk_row;")
+                    except dialect.Error as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT bulk_row;")
+                        errors.append({"index": index, "error": dialect.error_message(e)})
+            connection.commit()
+            cursor.close()
+        return {"ids": ids, "errors": errors}
+    except Exception as e:
+        print(f"Error in bulk insert into {table}: {e}")
+        return {"ids": [None] * len(rows), "errors": [{"index": index, "error": str(e)} for index in range(len(rows))]}
@@ -0,0 +1,213 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from connections.replicas import primary_reads
+
+try:
+    import redis
+except ImportError:  # The shared backend is optional; the in-process cache works without it.
+    redis = None
+
+_MISSING = object()
+
+class LRUCache:
+    """Thread-safe in-process cache with least-recently-used eviction and a TTL.
+
+    Values are returned as stored, so callers must not mutate them.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or _MISSING if the key is absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return _MISSING
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        """Stores a value, evicting the least recently used entries when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, *keys: str):
+        """Removes keys from the cache."""
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Returns the counters and the current number of entries."""
+        with self._lock:
+            return {"backend": "local", "size": len(self._entries), "maxsize": self.maxsize, **self.stats}
+
+class InMemoryClient:
+    """Local stand-in for a Redis client, implementing the few commands SharedCache uses.
+
+    Lets the shared backend run in development and tests without a Redis server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else float("inf"), value)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+
+class SharedCache:
+    """Cache shared by every API worker, stored in Redis (or a compatible client).
+
+    Expiry is left to the server, so capacity evictions are not counted here.
+    """
+
+    def __init__(self, client=None, ttl: float = 60.0, prefix: str = "amazon:"):
+        self.client = client if client is not None else InMemoryClient()
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.stats[counter] += amount
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or _MISSING if the key is absent."""
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            self._count("misses")
+            return _MISSING
+        self._count("hits")
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Any):
+        """Stores a value with the cache TTL."""
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(1, int(self.ttl)))
+
+    def delete(self, *keys: str):
+        """Removes keys from the cache."""
+        if keys:
+            self._count("invalidations", self.client.delete(*(self.prefix + key for key in keys)))
+
+    def clear(self):
+        """Removes every entry (the whole Redis database)."""
+        self.client.flushdb()
+
+    def get_stats(self) -> Dict:
+        """Returns the counters kept by this worker."""
+        with self._lock:
+            return {"backend": "shared", **self.stats}
+
+class NullCache:
+    """Cache that stores nothing, used when CACHE_BACKEND=off."""
+
+    def get(self, key: str) -> Any:
+        return _MISSING
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def delete(self, *keys: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def get_stats(self) -> Dict:
+        return {"backend": "off"}
+
+def cached(cache, key: str, load: Callable) -> Any:
+    """Read-through lookup: returns the cached value or loads and stores it.
+
+    Empty results (None or an empty list) are not cached, because the CRUD
+    classes also return them when the query failed. A miss is loaded from
+    the primary: a replica that has not replayed the write which invalidated
+    the entry would otherwise put the old value back for the whole TTL.
+
+    Args:
+        cache: The cache to read from.
+        key (str): The cache key.
+        load (Callable): Loads the value from the database on a miss.
+    """
+    value = cache.get(key)
+    if value is not _MISSING:
+        return value
+    with primary_reads():
+        value = load()
+    if value:
+        cache.set(key, value)
+    return value
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide catalog cache, creating it on first use.
+
+    CACHE_BACKEND selects the backend: "local" (default, in-process LRU),
+    "redis" (shared, at REDIS_URL), "shared-local" (the shared backend with
+    its in-memory stand-in) or "off". CACHE_TTL and CACHE_MAXSIZE size it.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            backend = os.getenv("CACHE_BACKEND", "local")
+            ttl = float(os.getenv("CACHE_TTL", "60"))
+            if backend == "off":
+                _cache = NullCache()
+            elif backend == "redis":
+                if redis is None:
+                    raise RuntimeError("redis is not installed; install it to use CACHE_BACKEND=redis")
+                _cache = SharedCache(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")), ttl)
+            elif backend == "shared-local":
+                _cache = SharedCache(InMemoryClient(), ttl)
+            else:
+                _cache = LRUCache(int(os.getenv("CACHE_MAXSIZE", "10000")), ttl)
+    return _cache
@@ -1,20 +1,39 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Dict, Iterator, Tuple
 from pydantic import BaseModel, EmailStr, validator
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.cache import cached, get_cache
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
+from crud.table_versions import table_version
 
 class CategoryData(BaseModel):
     """Data structure for Category."""
     category_name: str
     description: Optional[str] = None  # Optional description
 
+def _category_from_row(category_data) -> CategoryData:
+    """Maps a category row to a CategoryData object."""
+    category_dict = {
+        "category_name": category_data[0],
+        "description": category_data[1]
+    }
+    return CategoryData.model_construct(**category_dict)
+
 class CategoryCRUD:
     """CRUD operations for Category."""
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
+        self.cache = get_cache()
+
+    def _invalidate(self, category_id: int, *keys: str):
+        """Drops the cached category and any other `keys`."""
+        self.cache.delete(f"category:{category_id}", *keys)
+
+    def version(self) -> Optional[int]:
+        """Returns the version of the Category table, which every category write changes, or None if it could not be read."""
+        return table_version(self.db_connection, "category")
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query and commit the changes.
@@ -27,44 +46,42 @@ class CategoryCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)  # For queries without values.
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)  # For queries without values.
+                connection.commit()
+                cursor.close()
             return True  # Indicate that the operation was successful.
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()  # Revert changes in case of error.
             return False
         
-    def _get_categories(self, query: str, values: tuple = None) -> List[CategoryData]:
+    def _get_categories(self, query: str, values: tuple = None, build: Callable = _category_from_row) -> List[CategoryData]:
         """Execute a query and create a list of CategoryData objects.
         
         Args:
             query (str): The SQL query to execute.
             values (tuple, optional): The values to use in the query.
+            build (Callable, optional): Maps a row to a category.
 
         Returns:
             List[CategoryData]: A list of CategoryData objects.
         """
         categories = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            category_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                category_list = cursor.fetchall()
+                cursor.close()
             for category_data in category_list:
-                category_dict = {
-                    "category_name": category_data[0],
-                    "description": category_data[1]
-                }
-                categories.append(CategoryData(**category_dict))
+                categories.append(build(category_data))
             return categories
         except Exception as e:
             print(f"Error en la consulta: {e}")
@@ -81,24 +98,23 @@ class CategoryCRUD:
         """
         query = """
             INSERT INTO Category (category_name, description)
-            VALUES (%s, %s)
-            RETURNING category_id;
+            VALUES (%s, %s);
         """
         values = (data.category_name, data.description)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            category_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                category_id = self.db_connection.dialect.insert(cursor, query, values, "category_id")
+                connection.commit()
+                cursor.close()
+            self._invalidate(category_id)
             return category_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating category: {e}")
             return None
 
     def get_by_id(self, category_id: int) -> Optional[CategoryData]:
-        """Get a category by ID.
+        """Get a category by ID, through the catalog cache.
         
         Args:
             category_id (int): The ID of the category to retrieve.
@@ -106,25 +122,58 @@ class CategoryCRUD:
         Returns:
             Optional[CategoryData]: The retrieved category, or None if not found.
         """
-        query = """
-            SELECT category_name, description
+        return self.get_by_id_with_version(category_id)[0]
+
+    def get_by_id_with_version(self, category_id: int) -> Tuple[Optional[CategoryData], Optional[str]]:
+        """Get a category by ID and the version of its row (`xmin`, or `updated_at` on MySQL), through the catalog cache.
+        
+        Args:
+            category_id (int): The ID of the category to retrieve.
+
+        Returns:
+            Tuple[Optional[CategoryData], Optional[str]]: The category, or None if not found, and its version.
+        """
+        query = prepared(f"""
+            SELECT category_name, description, {self.db_connection.dialect.row_version}
             FROM Category
             WHERE category_id = %s;
+        """)
+        def load():
+            categories = self._get_categories(query, (category_id,), lambda row: (_category_from_row(row), str(row[2])))
+            return categories[0] if categories else None
+        return cached(self.cache, f"category:{category_id}", load) or (None, None)
+
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of categories, ordered by ID.
+        
+        Args:
+            limit (int): The maximum number of categories to return.
+            after (int, optional): Only return categories with an ID greater than this cursor.
+
+        Returns:
+            Dict: The categories in the page and the cursor for the next page.
         """
-        categories = self._get_categories(query, (category_id,))
-        return categories[0] if categories else None
+        query = """
+            SELECT category_name, description, category_id
+            FROM Category
+            WHERE category_id > %s
+            ORDER BY category_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _category_from_row)
 
-    def get_all(self) -> List[CategoryData]:
-        """Get all categories.
+    def stream_all(self) -> Iterator[CategoryData]:
+        """Streams all categories through a server-side cursor.
         
         Returns:
-            List[CategoryData]: A list of all categories.
+            Iterator[CategoryData]: The categories, fetched in batches.
         """
         query = """
             SELECT category_name, description
-            FROM Category;
+            FROM Category
+            ORDER BY category_id;
         """
-        return self._get_categories(query)
+        return stream_rows(self.db_connection, query, (), _category_from_row)
     
     def get_by_name(self, category_name: str) -> List[CategoryData]:
         """Get categories by name (case-insensitive search).
@@ -158,7 +207,9 @@ class CategoryCRUD:
             WHERE category_id = %s;
         """
         values = (data.category_name, data.description, category_id)
-        return self._execute_query(query, values)
+        updated = self._execute_query(query, values)
+        self._invalidate(category_id)
+        return updated
 
     def delete(self, category_id: int) -> bool:
         """Delete a category.
@@ -173,4 +224,6 @@ class CategoryCRUD:
             DELETE FROM Category
             WHERE category_id = %s;
         """
-        return self._execute_query(query, (category_id,))
\ No newline at end of file
+        deleted = self._execute_query(query, (category_id,))
+        self._invalidate(category_id, f"product:category:{category_id}")
+        return deleted
\ No newline at end of file
@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class CouponsData(BaseModel):
     """Data structure for Coupons."""
@@ -9,11 +10,19 @@ class CouponsData(BaseModel):
     discount_value: float
     expiration_date: date
 
+def _coupon_from_row(coupon) -> CouponsData:
+    """Maps a coupon row to a CouponsData object."""
+    coupon_dict = {
+        "discount_code": coupon[0],
+        "discount_value": coupon[1],
+        "expiration_date": coupon[2]
+    }
+    return CouponsData.model_construct(**coupon_dict)
+
 class CouponsCRUD:
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Executes a query in the database.
@@ -26,14 +35,14 @@ class CouponsCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_coupons(self, query: str, values: tuple = None) -> List[CouponsData]:
@@ -48,17 +57,13 @@ class CouponsCRUD:
         """
         coupons = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            coupon_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                coupon_list = cursor.fetchall()
+                cursor.close()
             for coupon in coupon_list:
-                coupon_dict = {
-                    "discount_code": coupon[0],
-                    "discount_value": coupon[1],
-                    "expiration_date": coupon[2]
-                }
-                coupons.append(CouponsData(**coupon_dict))
+                coupons.append(_coupon_from_row(coupon))
             return coupons
         except Exception as e:
             print(f"Error fetching coupon data: {e}")
@@ -75,8 +80,7 @@ class CouponsCRUD:
         """
         query = """
             INSERT INTO Coupons (discount_code, discount_value, expiration_date)
-            VALUES (%s, %s, %s)
-            RETURNING coupons_id;
+            VALUES (%s, %s, %s);
         """
         values = (
             data.discount_code,
@@ -84,14 +88,13 @@ class CouponsCRUD:
             data.expiration_date.strftime('%Y-%m-%d')
         )
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            coupons_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                coupons_id = self.db_connection.dialect.insert(cursor, query, values, "coupons_id")
+                connection.commit()
+                cursor.close()
             return coupons_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating coupon: {e}")
             return None
 
@@ -112,17 +115,37 @@ class CouponsCRUD:
         coupons = self._get_coupons(query, (coupons_id,))
         return coupons[0] if coupons else None
 
-    def get_all(self) -> List[CouponsData]:
-        """Gets all coupons.
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of coupons, ordered by ID.
         
+        Args:
+            limit (int): The maximum number of coupons to return.
+            after (int, optional): Only return coupons with an ID greater than this cursor.
+
         Returns:
-            List[CouponsData]: A list of all coupons.
+            Dict: The coupons in the page and the cursor for the next page.
+        """
+        query = """
+            SELECT discount_code, discount_value, expiration_date, coupons_id
+            FROM Coupons
+            WHERE coupons_id > %s
+            ORDER BY coupons_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _coupon_from_row)
+
+    def stream_all(self) -> Iterator[CouponsData]:
+        """Streams all coupons through a server-side cursor.
+        
+        Returns:
+            Iterator[CouponsData]: The coupons, fetched in batches.
         """
         query = """
             SELECT discount_code, discount_value, expiration_date
-            FROM Coupons;
+            FROM Coupons
+            ORDER BY coupons_id;
         """
-        return self._get_coupons(query)
+        return stream_rows(self.db_connection, query, (), _coupon_from_row)
 
     def update(self, coupons_id: int, data: CouponsData) -> bool:
         """Updates a coupon entry.
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel, EmailStr, validator
 from datetime import date
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class CustomerData(BaseModel):
     """Data structure for Customer."""
@@ -12,12 +13,22 @@ class CustomerData(BaseModel):
     phone: str
     registration_date: date
 
+def _customer_from_row(customer_data) -> CustomerData:
+    """Maps a customer row to a CustomerData object."""
+    customer_dict = {
+        "full_name": customer_data[0],
+        "email": customer_data[1],
+        "shipping_address": customer_data[2],
+        "phone": customer_data[3],
+        "registration_date": customer_data[4]  # No need for strftime here
+    }
+    return CustomerData.model_construct(**customer_dict)
+
 class CustomerCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -30,17 +41,17 @@ class CustomerCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_customers(self, query: str, values: tuple = None) -> List[CustomerData]:
@@ -55,22 +66,16 @@ class CustomerCRUD:
         """
         customers = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            customer_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                customer_list = cursor.fetchall()
+                cursor.close()
             for customer_data in customer_list:
-                customer_dict = {
-                    "full_name": customer_data[0],
-                    "email": customer_data[1],
-                    "shipping_address": customer_data[2],
-                    "phone": customer_data[3],
-                    "registration_date": customer_data[4]  # No need for strftime here
-                }
-                customers.append(CustomerData(**customer_dict))
+                customers.append(_customer_from_row(customer_data))
             return customers
         except Exception as e:
             print(f"Error in query: {e}")
@@ -87,19 +92,17 @@ class CustomerCRUD:
         """
         query = """
             INSERT INTO Customer (full_name, email, shipping_address, phone, registration_date)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING customer_id;
+            VALUES (%s, %s, %s, %s, %s);
         """
         values = (data.full_name, data.email, data.shipping_address, data.phone, data.registration_date.strftime('%Y-%m-%d'))
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            customer_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                customer_id = self.db_connection.dialect.insert(cursor, query, values, "customer_id")
+                connection.commit()
+                cursor.close()
             return customer_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating customer: {e}")
             return None
 
@@ -112,25 +115,45 @@ class CustomerCRUD:
         Returns:
             Optional[CustomerData]: The retrieved customer, or None if not found.
         """
-        query = """
+        query = prepared("""
             SELECT full_name, email, shipping_address, phone, registration_date
             FROM Customer
             WHERE customer_id = %s;
-        """
+        """)
         customers = self._get_customers(query, (customer_id,))
         return customers[0] if customers else None
 
-    def get_all(self) -> List[CustomerData]:
-        """Gets all customers.
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of customers, ordered by ID.
         
+        Args:
+            limit (int): The maximum number of customers to return.
+            after (int, optional): Only return customers with an ID greater than this cursor.
+
         Returns:
-            List[CustomerData]: A list of all customers.
+            Dict: The customers in the page and the cursor for the next page.
+        """
+        query = """
+            SELECT full_name, email, shipping_address, phone, registration_date, customer_id
+            FROM Customer
+            WHERE customer_id > %s
+            ORDER BY customer_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _customer_from_row)
+
+    def stream_all(self) -> Iterator[CustomerData]:
+        """Streams all customers through a server-side cursor.
+        
+        Returns:
+            Iterator[CustomerData]: The customers, fetched in batches.
         """
         query = """
             SELECT full_name, email, shipping_address, phone, registration_date
-            FROM Customer;
+            FROM Customer
+            ORDER BY customer_id;
         """
-        return self._get_customers(query)
+        return stream_rows(self.db_connection, query, (), _customer_from_row)
 
     def get_by_email(self, email: str) -> Optional[CustomerData]:
         """Gets a customer by email.
@@ -141,11 +164,11 @@ class CustomerCRUD:
         Returns:
             Optional[CustomerData]: The retrieved customer, or None if not found.
         """
-        query = """
+        query = prepared("""
             SELECT full_name, email, shipping_address, phone, registration_date
             FROM Customer
             WHERE email = %s;
-        """
+        """)
         customers = self._get_customers(query, (email,))
         return customers[0] if customers else None
 
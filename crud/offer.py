@@ -1,19 +1,30 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class OfferData(BaseModel):
     """Data structure for Offer."""
     discount: float
     start_date: date
     end_date: date
+    product_id: Optional[int] = None  # Foreign key; None for offers not tied to a product
+
+def _offer_from_row(offer) -> OfferData:
+    """Maps a offer row to a OfferData object."""
+    offer_dict = {
+        "discount": offer[0],
+        "start_date": offer[1],
+        "end_date": offer[2],
+        "product_id": offer[3]
+    }
+    return OfferData.model_construct(**offer_dict)
 
 class OfferCRUD:
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Executes a query in the database.
@@ -26,14 +37,14 @@ class OfferCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_offers(self, query: str, values: tuple = None) -> List[OfferData]:
@@ -48,17 +59,13 @@ class OfferCRUD:
         """
         offers = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            offer_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                offer_list = cursor.fetchall()
+                cursor.close()
             for offer in offer_list:
-                offer_dict = {
-                    "discount": offer[0],
-                    "start_date": offer[1],
-                    "end_date": offer[2]
-                }
-                offers.append(OfferData(**offer_dict))
+                offers.append(_offer_from_row(offer))
             return offers
         except Exception as e:
             print(f"Error fetching offer data: {e}")
@@ -74,20 +81,18 @@ class OfferCRUD:
             Optional[int]: The ID of the created offer, or None if there was an error.
         """
         query = """
-            INSERT INTO Offer (discount, start_date, end_date)
-            VALUES (%s, %s, %s)
-            RETURNING offer_id;
+            INSERT INTO Offer (discount, start_date, end_date, product_id)
+            VALUES (%s, %s, %s, %s);
         """
-        values = (data.discount, data.start_date.strftime('%Y-%m-%d'), data.end_date.strftime('%Y-%m-%d'))
+        values = (data.discount, data.start_date.strftime('%Y-%m-%d'), data.end_date.strftime('%Y-%m-%d'), data.product_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            offer_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                offer_id = self.db_connection.dialect.insert(cursor, query, values, "offer_id")
+                connection.commit()
+                cursor.close()
             return offer_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating offer: {e}")
             return None
 
@@ -101,24 +106,61 @@ class OfferCRUD:
             Optional[OfferData]: The retrieved offer, or None if not found.
         """
         query = """
-            SELECT discount, start_date, end_date
+            SELECT discount, start_date, end_date, product_id
             FROM Offer
             WHERE offer_id = %s;
         """
         offers = self._get_offers(query, (offer_id,))
         return offers[0] if offers else None
 
-    def get_all(self) -> List[OfferData]:
-        """Gets all offers.
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of offers, ordered by ID.
+        
+        Args:
+            limit (int): The maximum number of offers to return.
+            after (int, optional): Only return offers with an ID greater than this cursor.
+
+        Returns:
+            Dict: The offers in the page and the cursor for the next page.
+        """
+        query = """
+            SELECT discount, start_date, end_date, product_id, offer_id
+            FROM Offer
+            WHERE offer_id > %s
+            ORDER BY offer_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _offer_from_row)
+
+    def stream_all(self) -> Iterator[OfferData]:
+        """Streams all offers through a server-side cursor.
         
         Returns:
-            List[OfferData]: A list of all offers.
+            Iterator[OfferData]: The offers, fetched in batches.
         """
         query = """
-            SELECT discount, start_date, end_date
-            FROM Offer;
+            SELECT discount, start_date, end_date, product_id
+            FROM Offer
+            ORDER BY offer_id;
+        """
+        return stream_rows(self.db_connection, query, (), _offer_from_row)
+
+    def get_by_product(self, product_id: int) -> List[OfferData]:
+        """Gets the offers for a specific product, most recent first.
+        
+        Args:
+            product_id (int): The ID of the product to retrieve offers for.
+
+        Returns:
+            List[OfferData]: A list of offers for the specified product.
+        """
+        query = """
+            SELECT discount, start_date, end_date, product_id
+            FROM Offer
+            WHERE product_id = %s
+            ORDER BY end_date DESC;
         """
-        return self._get_offers(query)
+        return self._get_offers(query, (product_id,))
 
     def update(self, offer_id: int, data: OfferData) -> bool:
         """Updates an offer.
@@ -132,10 +174,10 @@ class OfferCRUD:
         """
         query = """
             UPDATE Offer
-            SET discount = %s, start_date = %s, end_date = %s
+            SET discount = %s, start_date = %s, end_date = %s, product_id = %s
             WHERE offer_id = %s;
         """
-        values = (data.discount, data.start_date.strftime('%Y-%m-%d'), data.end_date.strftime('%Y-%m-%d'), offer_id)
+        values = (data.discount, data.start_date.strftime('%Y-%m-%d'), data.end_date.strftime('%Y-%m-%d'), data.product_id, offer_id)
         return self._execute_query(query, values)
 
     def delete(self, offer_id: int) -> bool:
@@ -1,7 +1,9 @@
+from datetime import datetime
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.bulk import bulk_insert
 
 class OrderItemData(BaseModel):
     """Data structure for Order_Items."""
@@ -16,8 +18,7 @@ class OrderItemCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -30,46 +31,95 @@ class OrderItemCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def create(self, data: OrderItemData) -> Optional[int]:
         """Creates a new order item.
         
+        The item gets the created_at of its order, so it lands in the same
+        monthly partition and the order history finds it with the order's dates.
+
         Args:
             data (OrderItemData): The data for the new order item.
 
         Returns:
             Optional[int]: The ID of the created order item, or None if there was an error.
         """
+        # Without the order, the default date lets the foreign key report the error.
         query = """
-            INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase, coupon_id, offer_id)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING order_item_id;
+            INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase, coupon_id, offer_id, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s,
+                    COALESCE((SELECT o.created_at FROM Orders o WHERE o.orders_id = %s), CURRENT_TIMESTAMP));
         """
-        values = (data.orders_id, data.product_id, data.quantity, data.price_at_purchase, data.coupon_id, data.offer_id)
+        values = (data.orders_id, data.product_id, data.quantity, data.price_at_purchase, data.coupon_id, data.offer_id,
+                  data.orders_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            order_item_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                order_item_id = self.db_connection.dialect.insert(cursor, query, values, "order_item_id")
+                connection.commit()
+                cursor.close()
             return order_item_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating order item: {e}")
             return None
 
+    def bulk_create(self, rows: List[OrderItemData]) -> Dict:
+        """Creates many order items in one transaction.
+        
+        Each item gets the created_at of its order, as in `create`.
+
+        Args:
+            rows (List[OrderItemData]): The data for the new order items.
+
+        Returns:
+            Dict: The generated IDs in input order and the errors of the rejected rows.
+        """
+        order_dates = self._order_dates({data.orders_id for data in rows})
+        if order_dates is None:
+            return {"ids": [None] * len(rows), "errors": [{"index": index, "error": "Internal error reading the orders"}
+                                                           for index in range(len(rows))]}
+        now = datetime.now()  # Only for items of unknown orders, which the foreign key rejects
+        columns = ("orders_id", "product_id", "quantity", "price_at_purchase", "coupon_id", "offer_id", "created_at")
+        values = [(data.orders_id, data.product_id, data.quantity, data.price_at_purchase, data.coupon_id, data.offer_id,
+                   order_dates.get(data.orders_id, now)) for data in rows]
+        return bulk_insert(self.db_connection, "Order_Items", columns, "order_item_id", values)
+
+    def _order_dates(self, orders_ids: set) -> Optional[Dict[int, datetime]]:
+        """Reads the created_at of the given orders from the primary.
+
+        Args:
+            orders_ids (set): The IDs of the orders.
+
+        Returns:
+            Optional[Dict[int, datetime]]: The date of each existing order, or None if the query failed.
+        """
+        if not orders_ids:
+            return {}
+        dialect = self.db_connection.dialect
+        query = f"SELECT orders_id, created_at FROM Orders WHERE {dialect.any_of('orders_id')};"
+        try:
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (dialect.array(orders_ids),))
+                order_dates = dict(cursor.fetchall())
+                cursor.close()
+            return order_dates
+        except Exception as e:
+            print(f"Error reading order dates: {e}")
+            return None
+
     def _get_order_items(self, query: str, values: tuple = None) -> List[Dict]:
         """Executes a SELECT query and returns order items as a list of dictionaries.
         
@@ -82,19 +132,20 @@ class OrderItemCRUD:
         """
         order_items = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            for order_item in cursor.fetchall():
-                order_items.append({
-                    "orders_id": order_item[0],
-                    "product_id": order_item[1],
-                    "product_name": order_item[2],  # Product name from Product table
-                    "quantity": order_item[3],
-                    "price_at_purchase": order_item[4],
-                    "coupon_discount": order_item[5],  # Discount from coupon
-                    "offer_discount": order_item[6],  # Discount from offer
-                })
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                for order_item in cursor.fetchall():
+                    order_items.append({
+                        "orders_id": order_item[0],
+                        "product_id": order_item[1],
+                        "product_name": order_item[2],  # Product name from Product table
+                        "quantity": order_item[3],
+                        "price_at_purchase": order_item[4],
+                        "coupon_discount": order_item[5],  # Discount from coupon
+                        "offer_discount": order_item[6],  # Discount from offer
+                    })
+                cursor.close()
             return order_items
         except Exception as e:
             print(f"Error fetching order items: {e}")
@@ -109,7 +160,7 @@ class OrderItemCRUD:
         Returns:
             List[Dict]: A list of order items for the specified order.
         """
-        query = """
+        query = prepared("""
             SELECT oi.orders_id, oi.product_id, p.product_name, oi.quantity, oi.price_at_purchase,
                 COALESCE(c.discount_value, 0) AS discount_value, 
                 COALESCE(o.discount, 0) AS discount
@@ -118,7 +169,7 @@ class OrderItemCRUD:
             LEFT JOIN Coupons c ON oi.coupon_id = c.coupons_id
             LEFT JOIN Offer o ON oi.offer_id = o.offer_id
             WHERE oi.orders_id = %s;
-        """
+        """)
         return self._get_order_items(query, (order_id,))
 
     def get_one_from_order(self, order_id: int, product_id: int) -> Optional[Dict]:
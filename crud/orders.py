@@ -1,7 +1,13 @@
-from typing import List, Optional, Dict
-from pydantic import BaseModel
+import json
+from datetime import date, datetime
+from typing import List, Optional, Dict, Iterator
+from pydantic import BaseModel, Field
+from psycopg2.extras import Json
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, AsyncPostgresDatabaseConnection, prepared
+from connections.dialect import POSTGRESQL
+from crud.cache import get_cache
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class OrderItem(BaseModel):
     """Data structure for Order Items."""
@@ -23,12 +29,215 @@ class OrdersData(BaseModel):
     order_items: List[OrderItem] = []  # List of products in the order
     calculated_total: Optional[float] = None  # Optional if you don't want to validate it always
 
+class CheckoutItem(BaseModel):
+    """One line of a checkout; the price is taken from Product at purchase time."""
+    product_id: int
+    quantity: int = Field(gt=0)
+    coupon_id: Optional[int] = None
+    offer_id: Optional[int] = None
+
+class CheckoutData(BaseModel):
+    """Data structure for a checkout: the order and all of its items."""
+    order_status: str = "Pending"
+    customer_id: int
+    payment_method_id: int
+    shipping_id: int
+    items: List[CheckoutItem] = Field(min_length=1)
+
+def line_total(price: str, quantity: str, coupon_discount: str, offer_discount: str) -> str:
+    """SQL for the total of an order line: its price times its quantity minus its
+    coupon and offer discounts (NULL when absent), never below zero.
+
+    Checkout, the order reads and the order_totals triggers (migration
+    012_clamped_line_totals) all use this rule, so a discount larger than the
+    line cannot make the stored and the calculated totals disagree.
+    """
+    return f"GREATEST({price} * {quantity} - COALESCE({coupon_discount}, 0) - COALESCE({offer_discount}, 0), 0)"
+
+# Inserts the order and its items, decrements stock and persists the discounted
+# total in one statement. Product rows are locked in ID order, so concurrent
+# checkouts cannot deadlock, and only decremented when enough stock is left.
+# If any line cannot be served the order is not inserted and the caller rolls
+# back, which also restores the stock of the other lines.
+CHECKOUT_QUERY = f"""
+    WITH input AS (
+        SELECT *
+        FROM jsonb_to_recordset(%(items)s::jsonb)
+            AS i(line INT, product_id INT, quantity INT, coupon_id INT, offer_id INT)
+    ),
+    wanted AS (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM input
+        GROUP BY product_id
+    ),
+    locked AS (
+        SELECT p.product_id
+        FROM Product p
+        JOIN wanted w ON w.product_id = p.product_id
+        ORDER BY p.product_id
+        FOR UPDATE OF p
+    ),
+    stock AS (
+        UPDATE Product p
+        SET quantity_available = p.quantity_available - w.quantity
+        FROM wanted w
+        JOIN locked l ON l.product_id = w.product_id
+        WHERE p.product_id = w.product_id AND p.quantity_available >= w.quantity
+        RETURNING p.product_id, p.price, p.category_id
+    ),
+    priced AS (
+        SELECT i.line, i.product_id, i.quantity, s.price, c.coupons_id, ofr.offer_id,
+               {line_total("s.price", "i.quantity", "c.discount_value", "ofr.discount")} AS line_total
+        FROM input i
+        JOIN stock s ON s.product_id = i.product_id
+        LEFT JOIN Coupons c ON c.coupons_id = i.coupon_id AND c.expiration_date >= CURRENT_DATE
+        LEFT JOIN Offer ofr ON ofr.offer_id = i.offer_id AND CURRENT_DATE BETWEEN ofr.start_date AND ofr.end_date
+            AND (ofr.product_id IS NULL OR ofr.product_id = i.product_id)
+    ),
+    new_order AS (
+        INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
+        SELECT SUM(line_total), %(order_status)s, %(customer_id)s, %(payment_method_id)s, %(shipping_id)s
+        FROM priced
+        HAVING COUNT(*) = (SELECT COUNT(*) FROM input)
+        RETURNING orders_id, total_amount
+    ),
+    new_items AS (
+        INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase, coupon_id, offer_id)
+        SELECT n.orders_id, p.product_id, p.quantity, p.price, p.coupons_id, p.offer_id
+        FROM new_order n, priced p
+        ORDER BY p.line
+    )
+    SELECT
+        (SELECT orders_id FROM new_order),
+        (SELECT total_amount FROM new_order),
+        ARRAY(SELECT product_id FROM wanted WHERE product_id NOT IN (SELECT product_id FROM stock) ORDER BY product_id),
+        ARRAY(SELECT DISTINCT category_id FROM stock);
+"""
+
+# One row per order, with its items aggregated to JSON and the totals computed
+# in SQL. A line's total_price is its line_total; calculated_total is the sum
+# over the order's lines.
+# {orders} selects the orders, and {orders_filter} and {items_filter} may add
+# created_at bounds on o and oi, so that only the Orders and Order_Items
+# partitions of those months are read. An order's items are never older than
+# the order, so a lower bound on the orders also holds for their items.
+ORDERS_WITH_ITEMS_QUERY = """
+    SELECT
+        o.total_amount,
+        o.order_status,
+        o.customer_id,
+        o.payment_method_id,
+        o.shipping_id,
+        {order_items} AS order_items,
+        {calculated_total} AS calculated_total,
+        o.created_at,
+        o.orders_id
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON o.orders_id = oi.orders_id{items_filter}
+    LEFT JOIN Product p ON oi.product_id = p.product_id
+    LEFT JOIN Coupons c ON oi.coupon_id = c.coupons_id
+    LEFT JOIN Offer ofr ON oi.offer_id = ofr.offer_id
+    WHERE {orders}{orders_filter}
+    GROUP BY o.orders_id, o.created_at
+    ORDER BY o.orders_id {direction};
+"""
+
+LINE_TOTAL = line_total("oi.price_at_purchase", "oi.quantity", "c.discount_value", "ofr.discount")
+
+LINE_FIELDS = f"""'product_id', oi.product_id,
+                'product_name', p.product_name,
+                'quantity', oi.quantity,
+                'price_at_purchase', oi.price_at_purchase,
+                'coupon_discount', COALESCE(c.discount_value, 0),
+                'offer_discount', COALESCE(ofr.discount, 0),
+                'total_price', {LINE_TOTAL}"""
+
+# The order_items and calculated_total aggregates of ORDERS_WITH_ITEMS_QUERY.
+# MySQL has neither json_agg with ORDER BY nor FILTER, so it concatenates the
+# JSON objects of the lines and skips the NULL line of an order without items
+# with CASE (GROUP_CONCAT and SUM ignore NULLs).
+ORDER_ITEMS_AGGREGATES = {
+    "postgresql": {
+        "order_items": f"""COALESCE(
+            json_agg(json_build_object(
+                {LINE_FIELDS}
+            ) ORDER BY oi.order_item_id) FILTER (WHERE oi.product_id IS NOT NULL),
+            '[]'
+        )""",
+        "calculated_total": f"COALESCE(SUM({LINE_TOTAL}) FILTER (WHERE oi.product_id IS NOT NULL), 0)",
+    },
+    "mysql": {
+        "order_items": f"""COALESCE(
+            CONCAT('[', GROUP_CONCAT(CASE WHEN oi.product_id IS NOT NULL THEN JSON_OBJECT(
+                {LINE_FIELDS}
+            ) END ORDER BY oi.order_item_id), ']'),
+            '[]'
+        )""",
+        "calculated_total": f"COALESCE(SUM(CASE WHEN oi.product_id IS NOT NULL THEN {LINE_TOTAL} END), 0)",
+    },
+}
+
+def orders_with_items_query(dialect, orders: str, direction: str = "ASC", orders_filter: str = "",
+                            items_filter: str = "") -> str:
+    """Builds ORDERS_WITH_ITEMS_QUERY for a dialect.
+
+    Args:
+        dialect: The dialect of the connection that will run the query.
+        orders (str): The condition on o that selects the orders.
+        direction (str): ASC or DESC, the order of the orders_id column.
+        orders_filter (str): Extra conditions on o, starting with AND.
+        items_filter (str): Extra join conditions on oi, starting with AND.
+
+    Returns:
+        str: The SQL text.
+    """
+    return ORDERS_WITH_ITEMS_QUERY.format(orders=orders, direction=direction, orders_filter=orders_filter,
+                                          items_filter=items_filter, **ORDER_ITEMS_AGGREGATES[dialect.name])
+
+MAX_ORDERS_PER_BATCH = 1000
+
+class OrderWithItems(OrdersData):
+    """An order with its items, as returned by the batch and order history endpoints."""
+    orders_id: int
+    created_at: Optional[datetime] = None
+
+def _order_from_row(order) -> Dict:
+    """Maps a (total_amount, order_status, customer_id, payment_method_id, shipping_id, calculated_total) row to a dictionary."""
+    return {
+        "total_amount": order[0],
+        "order_status": order[1],
+        "customer_id": order[2],
+        "payment_method_id": order[3],
+        "shipping_id": order[4],
+        "order_items": [],
+        "calculated_total": order[5],
+    }
+
+def _order_with_items_from_row(order) -> Dict:
+    """Maps a row of ORDERS_WITH_ITEMS_QUERY to a dictionary with the order's items and totals."""
+    order_items = order[5]
+    if isinstance(order_items, (bytes, bytearray)):
+        order_items = order_items.decode("utf-8")  # mysql-connector may return GROUP_CONCAT as a binary string
+    if isinstance(order_items, str):
+        order_items = json.loads(order_items)
+    return {
+        "total_amount": order[0],
+        "order_status": order[1],
+        "customer_id": order[2],
+        "payment_method_id": order[3],
+        "shipping_id": order[4],
+        "order_items": order_items,
+        "calculated_total": order[6],
+        "created_at": order[7],
+        "orders_id": order[8],
+    }
+
 class OrdersCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
+        self.cache = get_cache()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -41,14 +250,14 @@ class OrdersCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_orders(self, query: str, values: tuple = None) -> List[Dict]:
@@ -63,17 +272,12 @@ class OrdersCRUD:
         """
         orders = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            for order in cursor.fetchall():
-                orders.append({
-                    "total_amount": order[0],
-                    "order_status": order[1],
-                    "customer_id": order[2],
-                    "payment_method_id": order[3],
-                    "shipping_id": order[4],
-                })
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                for order in cursor.fetchall():
+                    orders.append(_order_from_row(order))
+                cursor.close()
             return orders
         except Exception as e:
             print(f"Error fetching orders: {e}")
@@ -90,22 +294,140 @@ class OrdersCRUD:
         """
         query = """
             INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING orders_id;
+            VALUES (%s, %s, %s, %s, %s);
         """
         values = (data.total_amount, data.order_status, data.customer_id, data.payment_method_id, data.shipping_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            orders_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                orders_id = self.db_connection.dialect.insert(cursor, query, values, "orders_id")
+                connection.commit()
+                cursor.close()
             return orders_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating order: {e}")
             return None
 
+    def checkout(self, data: CheckoutData) -> Dict:
+        """Places an order with all of its items in one transaction.
+        
+        Each item is priced from Product, its coupon discount is applied if the
+        coupon has not expired and its offer discount if the offer is active;
+        the sum of the discounted lines is stored as the order total. Stock is
+        decremented for every item, and the whole order is rejected if any
+        product is unknown or does not have enough stock left.
+        
+        Args:
+            data (CheckoutData): The order and its items.
+
+        Returns:
+            Dict: The new order's ID and total, or an error and the IDs of the unavailable products.
+        """
+        try:
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if self.db_connection.dialect.writable_ctes:
+                    items = [{"line": line, **item.model_dump()} for line, item in enumerate(data.items)]
+                    cursor.execute(CHECKOUT_QUERY, {
+                        "items": Json(items),
+                        "order_status": data.order_status,
+                        "customer_id": data.customer_id,
+                        "payment_method_id": data.payment_method_id,
+                        "shipping_id": data.shipping_id,
+                    })
+                    orders_id, total_amount, unavailable, category_ids = cursor.fetchone()
+                else:
+                    orders_id, total_amount, unavailable, category_ids = self._checkout_in_steps(cursor, data)
+                cursor.close()
+                if orders_id is None:
+                    connection.rollback()
+                    return {"error": "Insufficient stock or unknown product", "unavailable_products": unavailable}
+                connection.commit()
+            self.cache.delete(*(f"product:{item.product_id}" for item in data.items),
+                              *(f"product:category:{category_id}" for category_id in category_ids))
+            return {"orders_id": orders_id, "total_amount": total_amount}
+        except Exception as e:
+            print(f"Error in checkout: {e}")
+            return {"error": "Internal error placing the order"}
+
+    def _checkout_in_steps(self, cursor, data: CheckoutData) -> tuple:
+        """Runs the checkout of CHECKOUT_QUERY as separate statements, for engines without writable CTEs.
+        
+        It follows the same rules in the caller's transaction: the products are
+        locked in ID order, nothing is inserted if any of them lacks stock, and
+        expired coupons and inactive offers are ignored.
+        
+        Args:
+            cursor: A cursor of the checkout's connection.
+            data (CheckoutData): The order and its items.
+
+        Returns:
+            tuple: The new order's ID and total (both None if it was rejected),
+            the IDs of the unavailable products and the categories of the
+            products bought.
+        """
+        dialect = self.db_connection.dialect
+        wanted = {}
+        for item in data.items:
+            wanted[item.product_id] = wanted.get(item.product_id, 0) + item.quantity
+        cursor.execute(f"""
+            SELECT product_id, quantity_available, price, category_id
+            FROM Product
+            WHERE {dialect.any_of("product_id")}
+            ORDER BY product_id
+            FOR UPDATE;
+        """, (dialect.array(sorted(wanted)),))
+        products = {row[0]: row for row in cursor.fetchall()}
+        unavailable = [product_id for product_id in sorted(wanted)
+                       if product_id not in products or products[product_id][1] < wanted[product_id]]
+        if unavailable:
+            return None, None, unavailable, []
+        cursor.executemany("""
+            UPDATE Product
+            SET quantity_available = quantity_available - %s
+            WHERE product_id = %s;
+        """, [(quantity, product_id) for product_id, quantity in sorted(wanted.items())])
+
+        coupons, offers = {}, {}
+        coupon_ids = [item.coupon_id for item in data.items if item.coupon_id is not None]
+        if coupon_ids:
+            cursor.execute(f"""
+                SELECT coupons_id, discount_value
+                FROM Coupons
+                WHERE {dialect.any_of("coupons_id")} AND expiration_date >= CURRENT_DATE;
+            """, (dialect.array(coupon_ids),))
+            coupons = {row[0]: row[1] for row in cursor.fetchall()}
+        offer_ids = [item.offer_id for item in data.items if item.offer_id is not None]
+        if offer_ids:
+            cursor.execute(f"""
+                SELECT offer_id, product_id, discount
+                FROM Offer
+                WHERE {dialect.any_of("offer_id")} AND CURRENT_DATE BETWEEN start_date AND end_date;
+            """, (dialect.array(offer_ids),))
+            offers = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        lines, total_amount = [], 0
+        for item in data.items:
+            price = products[item.product_id][2]
+            coupon_id = item.coupon_id if item.coupon_id in coupons else None
+            offer = offers.get(item.offer_id)
+            offer_id = item.offer_id if offer is not None and offer[0] in (None, item.product_id) else None
+            # The rule of line_total: discounts never take a line below zero.
+            total_amount += max(price * item.quantity - coupons.get(coupon_id, 0)
+                                - (offer[1] if offer_id is not None else 0), 0)
+            lines.append((item.product_id, item.quantity, price, coupon_id, offer_id))
+
+        orders_id = dialect.insert(cursor, """
+            INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
+            VALUES (%s, %s, %s, %s, %s);
+        """, (total_amount, data.order_status, data.customer_id, data.payment_method_id, data.shipping_id), "orders_id")
+        cursor.executemany("""
+            INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase, coupon_id, offer_id)
+            VALUES (%s, %s, %s, %s, %s, %s);
+        """, [(orders_id, *line) for line in lines])
+        category_ids = sorted({products[product_id][3] for product_id in wanted})
+        return orders_id, total_amount, [], category_ids
+
     def get_by_id(self, orders_id: int) -> Dict:
         """Gets an order by ID, including order items with product names and total price calculation.
         
@@ -115,92 +437,148 @@ class OrdersCRUD:
         Returns:
             Dict: The order data including items and calculated total.
         """
-        query = """
-            SELECT 
-                o.total_amount, 
-                o.order_status, 
-                o.customer_id, 
-                o.payment_method_id, 
-                o.shipping_id, 
-                oi.product_id, 
-                p.product_name, 
-                oi.quantity, 
-                oi.price_at_purchase, 
-                COALESCE(c.discount_value, 0) AS coupon_discount, 
-                COALESCE(ofr.discount, 0) AS offer_discount
-            FROM Orders o
-            LEFT JOIN Order_Items oi ON o.orders_id = oi.orders_id
-            LEFT JOIN Product p ON oi.product_id = p.product_id
-            LEFT JOIN Coupons c ON oi.coupon_id = c.coupons_id
-            LEFT JOIN Offer ofr ON oi.offer_id = ofr.offer_id
-            WHERE o.orders_id = %s;
-        """
+        orders = self.get_many([orders_id])
+        if orders is None:
+            return {"error": f"Internal error retrieving order {orders_id}"}
+        if not orders:
+            print(f"No data found for order {orders_id}.")
+            return {"error": f"Order {orders_id} not found"}  # Return valid response in case of error
+        return orders[0]
+
+    def get_many(self, orders_ids: List[int]) -> Optional[List[Dict]]:
+        """Gets several orders with their items in one query, ordered by ID.
         
-        try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, (orders_id,))
-            order_items = cursor.fetchall()
-            cursor.close()
-            
-            if not order_items:
-                print(f"No data found for order {orders_id}.")
-                return {"error": f"Order {orders_id} not found"}  # Return valid response in case of error
-
-            # Extract general order data
-            order_data = {
-                "total_amount": order_items[0][0],
-                "order_status": order_items[0][1],
-                "customer_id": order_items[0][2],
-                "payment_method_id": order_items[0][3],
-                "shipping_id": order_items[0][4],
-                "order_items": []  # Initialize the list before the loop
-            }
-            
-            total_real = 0  # To calculate the total with discounts
-
-            for item in order_items:
-                product_id = item[5]
-                product_name = item[6]
-                quantity = item[7]
-                price_at_purchase = item[8]
-                coupon_discount = item[9]
-                offer_discount = item[10]
-                
-                if product_id is None:  # Case where there are no Order_Items
-                    continue  # Avoid adding empty products, but continue processing other items
-
-                total_price = (price_at_purchase * quantity) - (coupon_discount + offer_discount)
-                total_real += total_price  # Add to the total of the order
-                
-                order_data["order_items"].append({  # Add the item inside the loop
-                    "product_id": product_id,
-                    "product_name": product_name,
-                    "quantity": quantity,
-                    "price_at_purchase": price_at_purchase,
-                    "coupon_discount": coupon_discount,
-                    "offer_discount": offer_discount,
-                    "total_price": total_price  # Total price per product
-                })
-            
-            order_data["calculated_total"] = total_real  # Total adjusted with discounts
-            
-            return order_data
+        Items are aggregated to JSON and totals computed by the database, so
+        each order is a single row on the wire. Unknown IDs are skipped.
+        
+        Args:
+            orders_ids (List[int]): The IDs of the orders to retrieve.
 
+        Returns:
+            Optional[List[Dict]]: The orders with items and calculated totals, or None if there was an error.
+        """
+        dialect = self.db_connection.dialect
+        query = prepared(orders_with_items_query(dialect, dialect.any_of("o.orders_id")))
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (dialect.array(orders_ids),))
+                orders = [_order_with_items_from_row(order) for order in cursor.fetchall()]
+                cursor.close()
+            return orders
         except Exception as e:
-            print(f"Error getting order by ID {orders_id}: {e}")
-            return {"error": f"Internal error retrieving order {orders_id}"}
+            print(f"Error getting orders {orders_ids}: {e}")
+            return None
 
-    def get_all(self) -> List[OrdersData]:
-        """Gets all orders.
+    def get_by_customer(self, customer_id: int, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None,
+                        order_status: Optional[str] = None, since: Optional[date] = None,
+                        until: Optional[date] = None) -> Dict:
+        """Gets one page of a customer's orders with their items, newest first.
+        
+        The page of order IDs is selected through the (customer_id, orders_id)
+        index and the items of all of them are aggregated in the same query,
+        so a page costs one query however many orders and items it holds.
         
+        Args:
+            customer_id (int): The ID of the customer.
+            limit (int): The maximum number of orders to return.
+            after (int, optional): Only return orders with an ID lower than this cursor.
+            order_status (str, optional): Only return orders with this status.
+            since (date, optional): Only return orders created on or after this day.
+            until (date, optional): Only return orders created on or before this day.
+
+        Returns:
+            Dict: The orders in the page and the cursor for the next page.
+        """
+        dialect = self.db_connection.dialect
+        conditions, values = ["customer_id = %s"], [customer_id]
+        for condition, value in (("orders_id < %s", after), ("order_status = %s", order_status),
+                                 ("created_at >= %s", since), (f"created_at < {dialect.day_after()}", until)):
+            if value is not None:
+                conditions.append(condition)
+                values.append(value)
+        page_ids = f"""
+            SELECT orders_id
+            FROM Orders
+            WHERE {" AND ".join(conditions)}
+            ORDER BY orders_id DESC
+            LIMIT %s
+        """
+        if since is None:
+            filters, values = {"orders_filter": "", "items_filter": ""}, values + [limit]
+        else:
+            filters = {"orders_filter": " AND o.created_at >= %s", "items_filter": " AND oi.created_at >= %s"}
+            values = [since] + values + [limit, since]
+        query = prepared(orders_with_items_query(dialect, dialect.in_subquery("o.orders_id", page_ids), "DESC", **filters))
+        return fetch_page(self.db_connection, query, tuple(values), limit, _order_with_items_from_row)
+
+    def get_by_date_range(self, since: date, until: date, limit: int = DEFAULT_PAGE_SIZE,
+                          after: Optional[int] = None) -> Dict:
+        """Gets one page of the orders created between two days, with their items, ordered by ID.
+        
+        Orders and Order_Items are partitioned by month of creation, so only
+        the partitions of the months in the range are read.
+        
+        Args:
+            since (date): First day of the range.
+            until (date): Last day of the range, included.
+            limit (int): The maximum number of orders to return.
+            after (int, optional): Only return orders with an ID greater than this cursor.
+
         Returns:
-            List[OrdersData]: A list of all orders.
+            Dict: The orders in the page and the cursor for the next page.
+        """
+        dialect = self.db_connection.dialect
+        page_ids = f"""
+            SELECT orders_id
+            FROM Orders
+            WHERE created_at >= %s AND created_at < {dialect.day_after()} AND orders_id > %s
+            ORDER BY orders_id
+            LIMIT %s
+        """
+        query = prepared(orders_with_items_query(
+            dialect, dialect.in_subquery("o.orders_id", page_ids), "ASC",
+            orders_filter=f" AND o.created_at >= %s AND o.created_at < {dialect.day_after()}",
+            items_filter=" AND oi.created_at >= %s",
+        ))
+        values = (since, since, until, after or 0, limit, since, until)
+        return fetch_page(self.db_connection, query, values, limit, _order_with_items_from_row)
+
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of orders, ordered by ID.
+        
+        Args:
+            limit (int): The maximum number of orders to return.
+            after (int, optional): Only return orders with an ID greater than this cursor.
+
+        Returns:
+            Dict: The orders in the page and the cursor for the next page.
         """
         query = """
-            SELECT total_amount, order_status, customer_id, payment_method_id, shipping_id
-            FROM Orders;
+            SELECT o.total_amount, o.order_status, o.customer_id, o.payment_method_id, o.shipping_id,
+                   COALESCE(t.calculated_total, 0), o.orders_id
+            FROM Orders o
+            LEFT JOIN order_totals t ON t.orders_id = o.orders_id
+            WHERE o.orders_id > %s
+            ORDER BY o.orders_id
+            LIMIT %s;
         """
-        return self._get_orders(query) or []
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _order_from_row)
+
+    def stream_all(self) -> Iterator[Dict]:
+        """Streams all orders through a server-side cursor.
+        
+        Returns:
+            Iterator[Dict]: The orders, fetched in batches.
+        """
+        query = """
+            SELECT o.total_amount, o.order_status, o.customer_id, o.payment_method_id, o.shipping_id,
+                   COALESCE(t.calculated_total, 0)
+            FROM Orders o
+            LEFT JOIN order_totals t ON t.orders_id = o.orders_id
+            ORDER BY o.orders_id;
+        """
+        return stream_rows(self.db_connection, query, (), _order_from_row)
 
     def update(self, orders_id: int, data: OrdersData) -> bool:
         """Updates an order.
@@ -233,4 +611,55 @@ class OrdersCRUD:
             DELETE FROM Orders
             WHERE orders_id = %s;
         """
-        return self._execute_query(query, (orders_id,))
\ No newline at end of file
+        return self._execute_query(query, (orders_id,))
+
+class AsyncOrdersCRUD:
+    """Read-only order queries on the asyncpg pool, for the async routes."""
+
+    def __init__(self):
+        """Initialize the database connection."""
+        self.db_connection = AsyncPostgresDatabaseConnection()
+
+    async def get_by_id(self, orders_id: int) -> Dict:
+        """Gets an order by ID, including order items with product names and total price calculation.
+        
+        Args:
+            orders_id (int): The ID of the order to retrieve.
+
+        Returns:
+            Dict: The order data including items and calculated total.
+        """
+        query = orders_with_items_query(POSTGRESQL, "o.orders_id = $1")
+        try:
+            async with self.db_connection.acquire() as connection:
+                order = await connection.fetchrow(query, orders_id)
+
+            if order is None:
+                print(f"No data found for order {orders_id}.")
+                return {"error": f"Order {orders_id} not found"}
+
+            return _order_with_items_from_row(order)
+
+        except Exception as e:
+            print(f"Error getting order by ID {orders_id}: {e}")
+            return {"error": f"Internal error retrieving order {orders_id}"}
+
+    async def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of orders, ordered by ID."""
+        query = """
+            SELECT o.total_amount, o.order_status, o.customer_id, o.payment_method_id, o.shipping_id,
+                   COALESCE(t.calculated_total, 0), o.orders_id
+            FROM Orders o
+            LEFT JOIN order_totals t ON t.orders_id = o.orders_id
+            WHERE o.orders_id > $1
+            ORDER BY o.orders_id
+            LIMIT $2;
+        """
+        try:
+            async with self.db_connection.acquire() as connection:
+                rows = await connection.fetch(query, after or 0, limit)
+            next_cursor = rows[-1][-1] if len(rows) == limit else None
+            return {"items": [_order_from_row(order) for order in rows], "next_cursor": next_cursor}
+        except Exception as e:
+            print(f"Error fetching orders: {e}")
+            return {"items": [], "next_cursor": None}
\ No newline at end of file
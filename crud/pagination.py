@@ -0,0 +1,78 @@
+from itertools import chain
+from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+class Page(BaseModel, Generic[T]):
+    """One page of a keyset-paginated list."""
+    items: List[T]
+    next_cursor: Optional[int] = None  # Pass as `after` to get the next page; None on the last page
+
+def fetch_page(db_connection, query: str, values: tuple, limit: int, build: Callable) -> dict:
+    """Executes a keyset page query and builds a page dictionary.
+
+    The query must select the primary key as its last column, filter on
+    `primary_key > after`, order by the primary key and apply `LIMIT limit`.
+
+    Args:
+        db_connection (PostgresDatabaseConnection): The connection to borrow from.
+        query (str): The SQL query to execute.
+        values (tuple): The values to use in the query.
+        limit (int): The page size used in the query.
+        build (Callable): Maps a row to an item.
+
+    Returns:
+        dict: The page items and the cursor for the next page.
+    """
+    try:
+        with db_connection.acquire(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, values)
+            rows = cursor.fetchall()
+            cursor.close()
+        next_cursor = rows[-1][-1] if len(rows) == limit else None
+        return {"items": [build(row) for row in rows], "next_cursor": next_cursor}
+    except Exception as e:
+        print(f"Error fetching page: {e}")
+        return {"items": [], "next_cursor": None}
+
+def stream_rows(db_connection, query: str, values: tuple, build: Callable,
+                batch_size: int = STREAM_BATCH_SIZE) -> Iterator:
+    """Yields items from a server-side (named) cursor, fetching `batch_size` rows at a time.
+
+    On MySQL an unbuffered cursor plays the same role.
+
+    The query runs before this function returns, so connection and SQL errors
+    reach the caller instead of breaking a response that has already started.
+    The pooled connection is held until the iterator is exhausted or closed,
+    and only one batch of rows is held in memory at a time.
+
+    Args:
+        db_connection (PostgresDatabaseConnection): The connection to borrow from.
+        query (str): The SQL query to execute.
+        values (tuple): The values to use in the query.
+        build (Callable): Maps a row to an item.
+        batch_size (int): Rows fetched per round trip.
+    """
+    batches = _fetch_batches(db_connection, query, values, batch_size)
+    first_batch = next(batches, [])
+    return (build(row) for batch in chain([first_batch], batches) for row in batch)
+
+def _fetch_batches(db_connection, query: str, values: tuple, batch_size: int) -> Iterator[list]:
+    """Yields batches of rows from a streaming cursor on a borrowed connection."""
+    with db_connection.acquire(read_only=True) as connection:
+        cursor = db_connection.dialect.streaming_cursor(connection)
+        try:
+            cursor.execute(query, values)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
\ No newline at end of file
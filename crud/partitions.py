@@ -0,0 +1,139 @@
+"""Creates and drops the monthly partitions of Orders, Order_Items and Search_History.
+
+Migration 008 partitions the three tables by month of created_at. Rows of a
+month without a partition land in each table's default partition, so inserts
+never fail; `ensure` creates the partitions of the coming months and of any
+month found in a default partition, moving those rows into place. Every API
+worker tries it on startup and then every PARTITION_CHECK_HOURS hours, but
+only the one that gets the advisory lock runs the pass; the others skip it.
+Deployments with many workers can set PARTITION_CHECK_HOURS=0 and run this
+module from cron instead. Retention is explicit:
+
+    python -m crud.partitions --months-ahead 3
+    python -m crud.partitions --retain-months 24   # drop the months older than two years
+"""
+import argparse
+import os
+import threading
+from datetime import date
+from typing import Optional
+
+from connections import PostgresDatabaseConnection, database_backend
+
+DEFAULT_MONTHS_AHEAD = 3
+
+# Only one maintenance pass at a time; ensure_monthly_partitions takes the same lock.
+TRY_ENSURE_QUERY = """
+    SELECT CASE WHEN pg_try_advisory_xact_lock(hashtext('monthly_partitions'))
+                THEN ensure_monthly_partitions(NULL, %s)
+                ELSE 0 END;
+"""
+
+class PartitionMaintenance:
+    """Runs the partition functions of migration 008."""
+
+    def __init__(self, db_connection: PostgresDatabaseConnection = None):
+        """Initialize the database connection."""
+        self.db_connection = db_connection or PostgresDatabaseConnection()
+        self.db_connection.connect()
+
+    def _call(self, query: str, values: tuple) -> Optional[int]:
+        try:
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values)
+                result = cursor.fetchone()[0]
+                connection.commit()
+                cursor.close()
+            return result
+        except Exception as e:
+            print(f"Error maintaining partitions: {e}")
+            return None
+
+    def ensure(self, months_ahead: int = DEFAULT_MONTHS_AHEAD, wait: bool = True) -> Optional[int]:
+        """Creates the partitions up to `months_ahead` months from now.
+
+        Args:
+            months_ahead (int): Months after the current one that must have a partition.
+            wait (bool): Wait for a pass running in another session to finish;
+                if False, skip this pass instead.
+
+        Returns:
+            Optional[int]: The number of partitions created (0 if the pass was
+            skipped), or None if there was an error.
+        """
+        if wait:
+            return self._call("SELECT ensure_monthly_partitions(NULL, %s);", (months_ahead,))
+        return self._call(TRY_ENSURE_QUERY, (months_ahead,))
+
+    def drop_before(self, cutoff: date) -> Optional[int]:
+        """Drops the partitions of the months that end before `cutoff`.
+
+        Returns of those order items, totals of those orders and items added
+        later to those orders are deleted first, so nothing is left dangling.
+
+        Returns:
+            Optional[int]: The number of partitions dropped, or None if there was an error.
+        """
+        return self._call("SELECT drop_partitions_before(%s);", (cutoff,))
+
+class PartitionMaintainer:
+    """Background thread that keeps the partitions of the coming months created.
+
+    Each API worker runs one; a pass that finds another worker's pass running
+    is skipped rather than queued behind it.
+    """
+
+    def __init__(self, interval_hours: float, months_ahead: int = DEFAULT_MONTHS_AHEAD):
+        self.interval = interval_hours * 3600
+        self.months_ahead = months_ahead
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="partition-maintainer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        maintenance = PartitionMaintenance()
+        while True:
+            maintenance.ensure(self.months_ahead, wait=False)
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stopped.set()
+
+def create_maintainer() -> PartitionMaintainer:
+    """Creates a maintainer configured by PARTITION_CHECK_HOURS (0 disables it) and PARTITION_MONTHS_AHEAD.
+
+    The MySQL schema is not partitioned, so the maintainer is disabled on that backend.
+    """
+    enabled = database_backend() == "postgresql"
+    return PartitionMaintainer(
+        interval_hours=float(os.getenv("PARTITION_CHECK_HOURS", "24")) if enabled else 0,
+        months_ahead=int(os.getenv("PARTITION_MONTHS_AHEAD", str(DEFAULT_MONTHS_AHEAD))),
+    )
+
+def months_before(day: date, months: int) -> date:
+    """Returns the first day of the month `months` months before `day`'s month."""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+    parser.add_argument("--retain-months", type=int, help="Drop the months before the last N (the current month included)")
+    args = parser.parse_args()
+
+    maintenance = PartitionMaintenance()
+    print(f"Created {maintenance.ensure(args.months_ahead)} partitions.")
+    if args.retain_months is not None:
+        cutoff = months_before(date.today(), args.retain_months - 1)
+        print(f"Dropped {maintenance.drop_before(cutoff)} partitions before {cutoff}.")
+    maintenance.db_connection.close()
+
+if __name__ == "__main__":
+    main()
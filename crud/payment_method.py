@@ -1,19 +1,27 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class PaymentMethodData(BaseModel):
     """Data structure for PaymentMethod."""
     payment_type: str
     customer_id: Optional[int] = None  # Foreign key (can be null)
 
+def _payment_method_from_row(payment_method_data) -> PaymentMethodData:
+    """Maps a payment method row to a PaymentMethodData object."""
+    payment_method_dict = {
+        "payment_type": payment_method_data[0],
+        "customer_id": payment_method_data[1]
+    }
+    return PaymentMethodData.model_construct(**payment_method_dict)
+
 class PaymentMethodCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -26,17 +34,17 @@ class PaymentMethodCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_payment_methods(self, query: str, values: tuple = None) -> List[PaymentMethodData]:
@@ -51,19 +59,16 @@ class PaymentMethodCRUD:
         """
         payment_methods = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            payment_method_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                payment_method_list = cursor.fetchall()
+                cursor.close()
             for payment_method_data in payment_method_list:
-                payment_method_dict = {
-                    "payment_type": payment_method_data[0],
-                    "customer_id": payment_method_data[1]
-                }
-                payment_methods.append(PaymentMethodData(**payment_method_dict))
+                payment_methods.append(_payment_method_from_row(payment_method_data))
             return payment_methods
         except Exception as e:
             print(f"Error in query: {e}")
@@ -80,19 +85,17 @@ class PaymentMethodCRUD:
         """
         query = """
             INSERT INTO Payment_Method (payment_type, customer_id)
-            VALUES (%s, %s)
-            RETURNING payment_method_id;
+            VALUES (%s, %s);
         """
         values = (data.payment_type, data.customer_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            payment_method_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                payment_method_id = self.db_connection.dialect.insert(cursor, query, values, "payment_method_id")
+                connection.commit()
+                cursor.close()
             return payment_method_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating payment method: {e}")
             return None
 
@@ -113,17 +116,37 @@ class PaymentMethodCRUD:
         payment_methods = self._get_payment_methods(query, (payment_method_id,))
         return payment_methods[0] if payment_methods else None
 
-    def get_all(self) -> List[PaymentMethodData]:
-        """Gets all payment methods.
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of payment methods, ordered by ID.
         
+        Args:
+            limit (int): The maximum number of payment methods to return.
+            after (int, optional): Only return payment methods with an ID greater than this cursor.
+
         Returns:
-            List[PaymentMethodData]: A list of all payment methods.
+            Dict: The payment methods in the page and the cursor for the next page.
+        """
+        query = """
+            SELECT payment_type, customer_id, payment_method_id
+            FROM Payment_Method
+            WHERE payment_method_id > %s
+            ORDER BY payment_method_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _payment_method_from_row)
+
+    def stream_all(self) -> Iterator[PaymentMethodData]:
+        """Streams all payment methods through a server-side cursor.
+        
+        Returns:
+            Iterator[PaymentMethodData]: The payment methods, fetched in batches.
         """
         query = """
             SELECT payment_type, customer_id
-            FROM Payment_Method;
+            FROM Payment_Method
+            ORDER BY payment_method_id;
         """
-        return self._get_payment_methods(query)
+        return stream_rows(self.db_connection, query, (), _payment_method_from_row)
 
     def get_by_customer(self, customer_id: int) -> List[PaymentMethodData]:
         """Gets payment methods for a specific customer.
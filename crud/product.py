@@ -1,7 +1,13 @@
-from typing import List, Optional, Dict
+import re
+from typing import Callable, List, Optional, Dict, Iterator, Tuple
+from decimal import Decimal
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, AsyncPostgresDatabaseConnection, prepared
+from crud.bulk import bulk_insert
+from crud.cache import cached, get_cache
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
+from crud.table_versions import table_version
 
 class ProductData(BaseModel):
     """Data structure for Product."""
@@ -12,12 +18,92 @@ class ProductData(BaseModel):
     category_id: int
     seller_id: int
 
+def _product_from_row(product) -> Dict:
+    """Maps a (product_name, description, price, quantity_available, category_id, seller_id) row to a dictionary."""
+    return {
+        "product_name": product[0],
+        "description": product[1],
+        "price": product[2],
+        "quantity_available": product[3],
+        "category_id": product[4],
+        "seller_id": product[5],
+    }
+
+class ProductWithRating(ProductData):
+    """A product with its review aggregates; average_rating is None until it is reviewed."""
+    average_rating: Optional[float] = None
+    review_count: Optional[int] = None
+
+def _product_with_rating_from_row(product) -> Dict:
+    """Maps a product row followed by (average_rating, review_count) to a dictionary."""
+    return {**_product_from_row(product), "average_rating": product[6], "review_count": product[7]}
+
+# Reads the aggregates kept by the product_rating_stats triggers instead of scanning Review.
+RATING_COLUMNS = """
+    ROUND(CAST(s.rating_sum AS DECIMAL) / NULLIF(s.review_count, 0), 2) AS average_rating,
+    COALESCE(s.review_count, 0) AS review_count
+"""
+
+# Upper bounds of the price facet buckets; the last bucket is open-ended.
+PRICE_FACET_BOUNDS = [25, 50, 100, 250, 500, 1000]
+MAX_SEARCH_TERMS = 10
+
+class ProductSearchHit(ProductData):
+    """A product matched by a full-text search."""
+    product_id: int
+    rank: float
+    category_id: Optional[int] = None  # Both are nullable in Product, so search can match rows without them
+    seller_id: Optional[int] = None
+
+class CategoryFacet(BaseModel):
+    """Number of matching products in one category."""
+    category_id: Optional[int] = None  # None counts the products without a category
+    count: int
+
+class PriceFacet(BaseModel):
+    """Number of matching products in one price range; max_price is exclusive."""
+    min_price: float
+    max_price: Optional[float] = None
+    count: int
+
+class ProductSearchResult(BaseModel):
+    """One page of search hits plus the facet counts for the whole result set."""
+    items: List[ProductSearchHit]
+    total: int
+    categories: List[CategoryFacet]
+    price_ranges: List[PriceFacet]
+
+def _search_terms(text: str) -> List[str]:
+    """Splits free text into the words to search for.
+
+    Only word characters are kept, so user input can never produce full-text
+    query syntax errors: "Wireless, head!" becomes ["wireless", "head"].
+    """
+    return re.findall(r"\w+", text.lower())[:MAX_SEARCH_TERMS]
+
+def _price_facet(bucket: int, count: int) -> Dict:
+    """Maps a bucket index over PRICE_FACET_BOUNDS to a price range."""
+    bounds = [0] + PRICE_FACET_BOUNDS
+    return {
+        "min_price": bounds[bucket],
+        "max_price": bounds[bucket + 1] if bucket + 1 < len(bounds) else None,
+        "count": count,
+    }
+
 class ProductCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
+        self.cache = get_cache()
+
+    def _invalidate(self, product_id: int, *category_ids: int):
+        """Drops the cached product and the cached product lists of its categories."""
+        self.cache.delete(f"product:{product_id}", *(f"product:category:{category_id}" for category_id in category_ids))
+
+    def version(self) -> Optional[int]:
+        """Returns the version of the Product table, which every product write changes, or None if it could not be read."""
+        return table_version(self.db_connection, "product")
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Executes an SQL query that modifies the database.
@@ -30,40 +116,35 @@ class ProductCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Database error: {e}")
-            self.db_connection.connection.rollback()
             return False
 
-    def _get_products(self, query: str, values: tuple = None) -> List[Dict]:
+    def _get_products(self, query: str, values: tuple = None, build: Callable = _product_from_row) -> List[Dict]:
         """Executes a SELECT query and returns products as a list of dictionaries.
         
         Args:
             query (str): The SQL query to execute.
             values (tuple, optional): The values to use in the query.
+            build (Callable, optional): Maps a row to a product dictionary.
 
         Returns:
             List[Dict]: A list of products as dictionaries.
         """
         products = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            for product in cursor.fetchall():
-                products.append({
-                    "product_name": product[0],
-                    "description": product[1],
-                    "price": product[2],
-                    "quantity_available": product[3],
-                    "category_id": product[4],
-                    "seller_id": product[5],
-                })
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                for product in cursor.fetchall():
+                    products.append(build(product))
+                cursor.close()
             return products
         except Exception as e:
             print(f"Error fetching products: {e}")
@@ -80,22 +161,36 @@ class ProductCRUD:
         """
         query = """
             INSERT INTO Product (product_name, description, price, quantity_available, category_id, seller_id)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING product_id;
+            VALUES (%s, %s, %s, %s, %s, %s);
         """
         values = (data.product_name, data.description, data.price, data.quantity_available, data.category_id, data.seller_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            product_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                product_id = self.db_connection.dialect.insert(cursor, query, values, "product_id")
+                connection.commit()
+                cursor.close()
+            self._invalidate(product_id, data.category_id)
             return product_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating product: {e}")
             return None
 
+    def bulk_create(self, rows: List[ProductData]) -> Dict:
+        """Creates many products in one transaction.
+        
+        Args:
+            rows (List[ProductData]): The data for the new products.
+
+        Returns:
+            Dict: The generated IDs in input order and the errors of the rejected rows.
+        """
+        columns = ("product_name", "description", "price", "quantity_available", "category_id", "seller_id")
+        values = [(data.product_name, data.description, data.price, data.quantity_available, data.category_id, data.seller_id) for data in rows]
+        result = bulk_insert(self.db_connection, "Product", columns, "product_id", values)
+        self.cache.delete(*{f"product:category:{data.category_id}" for data in rows})
+        return result
+
     def update(self, product_id: int, data: ProductData) -> bool:
         """Updates a product.
         
@@ -112,7 +207,10 @@ class ProductCRUD:
             WHERE product_id = %s;
         """
         values = (data.product_name, data.description, data.price, data.quantity_available, data.category_id, data.seller_id, product_id)
-        return self._execute_query(query, values)
+        previous = self.get_by_id(product_id)
+        updated = self._execute_query(query, values)
+        self._invalidate(product_id, data.category_id, *([previous["category_id"]] if previous else []))
+        return updated
 
     def delete(self, product_id: int) -> bool:
         """Deletes a product.
@@ -124,33 +222,118 @@ class ProductCRUD:
             bool: True if the deletion was successful, False otherwise.
         """
         query = "DELETE FROM Product WHERE product_id = %s;"
-        return self._execute_query(query, (product_id,))
+        previous = self.get_by_id(product_id)
+        deleted = self._execute_query(query, (product_id,))
+        self._invalidate(product_id, *([previous["category_id"]] if previous else []))
+        return deleted
 
-    def get_by_id(self, product_id: int) -> Optional[Dict]:
-        """Gets a product by ID.
+    def get_by_id(self, product_id: int, include_rating: bool = False) -> Optional[Dict]:
+        """Gets a product by ID, through the catalog cache.
         
         Args:
             product_id (int): The ID of the product to retrieve.
+            include_rating (bool): Also return its average rating and review count.
+                They change with every review, so they are read fresh, not cached.
 
         Returns:
             Optional[Dict]: The retrieved product as a dictionary, or None if not found.
         """
-        query = """
-            SELECT product_name, description, price, quantity_available, category_id, seller_id
+        return self.get_by_id_with_version(product_id, include_rating)[0]
+
+    def get_by_id_with_version(self, product_id: int, include_rating: bool = False) -> Tuple[Optional[Dict], Optional[str]]:
+        """Gets a product by ID and the version of its row, through the catalog cache.
+        
+        The version is the row's `xmin` on Postgres (`updated_at` on MySQL),
+        read with the row, so it always describes the product returned.
+
+        Args:
+            product_id (int): The ID of the product to retrieve.
+            include_rating (bool): Also return its average rating and review count,
+                which are then part of the version too.
+
+        Returns:
+            Tuple[Optional[Dict], Optional[str]]: The product, or None if not found, and its version.
+        """
+        query = prepared(f"""
+            SELECT product_name, description, price, quantity_available, category_id, seller_id,
+                   {self.db_connection.dialect.row_version}
             FROM Product
             WHERE product_id = %s;
+        """)
+        def load():
+            products = self._get_products(query, (product_id,), lambda row: (_product_from_row(row), str(row[6])))
+            return products[0] if products else None
+        entry = cached(self.cache, f"product:{product_id}", load)
+        if entry is None:
+            return None, None
+        product, version = entry
+        if not include_rating:
+            return product, version
+        rating = self._get_rating(product_id)
+        return {**product, **rating}, f"{version}:{rating['review_count']}:{rating['average_rating']}"
+
+    def _get_rating(self, product_id: int) -> Dict:
+        """Reads the average rating and review count of one product from product_rating_stats."""
+        query = prepared(f"""
+            SELECT {RATING_COLUMNS}
+            FROM product_rating_stats s
+            WHERE s.product_id = %s;
+        """)
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (product_id,))
+                rating = cursor.fetchone()
+                cursor.close()
+            average_rating, review_count = rating or (None, 0)  # No row until the first review
+            return {"average_rating": average_rating, "review_count": review_count}
+        except Exception as e:
+            print(f"Error reading product rating: {e}")
+            return {"average_rating": None, "review_count": None}
+
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, include_rating: bool = False) -> Dict:
+        """Gets one page of products, ordered by ID.
+        
+        Args:
+            limit (int): The maximum number of products to return.
+            after (int, optional): Only return products with an ID greater than this cursor.
+            include_rating (bool): Also return each product's average rating and review count.
+
+        Returns:
+            Dict: The products in the page and the cursor for the next page.
         """
-        products = self._get_products(query, (product_id,))
-        return products[0] if products else None
+        if include_rating:
+            query = prepared(f"""
+                SELECT p.product_name, p.description, p.price, p.quantity_available, p.category_id, p.seller_id,
+                       {RATING_COLUMNS}, p.product_id
+                FROM Product p
+                LEFT JOIN product_rating_stats s ON s.product_id = p.product_id
+                WHERE p.product_id > %s
+                ORDER BY p.product_id
+                LIMIT %s;
+            """)
+            return fetch_page(self.db_connection, query, (after or 0, limit), limit, _product_with_rating_from_row)
+        query = prepared("""
+            SELECT product_name, description, price, quantity_available, category_id, seller_id, product_id
+            FROM Product
+            WHERE product_id > %s
+            ORDER BY product_id
+            LIMIT %s;
+        """)
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _product_from_row)
 
-    def get_all(self) -> List[Dict]:
-        """Gets all products.
+    def stream_all(self) -> Iterator[Dict]:
+        """Streams all products through a server-side cursor.
         
         Returns:
-            List[Dict]: A list of all products.
+            Iterator[Dict]: The products, fetched in batches.
         """
-        query = "SELECT product_name, description, price, quantity_available, category_id, seller_id FROM Product;"
-        return self._get_products(query)
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            ORDER BY product_id;
+        """
+        return stream_rows(self.db_connection, query, (), _product_from_row)
 
     def get_by_name(self, product_name: str) -> List[Dict]:
         """Gets products by name (case-insensitive search).
@@ -161,28 +344,58 @@ class ProductCRUD:
         Returns:
             List[Dict]: A list of products that match the search criteria.
         """
-        query = """
+        query = prepared("""
             SELECT product_name, description, price, quantity_available, category_id, seller_id
             FROM Product
             WHERE LOWER(product_name) LIKE LOWER(%s);
-        """
+        """)
         return self._get_products(query, ("%" + product_name + "%",))
 
-    def get_by_category(self, category_id: int) -> List[Dict]:
-        """Gets products by category.
+    def get_by_category(self, category_id: int, include_rating: bool = False) -> List[Dict]:
+        """Gets products by category, through the catalog cache.
         
         Args:
             category_id (int): The ID of the category to retrieve products for.
+            include_rating (bool): Also return each product's average rating and review
+                count, read fresh instead of from the cache.
 
         Returns:
             List[Dict]: A list of products in the specified category.
         """
-        query = """
-            SELECT product_name, description, price, quantity_available, category_id, seller_id
+        if include_rating:
+            query = prepared(f"""
+                SELECT p.product_name, p.description, p.price, p.quantity_available, p.category_id, p.seller_id,
+                       {RATING_COLUMNS}
+                FROM Product p
+                LEFT JOIN product_rating_stats s ON s.product_id = p.product_id
+                WHERE p.category_id = %s;
+            """)
+            return self._get_products(query, (category_id,), _product_with_rating_from_row)
+        return self.get_by_category_with_version(category_id)[0]
+
+    def get_by_category_with_version(self, category_id: int) -> Tuple[List[Dict], Optional[int]]:
+        """Gets the products of a category and the Product table version they were read at, through the catalog cache.
+
+        Both come from one statement, so they describe the same snapshot even
+        when the cached list is served after a write that has not dropped it
+        yet: its ETag then still names the old version.
+
+        Args:
+            category_id (int): The ID of the category to retrieve products for.
+
+        Returns:
+            Tuple[List[Dict], Optional[int]]: The products, and their version (None if there are none).
+        """
+        query = prepared("""
+            SELECT product_name, description, price, quantity_available, category_id, seller_id,
+                   (SELECT COALESCE(SUM(version), 0) FROM table_versions WHERE table_name = 'product')
             FROM Product
             WHERE category_id = %s;
-        """
-        return self._get_products(query, (category_id,))
+        """)
+        def load():
+            rows = self._get_products(query, (category_id,), lambda row: (_product_from_row(row), int(row[6])))
+            return ([product for product, _ in rows], rows[0][1]) if rows else None
+        return cached(self.cache, f"product:category:{category_id}", load) or ([], None)
 
     def get_by_price_ascendent(self) -> List[Dict]:
         """Gets products ordered by price in ascending order.
@@ -240,4 +453,201 @@ class ProductCRUD:
             FROM Product
             WHERE price >= %s;
         """
-        return self._get_products(query, (min_price,))
\ No newline at end of file
+        return self._get_products(query, (min_price,))
+
+    def search(self, text: str, category_id: Optional[int] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Dict:
+        """Full-text search over product name and description, best matches first.
+
+        Every word is matched as a prefix against the indexed search_vector
+        column (see migration 002_product_search) and hits are ordered by
+        ts_rank, name matches weighing more than description matches. On
+        MySQL the FULLTEXT index on name and description is used instead. Each
+        facet is counted with every filter except its own, so the client can
+        show how many products switching that filter would return.
+
+        Args:
+            text (str): The words to search for.
+            category_id (int, optional): Only return products in this category.
+            min_price (float, optional): Only return products priced at or above this value.
+            max_price (float, optional): Only return products priced at or below this value.
+            limit (int): Maximum number of hits in the page.
+            offset (int): Number of hits to skip.
+
+        Returns:
+            Dict: The page of hits, the total number of hits and the category and price facets.
+        """
+        result = {"items": [], "total": 0, "categories": [], "price_ranges": []}
+        terms = _search_terms(text)
+        if not terms:
+            return result
+        dialect = self.db_connection.dialect
+        match, rank, search_query = dialect.text_search(terms)
+        bucket, bucket_values = dialect.width_bucket("price", PRICE_FACET_BOUNDS)
+        filters = {
+            "category": ("category_id = %s", category_id),
+            "min_price": ("price >= %s", min_price),
+            "max_price": ("price <= %s", max_price),
+        }
+
+        def where(*excluded: str) -> tuple:
+            conditions, values = [match], [search_query]
+            for name, (condition, value) in filters.items():
+                if value is not None and name not in excluded:
+                    conditions.append(condition)
+                    values.append(value)
+            return " AND ".join(conditions), values
+
+        hits_where, hits_values = where()
+        # Not aliased as rank, a reserved word in MySQL 8.
+        hits_query = f"""
+            SELECT product_name, description, price, quantity_available, category_id, seller_id,
+                   product_id, {rank} AS relevance
+            FROM Product
+            WHERE {hits_where}
+            ORDER BY relevance DESC, product_id
+            LIMIT %s OFFSET %s;
+        """
+        categories_where, categories_values = where("category")
+        categories_query = f"""
+            SELECT category_id, COUNT(*)
+            FROM Product
+            WHERE {categories_where}
+            GROUP BY category_id
+            ORDER BY COUNT(*) DESC, category_id;
+        """
+        prices_where, prices_values = where("min_price", "max_price")
+        prices_query = f"""
+            SELECT {bucket} AS bucket, COUNT(*)
+            FROM Product
+            WHERE {prices_where}
+            GROUP BY bucket
+            ORDER BY bucket;
+        """
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(hits_query, [search_query] + hits_values + [limit, offset])
+                for row in cursor.fetchall():
+                    hit = _product_from_row(row)
+                    hit.update(product_id=row[6], rank=row[7])
+                    result["items"].append(hit)
+                cursor.execute(categories_query, categories_values)
+                result["categories"] = [{"category_id": row[0], "count": row[1]} for row in cursor.fetchall()]
+                # The category facet applies every other filter, so it also gives the total.
+                result["total"] = sum(facet["count"] for facet in result["categories"]
+                                      if category_id is None or facet["category_id"] == category_id)
+                cursor.execute(prices_query, bucket_values + prices_values)
+                result["price_ranges"] = [_price_facet(row[0], row[1]) for row in cursor.fetchall()]
+                cursor.close()
+            return result
+        except Exception as e:
+            print(f"Error searching products: {e}")
+            return {"items": [], "total": 0, "categories": [], "price_ranges": []}
+
+class AsyncProductCRUD:
+    """Read-only product queries on the asyncpg pool, for the async routes."""
+
+    def __init__(self):
+        """Initialize the database connection."""
+        self.db_connection = AsyncPostgresDatabaseConnection()
+
+    async def _get_products(self, query: str, *values) -> List[Dict]:
+        """Executes a SELECT query and returns products as a list of dictionaries.
+        
+        Args:
+            query (str): The SQL query to execute, using $1-style placeholders.
+            *values: The values to use in the query.
+
+        Returns:
+            List[Dict]: A list of products as dictionaries.
+        """
+        try:
+            async with self.db_connection.acquire() as connection:
+                rows = await connection.fetch(query, *values)
+            return [_product_from_row(product) for product in rows]
+        except Exception as e:
+            print(f"Error fetching products: {e}")
+            return []
+
+    async def get_by_id(self, product_id: int) -> Optional[Dict]:
+        """Gets a product by ID."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            WHERE product_id = $1;
+        """
+        products = await self._get_products(query, product_id)
+        return products[0] if products else None
+
+    async def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of products, ordered by ID."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id, product_id
+            FROM Product
+            WHERE product_id > $1
+            ORDER BY product_id
+            LIMIT $2;
+        """
+        try:
+            async with self.db_connection.acquire() as connection:
+                rows = await connection.fetch(query, after or 0, limit)
+            next_cursor = rows[-1][-1] if len(rows) == limit else None
+            return {"items": [_product_from_row(product) for product in rows], "next_cursor": next_cursor}
+        except Exception as e:
+            print(f"Error fetching products: {e}")
+            return {"items": [], "next_cursor": None}
+
+    async def get_by_price_ascendent(self) -> List[Dict]:
+        """Gets products ordered by price in ascending order."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            ORDER BY price ASC;
+        """
+        return await self._get_products(query)
+
+    async def get_by_price_descendent(self) -> List[Dict]:
+        """Gets products ordered by price in descending order."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            ORDER BY price DESC;
+        """
+        return await self._get_products(query)
+
+    async def get_by_name(self, product_name: str) -> List[Dict]:
+        """Gets products by name (case-insensitive search)."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            WHERE LOWER(product_name) LIKE LOWER($1);
+        """
+        return await self._get_products(query, "%" + product_name + "%")
+
+    async def get_by_category(self, category_id: int) -> List[Dict]:
+        """Gets products by category."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            WHERE category_id = $1;
+        """
+        return await self._get_products(query, category_id)
+
+    async def get_cheaper(self, max_price: float) -> List[Dict]:
+        """Gets products with a price lower than or equal to the given value."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            WHERE price <= $1;
+        """
+        return await self._get_products(query, Decimal(str(max_price)))
+
+    async def get_expensive(self, min_price: float) -> List[Dict]:
+        """Gets products with a price higher than or equal to the given value."""
+        query = """
+            SELECT product_name, description, price, quantity_available, category_id, seller_id
+            FROM Product
+            WHERE price >= $1;
+        """
+        return await self._get_products(query, Decimal(str(min_price)))
\ No newline at end of file
@@ -1,19 +1,23 @@
 from typing import List, Optional
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
 
 class ProductRecommendationsData(BaseModel):
     """Data structure for ProductRecommendations."""
     customer_id: int             # Foreign key
     recommended_product_id: int  # Foreign key
 
+class SimilarProduct(BaseModel):
+    """A product often bought together with another one; score is their cosine similarity."""
+    similar_product_id: int
+    score: float
+
 class ProductRecommendationsCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -26,17 +30,17 @@ class ProductRecommendationsCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
         
     def _get_product_recommendations(self, query: str, values: tuple = None) -> List[ProductRecommendationsData]:
@@ -51,19 +55,20 @@ class ProductRecommendationsCRUD:
         """
         product_recommendations = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            product_recommendation_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                product_recommendation_list = cursor.fetchall()
+                cursor.close()
             for product_recommendation in product_recommendation_list:
                 product_recommendation_dict = {
                     "customer_id": product_recommendation[0],
                     "recommended_product_id": product_recommendation[1]
                 }
-                product_recommendations.append(ProductRecommendationsData(**product_recommendation_dict))
+                product_recommendations.append(ProductRecommendationsData.model_construct(**product_recommendation_dict))
             return product_recommendations
         except Exception as e:
             print(f"Error in query: {e}")
@@ -80,19 +85,17 @@ class ProductRecommendationsCRUD:
         """
         query = """
             INSERT INTO Product_Recommendations (customer_id, recommended_product_id)
-            VALUES (%s, %s)
-            RETURNING product_Recommendation_id;
+            VALUES (%s, %s);
         """
         values = (data.customer_id, data.recommended_product_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            product_recommendation_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                product_recommendation_id = self.db_connection.dialect.insert(cursor, query, values, "product_Recommendation_id")
+                connection.commit()
+                cursor.close()
             return product_recommendation_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating product recommendation: {e}")
             return None
 
@@ -114,7 +117,7 @@ class ProductRecommendationsCRUD:
         return product_recommendations[0] if product_recommendations else None
 
     def get_by_customer(self, customer_id: int) -> List[ProductRecommendationsData]:
-        """Gets recommendations for a specific customer.
+        """Gets recommendations for a specific customer, best first.
         
         Args:
             customer_id (int): The ID of the customer to retrieve recommendations for.
@@ -122,11 +125,12 @@ class ProductRecommendationsCRUD:
         Returns:
             List[ProductRecommendationsData]: A list of recommendations for the specified customer.
         """
-        query = """
+        query = prepared(f"""
             SELECT customer_id, recommended_product_id
             FROM Product_Recommendations
-            WHERE customer_id = %s;
-        """
+            WHERE customer_id = %s
+            ORDER BY {self.db_connection.dialect.desc_nulls_last("score")};
+        """)
         return self._get_product_recommendations(query, (customer_id,))
 
     def get_recommendations_for_product(self, product_id: int) -> List[ProductRecommendationsData]:
@@ -145,6 +149,32 @@ class ProductRecommendationsCRUD:
         """
         return self._get_product_recommendations(query, (product_id,))
 
+    def get_similar_products(self, product_id: int) -> List[SimilarProduct]:
+        """Gets the products most often bought together with a product, as computed by the recommendation engine.
+        
+        Args:
+            product_id (int): The ID of the product to retrieve similar products for.
+
+        Returns:
+            List[SimilarProduct]: The similar products, most similar first.
+        """
+        query = prepared("""
+            SELECT similar_product_id, score
+            FROM product_similarities
+            WHERE product_id = %s
+            ORDER BY score DESC;
+        """)
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (product_id,))
+                rows = cursor.fetchall()
+                cursor.close()
+            return [SimilarProduct.model_construct(similar_product_id=row[0], score=row[1]) for row in rows]
+        except Exception as e:
+            print(f"Error in query: {e}")
+            return []
+
     def update(self, product_recommendation_id: int, data: ProductRecommendationsData) -> bool:
         """Updates a product recommendation.
         
@@ -0,0 +1,225 @@
+"""Builds co-purchase recommendations into Product_Recommendations.
+
+The item-item co-occurrence matrix is kept in Postgres as a sparse
+(coordinate) table, product_co_purchases, with the number of orders that
+contain each product in product_purchase_counts. Each run only folds in the
+Order_Items queued in recommendation_queue since the previous run (a trigger
+queues every new line in the transaction that inserts it), then recomputes the top-k similar
+products of every product whose similarities changed and the top-k
+recommendations of every customer with new purchases. Run it periodically,
+after the migrations:
+
+    python -m crud.recommendation_engine --top-k 10
+    python -m crud.recommendation_engine --full   # rebuild from every order
+"""
+import argparse
+from typing import Dict
+
+from connections import PostgresDatabaseConnection
+
+DEFAULT_TOP_K = 10
+RUN_LOCK_KEY = 7_310_014  # pg advisory lock: one run at a time
+
+# Takes the queued order items. The run is REPEATABLE READ, so this and the
+# baskets below see the same committed lines; a line that commits during the
+# run stays queued for the next one, whatever its ID.
+DRAIN_QUEUE_QUERY = """
+    CREATE TEMP TABLE rec_new ON COMMIT DROP AS
+    SELECT order_item_id, orders_id FROM recommendation_queue;
+    DELETE FROM recommendation_queue WHERE order_item_id IN (SELECT order_item_id FROM rec_new);
+"""
+
+# A full rebuild takes every order item, and drops the queue it makes redundant.
+DRAIN_ALL_QUERY = """
+    CREATE TEMP TABLE rec_new ON COMMIT DROP AS
+    SELECT order_item_id, orders_id FROM Order_Items
+    WHERE orders_id IS NOT NULL AND product_id IS NOT NULL;
+    DELETE FROM recommendation_queue WHERE order_item_id IN (SELECT order_item_id FROM rec_new);
+"""
+
+# (orders_id, product_id) baskets of the orders with queued items. `before`
+# marks products the order already had when it was last folded in, whose
+# pairs are already counted in the matrix.
+BASKETS_QUERY = """
+    CREATE TEMP TABLE rec_baskets ON COMMIT DROP AS
+    SELECT oi.orders_id, oi.product_id, bool_or(n.order_item_id IS NULL) AS before
+    FROM Order_Items oi
+    LEFT JOIN rec_new n ON n.order_item_id = oi.order_item_id
+    WHERE oi.orders_id IN (SELECT orders_id FROM rec_new)
+      AND oi.product_id IS NOT NULL
+    GROUP BY oi.orders_id, oi.product_id;
+"""
+
+FOLD_COUNTS_QUERY = """
+    INSERT INTO product_purchase_counts AS c (product_id, orders_count)
+    SELECT product_id, COUNT(*)
+    FROM rec_baskets
+    WHERE NOT before
+    GROUP BY product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET orders_count = c.orders_count + EXCLUDED.orders_count;
+"""
+
+FOLD_PAIRS_QUERY = """
+    INSERT INTO product_co_purchases AS c (product_id, other_product_id, orders_count)
+    SELECT a.product_id, b.product_id, COUNT(*)
+    FROM rec_baskets a
+    JOIN rec_baskets b ON b.orders_id = a.orders_id AND b.product_id <> a.product_id
+    WHERE NOT (a.before AND b.before)
+    GROUP BY a.product_id, b.product_id
+    ON CONFLICT (product_id, other_product_id) DO UPDATE
+    SET orders_count = c.orders_count + EXCLUDED.orders_count;
+"""
+
+# Cosine similarity between a and b depends on their pair count and on both
+# purchase counts, so it changes for the products with new purchases and for
+# all of their neighbours.
+AFFECTED_PRODUCTS_QUERY = """
+    CREATE TEMP TABLE rec_products ON COMMIT DROP AS
+    SELECT product_id FROM rec_baskets WHERE NOT before
+    UNION
+    SELECT cp.other_product_id
+    FROM product_co_purchases cp
+    WHERE cp.product_id IN (SELECT product_id FROM rec_baskets WHERE NOT before);
+"""
+
+SIMILARITIES_QUERY = """
+    DELETE FROM product_similarities WHERE product_id IN (SELECT product_id FROM rec_products);
+    INSERT INTO product_similarities (product_id, similar_product_id, score)
+    SELECT product_id, other_product_id, score
+    FROM (
+        SELECT cp.product_id, cp.other_product_id,
+               cp.orders_count / sqrt(pa.orders_count::float8 * pb.orders_count) AS score,
+               ROW_NUMBER() OVER (
+                   PARTITION BY cp.product_id
+                   ORDER BY cp.orders_count / sqrt(pa.orders_count::float8 * pb.orders_count) DESC, cp.other_product_id
+               ) AS position
+        FROM product_co_purchases cp
+        JOIN rec_products r ON r.product_id = cp.product_id
+        JOIN product_purchase_counts pa ON pa.product_id = cp.product_id
+        JOIN product_purchase_counts pb ON pb.product_id = cp.other_product_id
+    ) AS ranked
+    WHERE position <= %(top_k)s;
+"""
+
+# A customer's candidates are the products similar to anything they bought,
+# scored by the summed similarity and excluding what they already bought.
+# Hand-made recommendations (no recommendation_date) are left alone.
+CUSTOMER_RECOMMENDATIONS_QUERY = """
+    CREATE TEMP TABLE rec_customers ON COMMIT DROP AS
+    SELECT DISTINCT o.customer_id
+    FROM Orders o
+    WHERE o.orders_id IN (SELECT orders_id FROM rec_baskets)
+      AND o.customer_id IS NOT NULL;
+
+    CREATE TEMP TABLE rec_purchases ON COMMIT DROP AS
+    SELECT DISTINCT o.customer_id, oi.product_id
+    FROM Orders o
+    JOIN rec_customers rc ON rc.customer_id = o.customer_id
+    JOIN Order_Items oi ON oi.orders_id = o.orders_id
+    WHERE oi.product_id IS NOT NULL;
+
+    DELETE FROM Product_Recommendations
+    WHERE customer_id IN (SELECT customer_id FROM rec_customers)
+      AND recommendation_date IS NOT NULL;
+
+    INSERT INTO Product_Recommendations (customer_id, recommended_product_id, recommendation_date, score)
+    SELECT customer_id, similar_product_id, CURRENT_DATE, score
+    FROM (
+        SELECT p.customer_id, s.similar_product_id, SUM(s.score) AS score,
+               ROW_NUMBER() OVER (PARTITION BY p.customer_id ORDER BY SUM(s.score) DESC, s.similar_product_id) AS position
+        FROM rec_purchases p
+        JOIN product_similarities s ON s.product_id = p.product_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM rec_purchases bought
+            WHERE bought.customer_id = p.customer_id AND bought.product_id = s.similar_product_id
+        )
+        GROUP BY p.customer_id, s.similar_product_id
+    ) AS ranked
+    WHERE position <= %(top_k)s;
+"""
+
+class RecommendationEngine:
+    """Incrementally maintains the co-purchase matrix and the recommendations built from it."""
+
+    def __init__(self, db_connection: PostgresDatabaseConnection = None):
+        """Initialize the database connection."""
+        self.db_connection = db_connection or PostgresDatabaseConnection()
+        self.db_connection.connect()
+
+    def run(self, top_k: int = DEFAULT_TOP_K, full: bool = False) -> Dict:
+        """Folds the queued order items into the recommendations.
+
+        Everything happens in one transaction, so the API keeps serving the
+        previous recommendations until the run commits. Products added to an
+        order after it was folded in are counted on the next run, as are
+        items that commit while a run is in progress; deleted
+        order items are only forgotten by a full rebuild. Customers without
+        new purchases keep their previous recommendations.
+
+        Args:
+            top_k (int): Similar products kept per product and recommendations per customer.
+            full (bool): Discard the matrix and rebuild it from every order.
+
+        Returns:
+            Dict: The run statistics, or {"error": ...} if it failed or another run holds the lock.
+        """
+        try:
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ;")
+                cursor.execute("SELECT pg_try_advisory_xact_lock(%s);", (RUN_LOCK_KEY,))
+                if not cursor.fetchone()[0]:
+                    connection.rollback()
+                    cursor.close()
+                    return {"error": "Another recommendation run is in progress"}
+                if full:
+                    cursor.execute("""
+                        TRUNCATE product_co_purchases, product_purchase_counts, product_similarities, recommendation_runs;
+                    """)
+                cursor.execute(DRAIN_ALL_QUERY if full else DRAIN_QUEUE_QUERY)
+                cursor.execute("SELECT COALESCE(MAX(order_item_id), 0) FROM rec_new;")
+                last_order_item_id = cursor.fetchone()[0]
+                params = {"top_k": top_k}
+
+                cursor.execute(BASKETS_QUERY)
+                cursor.execute("SELECT COUNT(DISTINCT orders_id) FROM rec_baskets;")
+                orders_folded = cursor.fetchone()[0]
+                cursor.execute(FOLD_COUNTS_QUERY)
+                cursor.execute(FOLD_PAIRS_QUERY)
+                cursor.execute(AFFECTED_PRODUCTS_QUERY)
+                cursor.execute(SIMILARITIES_QUERY, params)
+                cursor.execute("SELECT COUNT(*) FROM rec_products;")
+                products_updated = cursor.fetchone()[0]
+                cursor.execute(CUSTOMER_RECOMMENDATIONS_QUERY, params)
+                cursor.execute("SELECT COUNT(*) FROM rec_customers;")
+                customers_updated = cursor.fetchone()[0]
+
+                cursor.execute("""
+                    INSERT INTO recommendation_runs (last_order_item_id, orders_folded, products_updated, customers_updated)
+                    VALUES (%s, %s, %s, %s);
+                """, (last_order_item_id, orders_folded, products_updated, customers_updated))
+                connection.commit()
+                cursor.close()
+            return {
+                "last_order_item_id": last_order_item_id,
+                "orders_folded": orders_folded,
+                "products_updated": products_updated,
+                "customers_updated": customers_updated,
+            }
+        except Exception as e:
+            print(f"Error building recommendations: {e}")
+            return {"error": str(e)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--full", action="store_true", help="Rebuild from every order instead of the new ones")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    print(engine.run(args.top_k, args.full))
+    engine.db_connection.close()
+
+if __name__ == "__main__":
+    main()
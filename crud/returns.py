@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class ReturnsData(BaseModel):
     """Data structure for Returns."""
@@ -11,48 +12,52 @@ class ReturnsData(BaseModel):
     return_status: Optional[str] = None
     order_item_id: int        # Foreign key
 
+def _return_from_row(return_item) -> ReturnsData:
+    """Maps a return row to a ReturnsData object."""
+    return_dict = {
+        "return_date": return_item[0],
+        "return_reason": return_item[1],
+        "return_status": return_item[2],
+        "order_item_id": return_item[3]
+    }
+    return ReturnsData.model_construct(**return_dict)
+
 class ReturnsCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
         
     def _get_returns(self, query: str, values: tuple = None) -> List[ReturnsData]:
         """Executes a query and returns a list of ReturnsData objects."""
         returns = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            return_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                return_list = cursor.fetchall()
+                cursor.close()
             for return_item in return_list:
-                return_dict = {
-                    "return_date": return_item[0],
-                    "return_reason": return_item[1],
-                    "return_status": return_item[2],
-                    "order_item_id": return_item[3]
-                }
-                returns.append(ReturnsData(**return_dict))
+                returns.append(_return_from_row(return_item))
             return returns
         except Exception as e:
             print(f"Error in query: {e}")
@@ -62,19 +67,17 @@ class ReturnsCRUD:
         """Creates a new return."""
         query = """
             INSERT INTO Returns (return_date, return_reason, return_status, order_item_id)
-            VALUES (%s, %s, %s, %s)
-            RETURNING returns_id;
+            VALUES (%s, %s, %s, %s);
         """
         values = (data.return_date, data.return_reason, data.return_status, data.order_item_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            returns_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                returns_id = self.db_connection.dialect.insert(cursor, query, values, "returns_id")
+                connection.commit()
+                cursor.close()
             return returns_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating return: {e}")
             return None
 
@@ -88,13 +91,25 @@ class ReturnsCRUD:
         returns = self._get_returns(query, (returns_id,))
         return returns[0] if returns else None
 
-    def get_all(self) -> List[ReturnsData]:
-        """Gets all returns."""
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of returns, ordered by ID."""
+        query = """
+            SELECT return_date, return_reason, return_status, order_item_id, returns_id
+            FROM Returns
+            WHERE returns_id > %s
+            ORDER BY returns_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _return_from_row)
+
+    def stream_all(self) -> Iterator[ReturnsData]:
+        """Streams all returns through a server-side cursor."""
         query = """
             SELECT return_date, return_reason, return_status, order_item_id
-            FROM Returns;
+            FROM Returns
+            ORDER BY returns_id;
         """
-        return self._get_returns(query)
+        return stream_rows(self.db_connection, query, (), _return_from_row)
 
     def get_by_order_item(self, order_item_id: int) -> List[ReturnsData]:
         """Gets returns for a specific order item."""
@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.bulk import bulk_insert
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class ReviewData(BaseModel):
     """Data structure for Review."""
@@ -12,12 +14,29 @@ class ReviewData(BaseModel):
     customer_id: int    # Foreign key
     product_id: int     # Foreign key
 
+def _review_from_row(review_data) -> ReviewData:
+    """Maps a review row to a ReviewData object."""
+    review_dict = {
+        "rating": review_data[0],
+        "comment": review_data[1],
+        "review_date": review_data[2],
+        "customer_id": review_data[3],
+        "product_id": review_data[4]
+    }
+    return ReviewData.model_construct(**review_dict)
+
+class RatingSummary(BaseModel):
+    """Review aggregates of one product; histogram maps each star rating (1-5) to its number of reviews."""
+    product_id: int
+    review_count: int
+    average_rating: Optional[float] = None
+    histogram: Dict[int, int]
+
 class ReviewCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database.
@@ -30,17 +49,17 @@ class ReviewCRUD:
             bool: True if the operation was successful, False otherwise.
         """
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_reviews(self, query: str, values: tuple = None) -> List[ReviewData]:
@@ -55,22 +74,16 @@ class ReviewCRUD:
         """
         reviews = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            review_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                review_list = cursor.fetchall()
+                cursor.close()
             for review_data in review_list:
-                review_dict = {
-                    "rating": review_data[0],
-                    "comment": review_data[1],
-                    "review_date": review_data[2],
-                    "customer_id": review_data[3],
-                    "product_id": review_data[4]
-                }
-                reviews.append(ReviewData(**review_dict))
+                reviews.append(_review_from_row(review_data))
             return reviews
         except Exception as e:
             print(f"Error in query: {e}")
@@ -87,22 +100,33 @@ class ReviewCRUD:
         """
         query = """
             INSERT INTO Review (rating, comment, review_date, customer_id, product_id)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING review_id;
+            VALUES (%s, %s, %s, %s, %s);
         """
         values = (data.rating, data.comment, data.review_date, data.customer_id, data.product_id)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            review_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                review_id = self.db_connection.dialect.insert(cursor, query, values, "review_id")
+                connection.commit()
+                cursor.close()
             return review_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating review: {e}")
             return None
 
+    def bulk_create(self, rows: List[ReviewData]) -> Dict:
+        """Creates many reviews in one transaction.
+        
+        Args:
+            rows (List[ReviewData]): The data for the new reviews.
+
+        Returns:
+            Dict: The generated IDs in input order and the errors of the rejected rows.
+        """
+        columns = ("rating", "comment", "review_date", "customer_id", "product_id")
+        values = [(data.rating, data.comment, data.review_date, data.customer_id, data.product_id) for data in rows]
+        return bulk_insert(self.db_connection, "Review", columns, "review_id", values)
+
     def get_by_id(self, review_id: int) -> Optional[ReviewData]:
         """Gets a review by ID.
         
@@ -112,25 +136,45 @@ class ReviewCRUD:
         Returns:
             Optional[ReviewData]: The retrieved review, or None if not found.
         """
-        query = """
+        query = prepared("""
             SELECT rating, comment, review_date, customer_id, product_id
             FROM Review
             WHERE review_id = %s;
-        """
+        """)
         reviews = self._get_reviews(query, (review_id,))
         return reviews[0] if reviews else None  # Return None if no results
 
-    def get_all(self) -> List[ReviewData]:
-        """Gets all reviews.
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of reviews, ordered by ID.
         
+        Args:
+            limit (int): The maximum number of reviews to return.
+            after (int, optional): Only return reviews with an ID greater than this cursor.
+
         Returns:
-            List[ReviewData]: A list of all reviews.
+            Dict: The reviews in the page and the cursor for the next page.
+        """
+        query = """
+            SELECT rating, comment, review_date, customer_id, product_id, review_id
+            FROM Review
+            WHERE review_id > %s
+            ORDER BY review_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _review_from_row)
+
+    def stream_all(self) -> Iterator[ReviewData]:
+        """Streams all reviews through a server-side cursor.
+        
+        Returns:
+            Iterator[ReviewData]: The reviews, fetched in batches.
         """
         query = """
             SELECT rating, comment, review_date, customer_id, product_id
-            FROM Review;
+            FROM Review
+            ORDER BY review_id;
         """
-        return self._get_reviews(query)
+        return stream_rows(self.db_connection, query, (), _review_from_row)
     
     def get_by_product(self, product_id: int) -> List[ReviewData]:
         """Gets reviews for a specific product.
@@ -141,13 +185,48 @@ class ReviewCRUD:
         Returns:
             List[ReviewData]: A list of reviews for the specified product.
         """
-        query = """
+        query = prepared("""
             SELECT rating, comment, review_date, customer_id, product_id
             FROM Review
             WHERE product_id = %s;
-        """
+        """)
         return self._get_reviews(query, (product_id,))
     
+    def get_summary(self, product_id: int) -> Optional[Dict]:
+        """Gets the review count, average rating and rating histogram of a product.
+
+        Reads the single product_rating_stats row that the Review triggers keep
+        up to date, so the cost does not grow with the number of reviews.
+        
+        Args:
+            product_id (int): The ID of the product to summarize.
+
+        Returns:
+            Optional[Dict]: The RatingSummary of the product (zero reviews if it has
+            none yet), or None if there was an error.
+        """
+        query = prepared("""
+            SELECT review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5
+            FROM product_rating_stats
+            WHERE product_id = %s;
+        """)
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (product_id,))
+                stats = cursor.fetchone() or (0, 0, 0, 0, 0, 0, 0)
+                cursor.close()
+        except Exception as e:
+            print(f"Error reading rating summary: {e}")
+            return None
+        review_count, rating_sum = stats[0], stats[1]
+        return {
+            "product_id": product_id,
+            "review_count": review_count,
+            "average_rating": round(rating_sum / review_count, 2) if review_count else None,
+            "histogram": {rating: count for rating, count in enumerate(stats[2:], start=1)},
+        }
+
     def get_by_customer(self, customer_id: int) -> List[ReviewData]:
         """Gets reviews for a specific customer.
         
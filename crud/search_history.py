@@ -1,7 +1,10 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
-from connections import PostgresDatabaseConnection  # Ensure you import your connection class
+from connections import get_database_connection, prepared  # Ensure you import your connection class
+from crud.bulk import bulk_insert
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
+from crud.write_buffer import create_buffer
 
 class SearchHistoryData(BaseModel):
     """Data structure for SearchHistory."""
@@ -9,72 +12,88 @@ class SearchHistoryData(BaseModel):
     search_date: date  # ISO 8601 format is recommended (YYYY-MM-DD)
     customer_id: int    # Foreign key
 
+def _search_history_from_row(search_history_entry) -> SearchHistoryData:
+    """Maps a search history row to a SearchHistoryData object."""
+    search_history_dict = {
+        "search_term": search_history_entry[0],
+        "search_date": search_history_entry[1],
+        "customer_id": search_history_entry[2]
+    }
+    return SearchHistoryData.model_construct(**search_history_dict)
+
 class SearchHistoryCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
+        self.buffer = create_buffer(self._insert_many, "SEARCH_HISTORY")
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_search_history(self, query: str, values: tuple = None) -> List[SearchHistoryData]:
         """Executes a query and returns a list of SearchHistoryData objects."""
         search_history_entries = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            search_history_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                search_history_list = cursor.fetchall()
+                cursor.close()
             for search_history_entry in search_history_list:
-                search_history_dict = {
-                    "search_term": search_history_entry[0],
-                    "search_date": search_history_entry[1],
-                    "customer_id": search_history_entry[2]
-                }
-                search_history_entries.append(SearchHistoryData(**search_history_dict))
+                search_history_entries.append(_search_history_from_row(search_history_entry))
             return search_history_entries
         except Exception as e:
             print(f"Error in query: {e}")
             return []  # Or raise the exception if you prefer
 
     def create(self, data: SearchHistoryData) -> Optional[int]:
-        """Creates a new search history entry."""
+        """Creates a new search history entry, dated (created_at) by its search date."""
         query = """
-            INSERT INTO search_history (search_term, search_date, customer_id)
-            VALUES (%s, %s, %s)
-            RETURNING search_history_id;
+            INSERT INTO search_history (search_term, search_date, customer_id, created_at)
+            VALUES (%s, %s, %s, %s);
         """
-        values = (data.search_term, data.search_date, data.customer_id)
+        values = (data.search_term, data.search_date, data.customer_id, data.search_date)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            search_history_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                search_history_id = self.db_connection.dialect.insert(cursor, query, values, "search_history_id")
+                connection.commit()
+                cursor.close()
             return search_history_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating search history entry: {e}")
             return None
 
+    def log(self, data: SearchHistoryData) -> bool:
+        """Queues a search history entry to be inserted in the next batch, without waiting for the database."""
+        return self.buffer.put((data.search_term, data.search_date, data.customer_id))
+
+    def _insert_many(self, rows: List[tuple]) -> Dict:
+        """Inserts a batch of (search_term, search_date, customer_id) rows flushed by the buffer.
+
+        Each row is dated by its search date, not by when the buffer flushed it.
+        """
+        columns = ("search_term", "search_date", "customer_id", "created_at")
+        return bulk_insert(self.db_connection, "search_history", columns, "search_history_id",
+                           [row + (row[1],) for row in rows])
+
     def get_by_id(self, search_history_id: int) -> Optional[SearchHistoryData]:
         """Gets a search history entry by ID."""
         query = """
@@ -85,13 +104,44 @@ class SearchHistoryCRUD:
         results = self._get_search_history(query, (search_history_id,))
         return results[0] if results else None  # Returns None if no result, the SearchHistoryData object otherwise
 
-    def get_all(self) -> List[SearchHistoryData]:
-        """Gets all search history entries."""
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of search history entries, ordered by ID."""
+        query = """
+            SELECT search_term, search_date, customer_id, search_history_id
+            FROM search_history
+            WHERE search_history_id > %s
+            ORDER BY search_history_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _search_history_from_row)
+
+    def stream_all(self) -> Iterator[SearchHistoryData]:
+        """Streams all search history entries through a server-side cursor."""
         query = """
             SELECT search_term, search_date, customer_id
-            FROM search_history;
+            FROM search_history
+            ORDER BY search_history_id;
         """
-        return self._get_search_history(query)
+        return stream_rows(self.db_connection, query, (), _search_history_from_row)
+
+    def get_by_date_range(self, since: date, until: date, limit: int = DEFAULT_PAGE_SIZE,
+                          after: Optional[int] = None) -> Dict:
+        """Gets one page of the entries searched between two days (both included), ordered by ID.
+
+        Search_History is partitioned by month of created_at, which every
+        write sets to the search date, so the same bounds on created_at
+        restrict the query to the partitions of the months in the range.
+        """
+        query = prepared(f"""
+            SELECT search_term, search_date, customer_id, search_history_id
+            FROM search_history
+            WHERE search_date >= %s AND search_date <= %s
+              AND created_at >= %s AND created_at < {self.db_connection.dialect.day_after()} AND search_history_id > %s
+            ORDER BY search_history_id
+            LIMIT %s;
+        """)
+        return fetch_page(self.db_connection, query, (since, until, since, until, after or 0, limit), limit,
+                          _search_history_from_row)
 
     def get_by_customer(self, customer_id: int) -> List[SearchHistoryData]:
         """Gets search history entries for a specific customer."""
@@ -103,13 +153,13 @@ class SearchHistoryCRUD:
         return self._get_search_history(query, (customer_id,))
 
     def update(self, search_history_id: int, data: SearchHistoryData) -> bool:
-        """Updates a search history entry."""
+        """Updates a search history entry; a new search date moves it to that date's partition."""
         query = """
             UPDATE search_history
-            SET search_term = %s, search_date = %s, customer_id = %s
+            SET search_term = %s, search_date = %s, customer_id = %s, created_at = %s
             WHERE search_history_id = %s;
         """
-        values = (data.search_term, data.search_date, data.customer_id, search_history_id)
+        values = (data.search_term, data.search_date, data.customer_id, data.search_date, search_history_id)
         return self._execute_query(query, values)
 
     def delete(self, search_history_id: int) -> bool:
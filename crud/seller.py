@@ -1,7 +1,10 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Dict, Iterator, Tuple
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.cache import cached, get_cache
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
+from crud.table_versions import table_version
 
 class SellerData(BaseModel):
     """Data structure for Seller."""
@@ -9,46 +12,59 @@ class SellerData(BaseModel):
     seller_type: Optional[str] = None
     seller_rating: Optional[float] = None
 
+def _seller_from_row(seller) -> SellerData:
+    """Maps a seller row to a SellerData object."""
+    return SellerData.model_construct(
+        seller_name=seller[0],
+        seller_type=seller[1],
+        seller_rating=seller[2]
+    )
+
 class SellerCRUD:
 
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
+        self.cache = get_cache()
+
+    def _invalidate(self, seller_id: int):
+        """Drops the cached seller."""
+        self.cache.delete(f"seller:{seller_id}")
+
+    def version(self) -> Optional[int]:
+        """Returns the version of the Seller table, which every seller write changes, or None if it could not be read."""
+        return table_version(self.db_connection, "seller")
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
         
-    def _get_sellers(self, query: str, values: tuple = None) -> List[SellerData]:
+    def _get_sellers(self, query: str, values: tuple = None, build: Callable = _seller_from_row) -> List[SellerData]:
         """Executes a query and returns a list of SellerData objects."""
         sellers = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            if values:
-                cursor.execute(query, values)
-            else:
-                cursor.execute(query)
-            seller_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                if values:
+                    cursor.execute(query, values)
+                else:
+                    cursor.execute(query)
+                seller_list = cursor.fetchall()
+                cursor.close()
             for seller in seller_list:
-                sellers.append(SellerData(
-                    seller_name=seller[0],
-                    seller_type=seller[1],
-                    seller_rating=seller[2]
-                ))
+                sellers.append(build(seller))
             return sellers
         except Exception as e:
             print(f"Error in query: {e}")
@@ -58,39 +74,56 @@ class SellerCRUD:
         """Creates a new seller."""
         query = """
             INSERT INTO Seller (seller_name, seller_type, seller_rating)
-            VALUES (%s, %s, %s)
-            RETURNING seller_id;
+            VALUES (%s, %s, %s);
         """
         values = (data.seller_name, data.seller_type, data.seller_rating)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            seller_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                seller_id = self.db_connection.dialect.insert(cursor, query, values, "seller_id")
+                connection.commit()
+                cursor.close()
+            self._invalidate(seller_id)
             return seller_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating seller: {e}")
             return None
 
     def get_by_id(self, seller_id: int) -> Optional[SellerData]:
-        """Get a seller by ID."""
-        query = """
-            SELECT seller_name, seller_type, seller_rating
+        """Get a seller by ID, through the catalog cache."""
+        return self.get_by_id_with_version(seller_id)[0]
+
+    def get_by_id_with_version(self, seller_id: int) -> Tuple[Optional[SellerData], Optional[str]]:
+        """Get a seller by ID and the version of its row (`xmin`, or `updated_at` on MySQL), through the catalog cache."""
+        query = prepared(f"""
+            SELECT seller_name, seller_type, seller_rating, {self.db_connection.dialect.row_version}
             FROM Seller
             WHERE seller_id = %s;
+        """)
+        def load():
+            sellers = self._get_sellers(query, (seller_id,), lambda row: (_seller_from_row(row), str(row[3])))
+            return sellers[0] if sellers else None
+        return cached(self.cache, f"seller:{seller_id}", load) or (None, None)
+
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of sellers, ordered by ID."""
+        query = """
+            SELECT seller_name, seller_type, seller_rating, seller_id
+            FROM Seller
+            WHERE seller_id > %s
+            ORDER BY seller_id
+            LIMIT %s;
         """
-        sellers = self._get_sellers(query, (seller_id,))
-        return sellers[0] if sellers else None
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _seller_from_row)
 
-    def get_all(self) -> List[SellerData]:
-        """Gets all sellers."""
+    def stream_all(self) -> Iterator[SellerData]:
+        """Streams all sellers through a server-side cursor."""
         query = """
             SELECT seller_name, seller_type, seller_rating
-            FROM Seller;
+            FROM Seller
+            ORDER BY seller_id;
         """
-        return self._get_sellers(query)
+        return stream_rows(self.db_connection, query, (), _seller_from_row)
 
     def update(self, seller_id: int, data: SellerData) -> bool:
         """Updates a seller."""
@@ -100,7 +133,9 @@ class SellerCRUD:
             WHERE seller_id = %s;
         """
         values = (data.seller_name, data.seller_type, data.seller_rating, seller_id)
-        return self._execute_query(query, values)
+        updated = self._execute_query(query, values)
+        self._invalidate(seller_id)
+        return updated
 
     def delete(self, seller_id: int) -> bool:
         """Deletes a seller."""
@@ -108,7 +143,9 @@ class SellerCRUD:
             DELETE FROM Seller
             WHERE seller_id = %s;
         """
-        return self._execute_query(query, (seller_id,))
+        deleted = self._execute_query(query, (seller_id,))
+        self._invalidate(seller_id)
+        return deleted
 
     def get_by_name(self, seller_name: str) -> List[SellerData]:
         """Gets sellers by name."""
@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 from datetime import date
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class ShippingData(BaseModel):
     """Data structure for Shipping."""
@@ -10,41 +11,45 @@ class ShippingData(BaseModel):
     estimated_delivery: Optional[date] = None  # Date instead of str
     shipping_cost: Optional[float] = None
 
+def _shipping_from_row(shipping) -> ShippingData:
+    """Maps a shipping row to a ShippingData object."""
+    shipping_dict = {
+        "shipping_company": shipping[0],
+        "shipping_date": shipping[1],
+        "estimated_delivery": shipping[2],
+        "shipping_cost": shipping[3]
+    }
+    return ShippingData.model_construct(**shipping_dict)
+
 class ShippingCRUD:
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Executes a query in the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_shippings(self, query: str, values: tuple = None) -> List[ShippingData]:
         """Executes a query and returns a list of ShippingData objects."""
         shippings = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values if values else ())
-            shipping_list = cursor.fetchall()
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values if values else ())
+                shipping_list = cursor.fetchall()
+                cursor.close()
             for shipping in shipping_list:
-                shipping_dict = {
-                    "shipping_company": shipping[0],
-                    "shipping_date": shipping[1],
-                    "estimated_delivery": shipping[2],
-                    "shipping_cost": shipping[3]
-                }
-                shippings.append(ShippingData(**shipping_dict))
+                shippings.append(_shipping_from_row(shipping))
             return shippings
         except Exception as e:
             print(f"Error fetching shipping data: {e}")
@@ -54,8 +59,7 @@ class ShippingCRUD:
         """Creates a new shipping entry."""
         query = """
             INSERT INTO Shipping (shipping_company, shipping_date, estimated_delivery, shipping_cost)
-            VALUES (%s, %s, %s, %s)
-            RETURNING shipping_id;
+            VALUES (%s, %s, %s, %s);
         """
         values = (
             data.shipping_company,
@@ -64,14 +68,13 @@ class ShippingCRUD:
             data.shipping_cost
         )
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            shipping_id = cursor.fetchone()[0]
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                shipping_id = self.db_connection.dialect.insert(cursor, query, values, "shipping_id")
+                connection.commit()
+                cursor.close()
             return shipping_id
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating shipping entry: {e}")
             return None
 
@@ -85,13 +88,25 @@ class ShippingCRUD:
         shippings = self._get_shippings(query, (shipping_id,))
         return shippings[0] if shippings else None
 
-    def get_all(self) -> List[ShippingData]:
-        """Gets all shipping entries."""
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of shipping entries, ordered by ID."""
+        query = """
+            SELECT shipping_company, shipping_date, estimated_delivery, shipping_cost, shipping_id
+            FROM Shipping
+            WHERE shipping_id > %s
+            ORDER BY shipping_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _shipping_from_row)
+
+    def stream_all(self) -> Iterator[ShippingData]:
+        """Streams all shipping entries through a server-side cursor."""
         query = """
             SELECT shipping_company, shipping_date, estimated_delivery, shipping_cost
-            FROM Shipping;
+            FROM Shipping
+            ORDER BY shipping_id;
         """
-        return self._get_shippings(query)
+        return stream_rows(self.db_connection, query, (), _shipping_from_row)
     
     def get_by_shipping_company(self, company_name: str) -> List[ShippingData]:
         """Gets all shipping entries by shipping company."""
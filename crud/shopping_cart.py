@@ -1,43 +1,66 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterator
 from pydantic import BaseModel
 
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
+from crud.pagination import DEFAULT_PAGE_SIZE, fetch_page, stream_rows
 
 class ShoppingCartData(BaseModel):
     """Data structure for ShoppingCart."""
     customer_id: int    # Foreign key
 
+def _shopping_cart_from_row(cart) -> Dict:
+    """Maps a (shopping_cart_id, customer_id) row to a dictionary."""
+    return {
+        "shopping_cart_id": cart[0],
+        "customer_id": cart[1]
+    }
+
+class CartLine(BaseModel):
+    """One product in a cart, priced with its best active offer."""
+    product_id: int
+    product_name: str
+    price: float
+    quantity: int
+    quantity_available: int
+    offer_id: Optional[int] = None
+    discount: float
+    line_total: float
+
+class CartView(BaseModel):
+    """The priced lines of a cart and their subtotal."""
+    shopping_cart_id: int
+    customer_id: Optional[int] = None
+    items: List[CartLine]
+    subtotal: float
+
 class ShoppingCartCRUD:
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error in database operation: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_shopping_cart(self, query: str, values: tuple = None) -> List[Dict]:
         """Executes a SELECT query and returns shopping carts as a list of dictionaries."""
         shopping_carts = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            for cart in cursor.fetchall():
-                shopping_carts.append({
-                    "shopping_cart_id": cart[0],
-                    "customer_id": cart[1]
-                })
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                for cart in cursor.fetchall():
+                    shopping_carts.append(_shopping_cart_from_row(cart))
+                cursor.close()
             return shopping_carts
         except Exception as e:
             print(f"Error fetching shopping carts: {e}")
@@ -47,24 +70,22 @@ class ShoppingCartCRUD:
         """Creates a new shopping cart and returns its ID."""
         query = """
             INSERT INTO shopping_cart (customer_id)
-            VALUES (%s)
-            RETURNING shopping_cart_id;
+            VALUES (%s);
         """
         values = (data.customer_id,)
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values)
-            result = cursor.fetchone()
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                shopping_cart_id = self.db_connection.dialect.insert(cursor, query, values, "shopping_cart_id")
+                connection.commit()
+                cursor.close()
 
-            if result is None:
+            if shopping_cart_id is None:
                 raise ValueError("Failed to retrieve shopping_cart_id after insertion.")
 
-            return result[0]
+            return shopping_cart_id
 
         except Exception as e:
-            self.db_connection.connection.rollback()
             print(f"Error creating shopping cart: {e}")
             raise ValueError("Could not create shopping cart.")
 
@@ -78,13 +99,88 @@ class ShoppingCartCRUD:
         shopping_carts = self._get_shopping_cart(query, (shopping_cart_id,))
         return shopping_carts[0] if shopping_carts else None
 
-    def get_all(self) -> List[Dict]:
-        """Gets all shopping carts."""
+    def get_view(self, shopping_cart_id: int) -> Optional[Dict]:
+        """Gets a cart with each product's name, price and best active offer, and the cart subtotal.
+
+        Line totals are computed like in checkout: price times quantity minus
+        the offer discount, never below zero. Everything comes from one query
+        over the (cart_id, product_id) primary key of shopping_cart_product.
+
+        Args:
+            shopping_cart_id (int): The ID of the cart.
+
+        Returns:
+            Optional[Dict]: The cart view, None if the cart does not exist,
+            or {"error": ...} if the query failed.
+        """
+        query = prepared("""
+            SELECT sc.shopping_cart_id, sc.customer_id, scp.product_id, p.product_name, p.price, scp.quantity,
+                   p.quantity_available, o.offer_id, COALESCE(o.discount, 0) AS discount,
+                   GREATEST(p.price * scp.quantity - COALESCE(o.discount, 0), 0) AS line_total
+            FROM shopping_cart sc
+            LEFT JOIN shopping_cart_product scp ON scp.cart_id = sc.shopping_cart_id
+            LEFT JOIN Product p ON p.product_id = scp.product_id
+            LEFT JOIN LATERAL (
+                SELECT offer_id, discount
+                FROM Offer
+                WHERE Offer.product_id = scp.product_id
+                  AND CURRENT_DATE BETWEEN start_date AND end_date
+                ORDER BY discount DESC, offer_id
+                LIMIT 1
+            ) o ON TRUE
+            WHERE sc.shopping_cart_id = %s
+            ORDER BY scp.product_id;
+        """)
+        try:
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (shopping_cart_id,))
+                rows = cursor.fetchall()
+                cursor.close()
+        except Exception as e:
+            print(f"Error fetching the view of shopping cart {shopping_cart_id}: {e}")
+            return {"error": "Internal error reading the shopping cart"}
+        if not rows:
+            return None
+        items = [
+            {
+                "product_id": row[2],
+                "product_name": row[3],
+                "price": row[4],
+                "quantity": row[5],
+                "quantity_available": row[6],
+                "offer_id": row[7],
+                "discount": row[8],
+                "line_total": row[9],
+            }
+            for row in rows if row[2] is not None  # An empty cart comes back as one row without a product
+        ]
+        return {
+            "shopping_cart_id": rows[0][0],
+            "customer_id": rows[0][1],
+            "items": items,
+            "subtotal": sum(item["line_total"] for item in items),
+        }
+
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> Dict:
+        """Gets one page of shopping carts, ordered by ID."""
+        query = """
+            SELECT shopping_cart_id, customer_id, shopping_cart_id
+            FROM shopping_cart
+            WHERE shopping_cart_id > %s
+            ORDER BY shopping_cart_id
+            LIMIT %s;
+        """
+        return fetch_page(self.db_connection, query, (after or 0, limit), limit, _shopping_cart_from_row)
+
+    def stream_all(self) -> Iterator[Dict]:
+        """Streams all shopping carts through a server-side cursor."""
         query = """
             SELECT shopping_cart_id, customer_id
-            FROM shopping_cart;
+            FROM shopping_cart
+            ORDER BY shopping_cart_id;
         """
-        return self._get_shopping_cart(query)
+        return stream_rows(self.db_connection, query, (), _shopping_cart_from_row)
 
     def get_by_customer_id(self, customer_id: int) -> List[Dict]:
         """Gets all shopping carts for a specific customer."""
@@ -1,6 +1,6 @@
 from typing import List, Dict
 from pydantic import BaseModel
-from connections import PostgresDatabaseConnection
+from connections import get_database_connection, prepared
 
 class ShoppingCartProductData(BaseModel):
     """Data structure for ShoppingCartProduct."""
@@ -10,35 +10,35 @@ class ShoppingCartProductData(BaseModel):
 class ShoppingCartProductCRUD:
     def __init__(self):
         """Initialize the database connection."""
-        self.db_connection = PostgresDatabaseConnection()
-        self.db_connection.connect()
+        self.db_connection = get_database_connection()
 
     def _execute_query(self, query: str, values: tuple = None) -> bool:
         """Execute a query on the database."""
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            self.db_connection.connection.commit()
-            cursor.close()
+            with self.db_connection.acquire() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                connection.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"Error en la operación de la base de datos: {e}")
-            self.db_connection.connection.rollback()
             return False
 
     def _get_shopping_cart_products(self, query: str, values: tuple = None) -> List[Dict]:
         """Executes a query and returns a list of shopping cart products as dictionaries."""
         shopping_cart_products = []
         try:
-            cursor = self.db_connection.connection.cursor()
-            cursor.execute(query, values or ())
-            for product in cursor.fetchall():
-                shopping_cart_products.append({
-                    "cart_id": product[0],
-                    "product_id": product[1],
-                    "quantity": product[2]
-                })
-            cursor.close()
+            with self.db_connection.acquire(read_only=True) as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, values or ())
+                for product in cursor.fetchall():
+                    shopping_cart_products.append({
+                        "cart_id": product[0],
+                        "product_id": product[1],
+                        "quantity": product[2]
+                    })
+                cursor.close()
             return shopping_cart_products
         except Exception as e:
             print(f"Error al obtener productos del carrito: {e}")
@@ -46,22 +46,23 @@ class ShoppingCartProductCRUD:
 
     def create(self, cart_id: int, data: ShoppingCartProductData) -> bool:
         """Creates a new shopping cart product entry or updates the quantity if it already exists."""
-        query = """
+        dialect = self.db_connection.dialect
+        query = f"""
             INSERT INTO shopping_cart_product (cart_id, product_id, quantity)
             VALUES (%s, %s, %s)
-            ON CONFLICT (cart_id, product_id)
-            DO UPDATE SET quantity = shopping_cart_product.quantity + EXCLUDED.quantity;
+            {dialect.upsert("cart_id", "product_id")}
+            quantity = shopping_cart_product.quantity + {dialect.excluded("quantity")};
         """
         values = (cart_id, data.product_id, data.quantity)
         return self._execute_query(query, values)
 
     def get_by_cart_id(self, cart_id: int) -> List[Dict]:
         """Gets all products in a specific shopping cart."""
-        query = """
+        query = prepared("""
             SELECT cart_id, product_id, quantity
             FROM shopping_cart_product
             WHERE cart_id = %s;
-        """
+        """)
         return self._get_shopping_cart_products(query, (cart_id,))
 
     def update(self, cart_id: int, product_id: int, data: ShoppingCartProductData) -> bool:
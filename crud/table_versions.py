@@ -0,0 +1,35 @@
+"""Versions of whole tables, used in the ETags of list responses.
+
+Triggers on Product, Category and Seller (migration 011_table_versions) add
+one to a counter of the table on every statement that writes to it, and the
+version is the sum of those counters. It lives in the database, so every
+worker reads the same value, and it changes with every committed write,
+whether it came through the API, another worker or plain SQL.
+"""
+from typing import Optional
+
+from connections import prepared
+
+def table_version(db_connection, table: str) -> Optional[int]:
+    """Returns the current version of `table`, or None if it could not be read.
+
+    Read the version before the rows it describes. Both reads go to the same
+    server, because a request keeps its reads on one replica (or on the
+    primary), so the rows are never older than the version. A write that
+    commits in between only costs the client one more full response.
+
+    Args:
+        db_connection: The connection to read from.
+        table (str): The table name in lower case, e.g. "product".
+    """
+    query = prepared("SELECT COALESCE(SUM(version), 0) FROM table_versions WHERE table_name = %s;")
+    try:
+        with db_connection.acquire(read_only=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, (table,))
+            version = cursor.fetchone()[0]
+            cursor.close()
+        return int(version)
+    except Exception as e:
+        print(f"Error reading the version of {table}: {e}")
+        return None
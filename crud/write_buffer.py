@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import deque
+from typing import Callable, Dict, List
+
+class WriteBehindBuffer:
+    """Bounded in-process queue of rows written to the database in batches.
+
+    `put` only appends to the queue; a background thread hands the queued
+    rows to `write` every `flush_interval` seconds, or as soon as
+    `batch_size` rows are waiting. When the queue is full, the "drop" policy
+    rejects the new row at once and the "block" policy makes the caller wait
+    up to `block_timeout` seconds for room before rejecting it. Rows still
+    queued when the process stops are lost unless `close` is called, which
+    the API does on shutdown.
+    """
+
+    def __init__(self, write: Callable[[List[tuple]], Dict], max_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, policy: str = "drop", block_timeout: float = 0.05):
+        """Creates the buffer; its flush thread starts with the first row.
+
+        Args:
+            write (Callable): Inserts a list of rows and returns {"ids", "errors"} like bulk_insert.
+            max_size (int): Rows the queue holds before applying the policy.
+            batch_size (int): Rows written per batch.
+            flush_interval (float): Seconds a row may wait before its batch is written.
+            policy (str): "drop" or "block" when the queue is full.
+            block_timeout (float): Seconds `put` waits for room under the "block" policy.
+        """
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown buffer policy: {policy}")
+        self.write = write
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._rows = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()  # One batch in flight, so rows are written in order
+        self._thread = None
+        self._closed = False
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+
+    def put(self, row: tuple) -> bool:
+        """Queues a row without waiting for the database.
+
+        Returns:
+            bool: True if the row was queued, False if it was dropped.
+        """
+        with self._condition:
+            if self._closed:
+                self.stats["dropped"] += 1
+                return False
+            if len(self._rows) >= self.max_size and self.policy == "block":
+                self._condition.wait_for(lambda: len(self._rows) < self.max_size or self._closed, self.block_timeout)
+            if len(self._rows) >= self.max_size or self._closed:
+                self.stats["dropped"] += 1
+                return False
+            self._rows.append(row)
+            self.stats["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind-buffer", daemon=True)
+                self._thread.start()
+            if len(self._rows) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def _take_batch(self) -> List[tuple]:
+        """Removes up to batch_size rows from the queue; the caller holds the condition."""
+        batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+        if batch:
+            self._condition.notify_all()  # Wake producers waiting for room
+        return batch
+
+    def _write_batch(self, batch: List[tuple]):
+        """Writes one batch, counting rows rejected by the database as failed."""
+        try:
+            result = self.write(batch)
+            failed = len(result["errors"])
+        except Exception as e:
+            print(f"Error flushing write-behind buffer: {e}")
+            failed = len(batch)
+        with self._condition:
+            self.stats["flushes"] += 1
+            self.stats["written"] += len(batch) - failed
+            self.stats["failed"] += failed
+
+    def _run(self):
+        """Flush thread: writes a batch when it is full or when the interval elapses."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._rows) >= self.batch_size or self._closed, self.flush_interval)
+                if self._closed:
+                    return  # close() drains what is left
+                full = len(self._rows) >= self.batch_size
+            self.flush(max_batches=1 if full else None)
+
+    def flush(self, max_batches: int = None):
+        """Writes the queued rows now, in batches of batch_size.
+
+        Args:
+            max_batches (int, optional): Stop after this many batches; all queued rows by default.
+        """
+        written = 0
+        with self._flush_lock:
+            while max_batches is None or written < max_batches:
+                with self._condition:
+                    batch = self._take_batch()
+                if not batch:
+                    return
+                self._write_batch(batch)
+                written += 1
+
+    def close(self, timeout: float = 5.0):
+        """Stops accepting rows, stops the flush thread and writes what is still queued."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        """Returns the counters, the number of rows waiting and the queue capacity."""
+        with self._condition:
+            return {"buffered": len(self._rows), "max_size": self.max_size, "policy": self.policy, **self.stats}
+
+_buffers = []
+_buffers_lock = threading.Lock()
+
+def create_buffer(write: Callable[[List[tuple]], Dict], prefix: str) -> WriteBehindBuffer:
+    """Creates a buffer configured from the environment and registers it to be flushed on shutdown.
+
+    `{prefix}_BUFFER_SIZE`, `{prefix}_BUFFER_BATCH`, `{prefix}_BUFFER_INTERVAL`
+    and `{prefix}_BUFFER_POLICY` ("drop" or "block") override the defaults.
+    """
+    buffer = WriteBehindBuffer(
+        write,
+        max_size=int(os.getenv(f"{prefix}_BUFFER_SIZE", "10000")),
+        batch_size=int(os.getenv(f"{prefix}_BUFFER_BATCH", "500")),
+        flush_interval=float(os.getenv(f"{prefix}_BUFFER_INTERVAL", "1.0")),
+        policy=os.getenv(f"{prefix}_BUFFER_POLICY", "drop"),
+    )
+    with _buffers_lock:
+        _buffers.append(buffer)
+    return buffer
+
+def close_buffers():
+    """Flushes and stops every registered buffer."""
+    with _buffers_lock:
+        buffers = list(_buffers)
+    for buffer in buffers:
+        buffer.close()
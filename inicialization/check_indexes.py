@@ -0,0 +1,186 @@
+"""Checks that the lookups in crud/*.py can be answered from an index.
+
+Each check calls the real CRUD method, but its connection is swapped for one
+that prefixes every statement with EXPLAIN, so nothing is read or written.
+Sequential scans are disabled for the session (tables in a dev database are
+too small for the planner to prefer an index on its own), so a Seq Scan in
+the plan means there is no usable index for that query. Run it after the
+migrations:
+
+    python -m inicialization.check_indexes
+"""
+import re
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+from crud.category import CategoryCRUD
+from crud.coupons import CouponsCRUD
+from crud.customer import CustomerCRUD
+from crud.offer import OfferCRUD
+from crud.order_items import OrderItemCRUD
+from crud.orders import OrdersCRUD
+from crud.payment_method import PaymentMethodCRUD
+from crud.product import ProductCRUD
+from crud.product_recommendations import ProductRecommendationsCRUD
+from crud.returns import ReturnsCRUD
+from crud.review import ReviewCRUD
+from crud.search_history import SearchHistoryCRUD
+from crud.seller import SellerCRUD
+from crud.shipping import ShippingCRUD
+from crud.shopping_cart import ShoppingCartCRUD
+from crud.shopping_cart_product import ShoppingCartProductCRUD
+
+# (CRUD class, method, arguments, table that must be read through an index)
+CHECKS = [
+    (ProductCRUD, "get_by_id", (1,), "product"),
+    (ProductCRUD, "get_all", (100, 0), "product"),
+    (ProductCRUD, "get_by_name", ("phone",), "product"),
+    (ProductCRUD, "get_by_category", (1,), "product"),
+    (ProductCRUD, "get_cheaper", (10.0,), "product"),
+    (ProductCRUD, "get_expensive", (900.0,), "product"),
+    (ProductCRUD, "get_by_price_ascendent", (), "product"),
+    (ProductCRUD, "get_by_price_descendent", (), "product"),
+    (ProductCRUD, "search", ("phone",), "product"),
+    (CategoryCRUD, "get_by_name", ("home",), "category"),
+    (CustomerCRUD, "get_by_name", ("smith",), "customer"),
+    (CustomerCRUD, "get_by_email", ("someone@example.com",), "customer"),
+    (SellerCRUD, "get_by_name", ("inc",), "seller"),
+    (SellerCRUD, "get_by_rating", (4.5,), "seller"),
+    (ReviewCRUD, "get_by_product", (1,), "review"),
+    (ReviewCRUD, "get_by_customer", (1,), "review"),
+    (OrdersCRUD, "get_by_id", (1,), "order_items"),
+    (OrdersCRUD, "get_by_customer", (1,), "orders"),
+    (OrdersCRUD, "get_by_customer", (1,), "order_items"),
+    (OrdersCRUD, "get_by_date_range", (date.today(), date.today()), "orders"),
+    (OrderItemCRUD, "get_by_order", (1,), "order_items"),
+    (OrderItemCRUD, "get_one_from_order", (1, 1), "order_items"),
+    (PaymentMethodCRUD, "get_by_customer", (1,), "payment_method"),
+    (SearchHistoryCRUD, "get_by_customer", (1,), "search_history"),
+    (SearchHistoryCRUD, "get_by_date_range", (date.today(), date.today()), "search_history"),
+    (ReturnsCRUD, "get_by_status", ("Pendiente",), "returns"),
+    (ReturnsCRUD, "get_by_order_item", (1,), "returns"),
+    (CouponsCRUD, "get_by_code", ("1234567890123",), "coupons"),
+    (ShippingCRUD, "get_by_shipping_company", ("ACME",), "shipping"),
+    (ShippingCRUD, "get_by_shipping_date", (date.today(),), "shipping"),
+    (ShoppingCartCRUD, "get_by_customer_id", (1,), "shopping_cart"),
+    (ShoppingCartProductCRUD, "get_by_cart_id", (1,), "shopping_cart_product"),
+    (ShoppingCartCRUD, "get_view", (1,), "shopping_cart_product"),
+    (ShoppingCartCRUD, "get_view", (1,), "offer"),
+    (OfferCRUD, "get_by_product", (1,), "offer"),
+    (ProductRecommendationsCRUD, "get_by_customer", (1,), "product_recommendations"),
+    (ProductRecommendationsCRUD, "get_recommendations_for_product", (1,), "product_recommendations"),
+    (ProductRecommendationsCRUD, "get_similar_products", (1,), "product_similarities"),
+]
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+PARTITION_NAME = re.compile(r".+_(p[0-9]{6}|default)")
+
+class _ExplainCursor:
+    """Cursor stand-in that records the plan of each statement instead of running it."""
+
+    def __init__(self, cursor, plans: list):
+        self._cursor = cursor
+        self._plans = plans
+
+    def execute(self, query, values=None):
+        self._cursor.execute("EXPLAIN (FORMAT JSON) " + query, values)
+        self._plans.append(self._cursor.fetchone()[0][0]["Plan"])
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size=None):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+class _ExplainConnection:
+    """Connection stand-in whose cursors only EXPLAIN and whose commits roll back."""
+
+    def __init__(self, connection, plans: list):
+        self._connection = connection
+        self._plans = plans
+
+    def cursor(self, *args, **kwargs):
+        return _ExplainCursor(self._connection.cursor(), self._plans)
+
+    def commit(self):
+        self._connection.rollback()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    @property
+    def closed(self):
+        return self._connection.closed
+
+class _ExplainDatabaseConnection:
+    """Wraps a CRUD's PostgresDatabaseConnection so every query is explained."""
+
+    def __init__(self, db_connection, plans: list):
+        self._db_connection = db_connection
+        self._plans = plans
+        self.dialect = db_connection.dialect
+
+    @contextmanager
+    def acquire(self, read_only: bool = False):
+        # Always on the primary: the indexes are checked where the migrations ran.
+        with self._db_connection.acquire() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off;")
+            yield _ExplainConnection(connection, self._plans)
+            connection.rollback()
+
+def walk(plan: dict):
+    """Yields every node of an EXPLAIN plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+def describe(node: dict) -> str:
+    """Describes a scan node, including the indexes under a bitmap scan."""
+    indexes = sorted({child["Index Name"] for child in walk(node) if "Index Name" in child})
+    return node["Node Type"] + (f" using {', '.join(indexes)}" if indexes else "")
+
+def reads_table(node: dict, table: str) -> bool:
+    """Tells whether a plan node scans `table` or one of its monthly partitions (orders_p202401, orders_default)."""
+    name = node.get("Relation Name")
+    return name is not None and (name == table or PARTITION_NAME.fullmatch(name) is not None and name.rsplit("_", 1)[0] == table)
+
+def check(table: str, plans: list) -> tuple:
+    """Returns (passed, description) for the plans captured from one CRUD call."""
+    if not plans:
+        return False, "no query captured"
+    nodes = [node for plan in plans for node in walk(plan) if reads_table(node, table)]
+    scans = sorted({describe(node) for node in nodes})
+    if any(node["Node Type"] == "Seq Scan" for node in nodes):
+        return False, ", ".join(scans)
+    if not any(node["Node Type"] in INDEX_NODES for node in nodes):
+        return False, ", ".join(scans) or f"{table} not in plan"
+    return True, ", ".join(scans)
+
+def main() -> int:
+    instances = {}
+    failures = 0
+    for crud_class, method, args, table in CHECKS:
+        crud = instances.get(crud_class) or instances.setdefault(crud_class, crud_class())
+        plans = []
+        original = crud.db_connection
+        crud.db_connection = _ExplainDatabaseConnection(original, plans)
+        try:
+            getattr(crud, method)(*args)
+        finally:
+            crud.db_connection = original
+        passed, detail = check(table, plans)
+        failures += not passed
+        print(f"{'✅' if passed else '❌'} {crud_class.__name__}.{method}: {detail}")
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} queries use an index.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""Generates test data at a chosen scale, in parallel, through COPY.
+
+Row counts grow linearly with the scale factor (SF 1 is about 750k rows,
+SF 100 about 75M). Product popularity, customer activity and search terms
+follow Zipf distributions, orders have one to eight distinct products, and
+the columns the small generate_data_pg.py leaves empty (Review.product_id,
+Returns.order_item_id, recommendations) are filled in.
+
+Every table is split into chunks of --chunk-size rows. Each chunk draws
+from its own random generator, seeded from --seed, the table and the chunk
+number, and keys are assigned by the generator instead of by the
+sequences. The same seed, scale and --as-of date therefore produce the same
+rows whatever the number of workers. Workers stream each chunk to the
+server with COPY, one transaction per chunk, and tables are loaded in
+foreign-key order. Run it on an empty, migrated database (or pass
+--truncate):
+
+    python -m inicialization.generate_data_scaled --scale 10 --workers 8
+"""
+import argparse
+import io
+import random
+import time
+from array import array
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from math import exp, gcd, log, sqrt
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from connections import PostgresDatabaseConnection, close_pool
+
+# Rows per scale factor unit.
+BASE_ROWS = {
+    "customer": 10_000,
+    "seller": 500,
+    "coupons": 1_000,
+    "product": 20_000,
+    "offer": 500,
+    "orders": 100_000,
+    "review": 50_000,
+    "search_history": 200_000,
+    "shopping_cart": 5_000,
+}
+PAYMENT_METHODS_PER_CUSTOMER = 2
+MAX_ITEMS_PER_ORDER = 8  # order_item_id = orders_id * MAX_ITEMS_PER_ORDER + position
+RETURN_RATE = 0.03
+ORDER_HISTORY_DAYS = 730
+
+PRODUCT_SKEW = 1.0   # Zipf exponent of product popularity
+CUSTOMER_SKEW = 0.6  # Zipf exponent of customer activity
+TERM_SKEW = 1.1      # Zipf exponent of search terms
+
+# Loaded in this order; the tables of one phase only reference earlier phases.
+PHASES = [
+    ["category", "seller", "customer", "coupons"],
+    ["product", "payment_method"],
+    ["offer"],
+    ["orders", "review", "search_history", "shopping_cart"],
+]
+SEQUENCES = {
+    "category": "category_id", "seller": "seller_id", "customer": "customer_id",
+    "coupons": "coupons_id", "product": "product_id", "payment_method": "payment_method_id",
+    "offer": "offer_id", "shipping": "shipping_id", "orders": "orders_id",
+    "order_items": "order_item_id", "returns": "returns_id", "review": "review_id",
+    "search_history": "search_history_id", "shopping_cart": "shopping_cart_id",
+}
+ALL_TABLES = list(SEQUENCES) + ["shopping_cart_product", "product_recommendations"]
+
+ADJECTIVES = ("smart", "wireless", "compact", "portable", "ergonomic", "premium", "classic", "digital",
+              "organic", "durable", "ultra", "foldable", "waterproof", "vintage", "modern", "rechargeable")
+NOUNS = ("headphones", "keyboard", "lamp", "backpack", "blender", "camera", "chair", "watch", "speaker",
+         "kettle", "jacket", "monitor", "charger", "bottle", "tablet", "router", "mouse", "notebook",
+         "sneakers", "drill", "mug", "guitar", "printer", "pillow", "toaster", "vacuum", "tent", "scale")
+WORDS = ADJECTIVES + NOUNS + ("black", "white", "steel", "cotton", "kids", "outdoor", "kitchen", "office",
+                              "travel", "gaming", "fitness", "home", "garden", "bluetooth", "usb", "led",
+                              "pack", "set", "mini", "pro", "max", "eco", "deluxe", "cordless")
+FIRST_NAMES = ("Ana", "Luis", "Maria", "Carlos", "Sofia", "Jorge", "Lucia", "Pedro", "Elena", "Diego",
+               "Laura", "Pablo", "Marta", "Andres", "Paula", "Miguel", "Sara", "David", "Julia", "Raul")
+LAST_NAMES = ("Garcia", "Martinez", "Lopez", "Sanchez", "Perez", "Gomez", "Martin", "Jimenez", "Ruiz",
+              "Hernandez", "Diaz", "Moreno", "Alvarez", "Romero", "Torres", "Navarro", "Castro", "Vargas")
+STREETS = ("Calle Mayor", "Avenida Central", "Calle del Sol", "Paseo del Prado", "Calle Luna", "Gran Via")
+SHIPPING_COMPANIES = ("DHL", "FedEx", "UPS", "Correos", "SEUR", "MRW", "GLS")
+ORDER_STATUSES = ("Pendiente", "En proceso", "Enviado", "Entregado")
+RETURN_STATUSES = ("Pendiente", "Aprobado", "Rechazado")
+RETURN_REASONS = ("Producto defectuoso", "No es lo que esperaba", "Talla incorrecta", "Llegó tarde", "Dañado en el envío")
+RATING_WEIGHTS = (5, 7, 13, 30, 45)  # 1 to 5 stars
+
+def row_counts(scale: float) -> Dict[str, int]:
+    """Returns the number of rows of each generated table at a scale factor."""
+    counts = {table: max(1, int(rows * scale)) for table, rows in BASE_ROWS.items()}
+    counts["category"] = max(10, int(50 * sqrt(scale)))
+    counts["payment_method"] = counts["customer"] * PAYMENT_METHODS_PER_CUSTOMER
+    return counts
+
+def _unit(seed: int, key: int, salt: int) -> float:
+    """Deterministic uniform value in [0, 1) for a key, without a random generator per row."""
+    value = (seed * 0x9E3779B97F4A7C15 + key * 0xBF58476D1CE4E5B9 + salt * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 31)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return (value ^ (value >> 33)) / 2 ** 64
+
+def product_price(seed: int, product_id: int) -> float:
+    """Log-uniform price between 5 and 2000, shared by the product rows and the order lines."""
+    return round(exp(log(5) + _unit(seed, product_id, 1) * (log(2000) - log(5))), 2)
+
+def coupon_discount(seed: int, coupon_id: int) -> int:
+    return 5 + int(_unit(seed, coupon_id, 2) * 46)
+
+def offer_discount(seed: int, offer_id: int) -> float:
+    return round(5 + _unit(seed, offer_id, 3) * 45, 2)
+
+class ZipfSampler:
+    """Draws ids 1..n with P(rank k) proportional to 1 / k**skew.
+
+    Ranks are mapped to ids by a fixed permutation, so the most popular
+    products are spread over the id range instead of being the lowest ids.
+    """
+
+    def __init__(self, n: int, skew: float):
+        self.n = n
+        self._cumulative = array("d", accumulate(1.0 / rank ** skew for rank in range(1, n + 1)))
+        self._total = self._cumulative[-1]
+        stride = 2654435761 % n or 1
+        while gcd(stride, n) != 1:
+            stride += 1
+        self._stride = stride
+
+    def sample(self, rng: random.Random) -> int:
+        rank = min(bisect(self._cumulative, rng.random() * self._total), self.n - 1)
+        return rank * self._stride % self.n + 1
+
+    def sample_distinct(self, rng: random.Random, k: int) -> List[int]:
+        """Draws up to k distinct ids (fewer only if k is close to n)."""
+        chosen = []
+        for _ in range(k * 4):
+            value = self.sample(rng)
+            if value not in chosen:
+                chosen.append(value)
+                if len(chosen) == k:
+                    break
+        return chosen
+
+# Worker state, set by _init_worker in every process.
+_config = {}
+
+def _init_worker(config: dict):
+    _config.update(config)
+
+@lru_cache(maxsize=None)
+def _sampler(table: str, skew: float) -> ZipfSampler:
+    return ZipfSampler(_config["counts"][table], skew)
+
+def _copy_value(value) -> str:
+    """Formats a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+class _CopyStream(io.RawIOBase):
+    """File-like object that renders rows to COPY text as the server reads them."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = b""
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        lines = [self._buffer]
+        length = len(self._buffer)
+        for row in self._rows:
+            line = ("\t".join(_copy_value(value) for value in row) + "\n").encode("utf-8")
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+            if 0 <= size <= length:
+                break
+        data = b"".join(lines)
+        if size < 0:
+            self._buffer = b""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+def _copy(cursor, table: str, columns: Tuple[str, ...], rows: Iterable[tuple]) -> int:
+    """Streams rows into a table with COPY and returns how many were sent."""
+    stream = _CopyStream(rows)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 16)
+    return stream.count
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _day(rng: random.Random, days_back: int) -> date:
+    return _config["as_of"] - timedelta(days=rng.randrange(days_back))
+
+def _category_rows(rng, start, stop):
+    for category_id in range(start, stop):
+        yield category_id, f"{rng.choice(NOUNS).capitalize()} {category_id}", _words(rng, 12)
+
+def _seller_rows(rng, start, stop):
+    for seller_id in range(start, stop):
+        yield (seller_id, f"{rng.choice(LAST_NAMES)} {rng.choice(NOUNS).capitalize()} {seller_id}",
+               rng.choice(("Mayorista", "Minorista", "Online")), round(rng.triangular(1, 5, 4.3), 2))
+
+def _customer_rows(rng, start, stop):
+    for customer_id in range(start, stop):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield (customer_id, f"{first} {last}", f"{first.lower()}.{last.lower()}{customer_id}@example.com",
+               f"{rng.choice(STREETS)} {rng.randint(1, 200)}, {rng.randint(10000, 52999)}",
+               f"+34 6{rng.randint(10000000, 99999999)}", _day(rng, 3 * 365))
+
+def _coupons_rows(rng, start, stop):
+    seed = _config["seed"]
+    for coupon_id in range(start, stop):
+        yield (coupon_id, f"{rng.randrange(10 ** 12, 10 ** 13)}", coupon_discount(seed, coupon_id),
+               _config["as_of"] + timedelta(days=rng.randint(-180, 365)))
+
+def _product_rows(rng, start, stop):
+    counts, seed = _config["counts"], _config["seed"]
+    for product_id in range(start, stop):
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+        yield (product_id, f"{adjective.capitalize()} {noun} {product_id}", f"{adjective} {noun} {_words(rng, 20)}",
+               product_price(seed, product_id), rng.randint(0, 500),
+               rng.randint(1, counts["category"]), rng.randint(1, counts["seller"]))
+
+def _payment_method_rows(rng, start, stop):
+    for payment_method_id in range(start, stop):
+        customer_id = (payment_method_id - 1) // PAYMENT_METHODS_PER_CUSTOMER + 1
+        yield payment_method_id, rng.choice(("Tarjeta de crédito", "PayPal", "Transferencia bancaria")), customer_id
+
+def _offer_rows(rng, start, stop):
+    seed, products = _config["seed"], _sampler("product", PRODUCT_SKEW)
+    for offer_id in range(start, stop):
+        start_date = _config["as_of"] + timedelta(days=rng.randint(-60, 30))
+        yield (offer_id, offer_discount(seed, offer_id), start_date,
+               start_date + timedelta(days=rng.randint(7, 90)), products.sample(rng))
+
+def _load_orders(cursor, rng, start, stop) -> Dict[str, int]:
+    """Generates a chunk of orders with their shipments, items and returns."""
+    counts, seed, as_of = _config["counts"], _config["seed"], _config["as_of"]
+    products, customers = _sampler("product", PRODUCT_SKEW), _sampler("customer", CUSTOMER_SKEW)
+    history_start = datetime.combine(as_of, datetime.min.time()) - timedelta(days=ORDER_HISTORY_DAYS)
+    orders, shipments, items, returns = [], [], [], []
+    for orders_id in range(start, stop):
+        # Ids grow with time, so the newest orders are the highest ids.
+        created_at = history_start + timedelta(days=ORDER_HISTORY_DAYS * (orders_id - rng.random()) / counts["orders"])
+        age = (as_of - created_at.date()).days
+        status = ORDER_STATUSES[3] if age > 14 else ORDER_STATUSES[min(3, age // 4)]
+        shipping_date = created_at.date() + timedelta(days=rng.randint(0, 3))
+        shipments.append((orders_id, rng.choice(SHIPPING_COMPANIES), shipping_date,
+                          shipping_date + timedelta(days=rng.randint(2, 10)), round(rng.uniform(0, 25), 2)))
+        total = 0.0
+        item_count = min(1 + int(rng.expovariate(0.6)), MAX_ITEMS_PER_ORDER)
+        for position, product_id in enumerate(products.sample_distinct(rng, item_count)):
+            order_item_id = orders_id * MAX_ITEMS_PER_ORDER + position
+            quantity = 1 + int(rng.expovariate(0.9))
+            price = product_price(seed, product_id)
+            coupon_id = rng.randint(1, counts["coupons"]) if rng.random() < 0.05 else None
+            offer_id = rng.randint(1, counts["offer"]) if rng.random() < 0.10 else None
+            discount = (coupon_discount(seed, coupon_id) if coupon_id else 0) + (offer_discount(seed, offer_id) if offer_id else 0)
+            total += max(price * quantity - discount, 0)  # A line never goes below zero, as in checkout
+            items.append((order_item_id, orders_id, product_id, quantity, price, coupon_id, offer_id, created_at))
+            if status == "Entregado" and rng.random() < RETURN_RATE:
+                returns.append((order_item_id, shipping_date + timedelta(days=rng.randint(3, 30)),
+                                rng.choice(RETURN_REASONS), rng.choice(RETURN_STATUSES), order_item_id))
+        customer_id = customers.sample(rng)
+        payment_method_id = (customer_id - 1) * PAYMENT_METHODS_PER_CUSTOMER + rng.randint(1, PAYMENT_METHODS_PER_CUSTOMER)
+        orders.append((orders_id, round(total, 2), status, customer_id, payment_method_id, orders_id, created_at))
+    return {
+        "shipping": _copy(cursor, "shipping", ("shipping_id", "shipping_company", "shipping_date", "estimated_delivery", "shipping_cost"), shipments),
+        "orders": _copy(cursor, "orders", ("orders_id", "total_amount", "order_status", "customer_id", "payment_method_id", "shipping_id", "created_at"), orders),
+        "order_items": _copy(cursor, "order_items", ("order_item_id", "orders_id", "product_id", "quantity", "price_at_purchase", "coupon_id", "offer_id", "created_at"), items),
+        "returns": _copy(cursor, "returns", ("returns_id", "return_date", "return_reason", "return_status", "order_item_id"), returns),
+    }
+
+def _review_rows(rng, start, stop):
+    products, customers = _sampler("product", PRODUCT_SKEW), _sampler("customer", CUSTOMER_SKEW)
+    for review_id in range(start, stop):
+        rating = rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0]
+        review_date = _day(rng, ORDER_HISTORY_DAYS)
+        yield review_id, rating, _words(rng, rng.randint(3, 25)), review_date, customers.sample(rng), products.sample(rng), review_date
+
+def _search_history_rows(rng, start, stop):
+    customers, terms = _sampler("customer", CUSTOMER_SKEW), ZipfSampler(len(WORDS), TERM_SKEW)
+    for search_history_id in range(start, stop):
+        term = " ".join(WORDS[terms.sample(rng) - 1] for _ in range(rng.randint(1, 3)))
+        search_date = _day(rng, 365)
+        yield search_history_id, term, search_date, customers.sample(rng), search_date
+
+def _load_shopping_carts(cursor, rng, start, stop) -> Dict[str, int]:
+    """Generates a chunk of carts and their products."""
+    counts, products = _config["counts"], _sampler("product", PRODUCT_SKEW)
+    carts = [(cart_id, rng.randint(1, counts["customer"])) for cart_id in range(start, stop)]
+    lines = [(cart_id, product_id, rng.randint(1, 3))
+             for cart_id, _ in carts for product_id in products.sample_distinct(rng, rng.randint(1, 5))]
+    return {
+        "shopping_cart": _copy(cursor, "shopping_cart", ("shopping_cart_id", "customer_id"), carts),
+        "shopping_cart_product": _copy(cursor, "shopping_cart_product", ("cart_id", "product_id", "quantity"), lines),
+    }
+
+# table -> (columns, row generator) for the tables loaded by a single COPY.
+SIMPLE_TABLES = {
+    "category": (("category_id", "category_name", "description"), _category_rows),
+    "seller": (("seller_id", "seller_name", "seller_type", "seller_rating"), _seller_rows),
+    "customer": (("customer_id", "full_name", "email", "shipping_address", "phone", "registration_date"), _customer_rows),
+    "coupons": (("coupons_id", "discount_code", "discount_value", "expiration_date"), _coupons_rows),
+    "product": (("product_id", "product_name", "description", "price", "quantity_available", "category_id", "seller_id"), _product_rows),
+    "payment_method": (("payment_method_id", "payment_type", "customer_id"), _payment_method_rows),
+    "offer": (("offer_id", "discount", "start_date", "end_date", "product_id"), _offer_rows),
+    "review": (("review_id", "rating", "comment", "review_date", "customer_id", "product_id", "created_at"), _review_rows),
+    "search_history": (("search_history_id", "search_term", "search_date", "customer_id", "created_at"), _search_history_rows),
+}
+COMPOSITE_TABLES = {"orders": _load_orders, "shopping_cart": _load_shopping_carts}
+
+def _run_chunk(task: Tuple[str, int, int, int]) -> Dict[str, int]:
+    """Generates and loads one chunk of a table in its own transaction."""
+    table, chunk, start, stop = task
+    rng = random.Random(f"{_config['seed']}:{table}:{chunk}")
+    with PostgresDatabaseConnection().acquire() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SET LOCAL synchronous_commit = off;")  # A lost chunk is regenerated by rerunning the load
+        if table in COMPOSITE_TABLES:
+            written = COMPOSITE_TABLES[table](cursor, rng, start, stop)
+        else:
+            columns, rows = SIMPLE_TABLES[table]
+            written = {table: _copy(cursor, table, columns, rows(rng, start, stop))}
+        connection.commit()
+        cursor.close()
+    return written
+
+def chunks(table: str, rows: int, chunk_size: int) -> Iterator[Tuple[str, int, int, int]]:
+    """Splits ids 1..rows of a table into (table, chunk, start, stop) tasks."""
+    for chunk, start in enumerate(range(1, rows + 1, chunk_size)):
+        yield table, chunk, start, min(start + chunk_size, rows + 1)
+
+def prepare_database(db_connection: PostgresDatabaseConnection, truncate: bool, as_of: date):
+    """Empties the tables when asked to, refuses to load into tables that already have rows and
+    creates the monthly partitions of the whole history, so no row lands in a default partition."""
+    with db_connection.acquire() as connection:
+        cursor = connection.cursor()
+        if truncate:
+            cursor.execute(f"TRUNCATE {', '.join(ALL_TABLES)} RESTART IDENTITY CASCADE;")
+            cursor.execute("TRUNCATE recommendation_runs, recommendation_queue, order_totals;")
+        for table in ALL_TABLES:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table});")
+            if cursor.fetchone()[0]:
+                raise SystemExit(f"Table {table} is not empty; rerun with --truncate to replace its rows.")
+        cursor.execute("SELECT ensure_monthly_partitions(%s);", (as_of - timedelta(days=ORDER_HISTORY_DAYS),))
+        connection.commit()
+        cursor.close()
+
+def finish_database(db_connection: PostgresDatabaseConnection):
+    """Moves every sequence past the generated keys and refreshes the planner statistics."""
+    with db_connection.acquire() as connection:
+        cursor = connection.cursor()
+        for table, column in SEQUENCES.items():
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), COALESCE(MAX({column}), 0) + 1, false) FROM {table};")
+        connection.commit()
+        connection.autocommit = True
+        cursor.execute("ANALYZE;")
+        connection.autocommit = False
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale factor; SF 1 is about 750k rows")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="Date the history ends at (YYYY-MM-DD)")
+    parser.add_argument("--truncate", action="store_true", help="Delete the existing rows first")
+    parser.add_argument("--skip-recommendations", action="store_true", help="Do not run the recommendation engine afterwards")
+    args = parser.parse_args()
+
+    counts = row_counts(args.scale)
+    db = PostgresDatabaseConnection()
+    prepare_database(db, args.truncate, args.as_of)
+    close_pool()  # Forked workers must open their own connections
+    config = {"counts": counts, "seed": args.seed, "as_of": args.as_of}
+    totals, started = {}, time.perf_counter()
+    with Pool(args.workers, initializer=_init_worker, initargs=(config,)) as pool:
+        for phase in PHASES:
+            phase_started = time.perf_counter()
+            tasks = [task for table in phase for task in chunks(table, counts[table], args.chunk_size)]
+            for written in pool.imap_unordered(_run_chunk, tasks):
+                for table, rows in written.items():
+                    totals[table] = totals.get(table, 0) + rows
+            print(f"✅ Loaded {', '.join(phase)} in {time.perf_counter() - phase_started:.1f}s")
+    finish_database(db)
+
+    if not args.skip_recommendations:
+        from crud.recommendation_engine import RecommendationEngine
+        print(RecommendationEngine(db).run(full=True))
+    elapsed = time.perf_counter() - started
+    total_rows = sum(totals.values())
+    for table, rows in sorted(totals.items()):
+        print(f"{table:>24}: {rows:>12,}")
+    print(f"{total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Applies the versioned SQL files in inicialization/migrations/ in order.
+
+Each file runs once, inside its own transaction, and is recorded in the
+schema_migrations table. Run it after postgres_init.sql:
+
+    python -m inicialization.migrate
+"""
+from pathlib import Path
+
+from connections import PostgresDatabaseConnection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+def pending_migrations(applied: set) -> list:
+    """Returns the migration files that have not been applied yet, in version order."""
+    return [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if path.stem not in applied]
+
+def migrate(db_connection: PostgresDatabaseConnection) -> list:
+    """Applies every pending migration.
+
+    Args:
+        db_connection (PostgresDatabaseConnection): The database to migrate.
+
+    Returns:
+        list: The versions applied by this run.
+    """
+    applied_now = []
+    with db_connection.acquire() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(255) PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            );
+        """)
+        connection.commit()
+        cursor.execute("SELECT version FROM schema_migrations;")
+        applied = {row[0] for row in cursor.fetchall()}
+        for path in pending_migrations(applied):
+            cursor.execute(path.read_text(encoding="utf-8"))
+            cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s);", (path.stem,))
+            connection.commit()
+            applied_now.append(path.stem)
+            print(f"✅ Applied migration {path.stem}")
+        cursor.close()
+    return applied_now
+
+if __name__ == "__main__":
+    db = PostgresDatabaseConnection()
+    db.connect()
+    if not migrate(db):
+        print("Database is up to date.")
+    db.close()
\ No newline at end of file
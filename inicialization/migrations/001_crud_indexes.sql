@@ -0,0 +1,40 @@
+-- Índices para los filtros, joins y ordenamientos usados en crud/*.py
+
+-- Review: get_by_product, get_by_customer, delete_by_product, delete_by_customer
+CREATE INDEX IF NOT EXISTS idx_review_product_id ON Review (product_id);
+CREATE INDEX IF NOT EXISTS idx_review_customer_id ON Review (customer_id);
+
+-- Order_Items: get_by_order, get_one_from_order y el join de OrdersCRUD.get_by_id
+CREATE INDEX IF NOT EXISTS idx_order_items_orders_id_product_id ON Order_Items (orders_id, product_id);
+
+-- Product: get_by_category, get_cheaper, get_expensive, get_by_price_ascendent/descendent
+CREATE INDEX IF NOT EXISTS idx_product_category_id ON Product (category_id);
+CREATE INDEX IF NOT EXISTS idx_product_price ON Product (price);
+
+-- Payment_Method, Search_History, Shopping_Cart, Product_Recommendations: búsquedas por cliente
+CREATE INDEX IF NOT EXISTS idx_payment_method_customer_id ON Payment_Method (customer_id);
+CREATE INDEX IF NOT EXISTS idx_search_history_customer_id ON Search_History (customer_id);
+CREATE INDEX IF NOT EXISTS idx_shopping_cart_customer_id ON Shopping_Cart (customer_id);
+CREATE INDEX IF NOT EXISTS idx_product_recommendations_customer_id ON Product_Recommendations (customer_id);
+CREATE INDEX IF NOT EXISTS idx_product_recommendations_product_id ON Product_Recommendations (recommended_product_id);
+
+-- Returns: get_by_status, delete_by_status, get_by_order_item
+CREATE INDEX IF NOT EXISTS idx_returns_return_status ON Returns (return_status);
+CREATE INDEX IF NOT EXISTS idx_returns_order_item_id ON Returns (order_item_id);
+
+-- Coupons: get_by_code
+CREATE INDEX IF NOT EXISTS idx_coupons_discount_code ON Coupons (discount_code);
+
+-- Shipping: get_by_shipping_company, get_by_shipping_date
+CREATE INDEX IF NOT EXISTS idx_shipping_company ON Shipping (shipping_company);
+CREATE INDEX IF NOT EXISTS idx_shipping_date ON Shipping (shipping_date);
+
+-- Seller: get_by_rating
+CREATE INDEX IF NOT EXISTS idx_seller_rating ON Seller (seller_rating);
+
+-- Búsquedas LOWER(x) LIKE LOWER('%...%') en get_by_name: índices de trigramas sobre la misma expresión
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_product_name_trgm ON Product USING GIN (LOWER(product_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_customer_full_name_trgm ON Customer USING GIN (LOWER(full_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_seller_name_trgm ON Seller USING GIN (LOWER(seller_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_category_name_trgm ON Category USING GIN (LOWER(category_name) gin_trgm_ops);
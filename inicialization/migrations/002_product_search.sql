@@ -0,0 +1,9 @@
+-- Búsqueda de texto completo sobre nombre y descripción de productos.
+-- La columna generada se mantiene sola en cada INSERT/UPDATE de Product.
+ALTER TABLE Product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(product_name, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_product_search_vector ON Product USING GIN (search_vector);
@@ -0,0 +1,84 @@
+-- Resumen materializado del total de cada pedido, mantenido por triggers.
+-- El total de una línea es price_at_purchase * quantity menos los descuentos
+-- del cupón y la oferta, igual que en OrdersCRUD.get_by_id.
+CREATE TABLE IF NOT EXISTS order_totals (
+    orders_id INT PRIMARY KEY REFERENCES Orders(orders_id) ON DELETE CASCADE,
+    item_count INT NOT NULL,
+    calculated_total DECIMAL(12, 2) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Recalcula los pedidos indicados. También sirve para un refresco manual:
+--   SELECT refresh_order_totals(ARRAY(SELECT orders_id FROM Orders));
+CREATE OR REPLACE FUNCTION refresh_order_totals(order_ids INT[]) RETURNS void AS $$
+    INSERT INTO order_totals (orders_id, item_count, calculated_total, updated_at)
+    SELECT
+        o.orders_id,
+        COUNT(oi.product_id),
+        COALESCE(SUM(oi.price_at_purchase * oi.quantity - COALESCE(c.discount_value, 0) - COALESCE(ofr.discount, 0))
+                 FILTER (WHERE oi.product_id IS NOT NULL), 0),
+        NOW()
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON oi.orders_id = o.orders_id
+    LEFT JOIN Coupons c ON c.coupons_id = oi.coupon_id
+    LEFT JOIN Offer ofr ON ofr.offer_id = oi.offer_id
+    WHERE o.orders_id = ANY(order_ids)
+    GROUP BY o.orders_id
+    ON CONFLICT (orders_id) DO UPDATE
+    SET item_count = EXCLUDED.item_count,
+        calculated_total = EXCLUDED.calculated_total,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+
+-- Triggers por sentencia con tablas de transición: una carga masiva de
+-- Order_Items recalcula cada pedido afectado una sola vez.
+CREATE OR REPLACE FUNCTION order_items_refresh_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM refresh_order_totals(ARRAY(SELECT DISTINCT orders_id FROM new_rows WHERE orders_id IS NOT NULL));
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM refresh_order_totals(ARRAY(SELECT DISTINCT orders_id FROM old_rows WHERE orders_id IS NOT NULL));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS order_items_totals_insert ON Order_Items;
+CREATE TRIGGER order_items_totals_insert AFTER INSERT ON Order_Items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+
+DROP TRIGGER IF EXISTS order_items_totals_update ON Order_Items;
+CREATE TRIGGER order_items_totals_update AFTER UPDATE ON Order_Items
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+
+DROP TRIGGER IF EXISTS order_items_totals_delete ON Order_Items;
+CREATE TRIGGER order_items_totals_delete AFTER DELETE ON Order_Items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+
+-- Si cambia el descuento de un cupón o una oferta, cambian los pedidos que lo usan.
+CREATE OR REPLACE FUNCTION discount_refresh_totals() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'coupons' THEN
+        PERFORM refresh_order_totals(ARRAY(SELECT DISTINCT orders_id FROM Order_Items WHERE coupon_id = NEW.coupons_id));
+    ELSE
+        PERFORM refresh_order_totals(ARRAY(SELECT DISTINCT orders_id FROM Order_Items WHERE offer_id = NEW.offer_id));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS coupons_totals_update ON Coupons;
+CREATE TRIGGER coupons_totals_update AFTER UPDATE OF discount_value ON Coupons
+    FOR EACH ROW WHEN (OLD.discount_value IS DISTINCT FROM NEW.discount_value)
+    EXECUTE FUNCTION discount_refresh_totals();
+
+DROP TRIGGER IF EXISTS offer_totals_update ON Offer;
+CREATE TRIGGER offer_totals_update AFTER UPDATE OF discount ON Offer
+    FOR EACH ROW WHEN (OLD.discount IS DISTINCT FROM NEW.discount)
+    EXECUTE FUNCTION discount_refresh_totals();
+
+SELECT refresh_order_totals(ARRAY(SELECT orders_id FROM Orders));
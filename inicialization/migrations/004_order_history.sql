@@ -0,0 +1,12 @@
+-- Fecha de creación de los pedidos, para filtrar el historial por fecha.
+-- Los pedidos existentes toman la fecha de envío cuando la tienen.
+ALTER TABLE Orders ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT NOW();
+
+UPDATE Orders o
+SET created_at = s.shipping_date
+FROM Shipping s
+WHERE s.shipping_id = o.shipping_id AND s.shipping_date IS NOT NULL;
+
+-- Historial de pedidos de un cliente (CustomerCRUD /customer/{id}/orders), del más reciente al más antiguo.
+-- Los ítems de cada pedido usan idx_order_items_orders_id_product_id (migración 001).
+CREATE INDEX IF NOT EXISTS idx_orders_customer_id_orders_id ON Orders (customer_id, orders_id);
@@ -0,0 +1,96 @@
+-- Resumen de valoraciones por producto: número de reseñas, suma y
+-- histograma de 1 a 5 estrellas. Lo mantienen los triggers de Review, así
+-- que cubre create, update, delete, delete_by_product, delete_by_customer y
+-- las cargas masivas sin volver a leer las reseñas.
+CREATE TABLE IF NOT EXISTS product_rating_stats (
+    product_id INT PRIMARY KEY REFERENCES Product(product_id) ON DELETE CASCADE,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0
+);
+
+-- Aplica a las estadísticas la diferencia de las filas borradas (old_rows) y
+-- añadidas (new_rows) por una sentencia, agrupada por producto.
+CREATE OR REPLACE FUNCTION review_rating_stats() RETURNS trigger AS $$
+DECLARE
+    added Review[] := '{}';
+    removed Review[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        added := ARRAY(SELECT r FROM new_rows r);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        removed := ARRAY(SELECT r FROM old_rows r);
+    END IF;
+    INSERT INTO product_rating_stats AS s
+        (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+    SELECT
+        product_id,
+        SUM(sign),
+        SUM(sign * rating),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 1), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 2), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 3), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 4), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 5), 0)
+    FROM (
+        SELECT product_id, rating, 1 AS sign FROM unnest(added)
+        UNION ALL
+        SELECT product_id, rating, -1 AS sign FROM unnest(removed)
+    ) AS changes
+    WHERE product_id IS NOT NULL
+    GROUP BY product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET review_count = s.review_count + EXCLUDED.review_count,
+        rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+        rating_1 = s.rating_1 + EXCLUDED.rating_1,
+        rating_2 = s.rating_2 + EXCLUDED.rating_2,
+        rating_3 = s.rating_3 + EXCLUDED.rating_3,
+        rating_4 = s.rating_4 + EXCLUDED.rating_4,
+        rating_5 = s.rating_5 + EXCLUDED.rating_5;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS review_rating_stats_insert ON Review;
+CREATE TRIGGER review_rating_stats_insert AFTER INSERT ON Review
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION review_rating_stats();
+
+DROP TRIGGER IF EXISTS review_rating_stats_update ON Review;
+CREATE TRIGGER review_rating_stats_update AFTER UPDATE ON Review
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION review_rating_stats();
+
+DROP TRIGGER IF EXISTS review_rating_stats_delete ON Review;
+CREATE TRIGGER review_rating_stats_delete AFTER DELETE ON Review
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION review_rating_stats();
+
+-- Carga inicial (idempotente) a partir de las reseñas existentes.
+INSERT INTO product_rating_stats
+    (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+SELECT
+    product_id,
+    COUNT(*),
+    SUM(rating),
+    COUNT(*) FILTER (WHERE rating = 1),
+    COUNT(*) FILTER (WHERE rating = 2),
+    COUNT(*) FILTER (WHERE rating = 3),
+    COUNT(*) FILTER (WHERE rating = 4),
+    COUNT(*) FILTER (WHERE rating = 5)
+FROM Review
+WHERE product_id IS NOT NULL
+GROUP BY product_id
+ON CONFLICT (product_id) DO UPDATE
+SET review_count = EXCLUDED.review_count,
+    rating_sum = EXCLUDED.rating_sum,
+    rating_1 = EXCLUDED.rating_1,
+    rating_2 = EXCLUDED.rating_2,
+    rating_3 = EXCLUDED.rating_3,
+    rating_4 = EXCLUDED.rating_4,
+    rating_5 = EXCLUDED.rating_5;
@@ -0,0 +1,43 @@
+-- Matriz dispersa de co-compras producto x producto, en formato de coordenadas:
+-- una fila por par de productos comprados juntos en al menos un pedido, en
+-- ambos sentidos para que los vecinos de un producto sean un prefijo de la PK.
+-- La mantiene crud/recommendation_engine.py de forma incremental.
+CREATE TABLE IF NOT EXISTS product_co_purchases (
+    product_id INT NOT NULL REFERENCES Product(product_id) ON DELETE CASCADE,
+    other_product_id INT NOT NULL REFERENCES Product(product_id) ON DELETE CASCADE,
+    orders_count INT NOT NULL,
+    PRIMARY KEY (product_id, other_product_id)
+);
+
+-- Diagonal de la matriz: en cuántos pedidos aparece cada producto.
+CREATE TABLE IF NOT EXISTS product_purchase_counts (
+    product_id INT PRIMARY KEY REFERENCES Product(product_id) ON DELETE CASCADE,
+    orders_count INT NOT NULL
+);
+
+-- Los k productos más parecidos a cada producto (similitud coseno).
+CREATE TABLE IF NOT EXISTS product_similarities (
+    product_id INT NOT NULL REFERENCES Product(product_id) ON DELETE CASCADE,
+    similar_product_id INT NOT NULL REFERENCES Product(product_id) ON DELETE CASCADE,
+    score REAL NOT NULL,
+    PRIMARY KEY (product_id, similar_product_id)
+);
+
+-- Una fila por ejecución; last_order_item_id marca hasta dónde se ha procesado.
+CREATE TABLE IF NOT EXISTS recommendation_runs (
+    run_id SERIAL PRIMARY KEY,
+    last_order_item_id INT NOT NULL,
+    orders_folded INT NOT NULL,
+    products_updated INT NOT NULL,
+    customers_updated INT NOT NULL,
+    finished_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Las recomendaciones generadas llevan fecha y puntuación; las creadas a mano
+-- (recommendation_date nulo) no las toca el motor.
+ALTER TABLE Product_Recommendations ADD COLUMN IF NOT EXISTS score REAL;
+
+-- get_by_customer: una sola lectura del índice, ya en orden de puntuación.
+CREATE INDEX IF NOT EXISTS idx_product_recommendations_customer_score
+    ON Product_Recommendations (customer_id, score DESC NULLS LAST);
+DROP INDEX IF EXISTS idx_product_recommendations_customer_id;
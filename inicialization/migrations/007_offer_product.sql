@@ -0,0 +1,6 @@
+-- Una oferta puede aplicarse a un producto concreto. Las ofertas existentes
+-- (product_id nulo) siguen pudiéndose usar por su id en el checkout.
+ALTER TABLE Offer ADD COLUMN IF NOT EXISTS product_id INT REFERENCES Product(product_id) ON DELETE CASCADE;
+
+-- OfferCRUD.get_by_product y la vista del carrito (oferta activa de cada producto).
+CREATE INDEX IF NOT EXISTS idx_offer_product_id ON Offer (product_id, end_date);
@@ -0,0 +1,283 @@
+-- Particionado mensual por created_at de Orders, Order_Items y Search_History.
+-- Las consultas por rango de fechas solo leen los meses afectados, y la
+-- retención borra meses completos con DROP TABLE en lugar de DELETE.
+-- Cada tabla tiene una partición por defecto que recoge las filas de meses
+-- sin partición, así que una inserción nunca falla por falta de partición;
+-- ensure_monthly_partitions() crea los meses que falten y mueve allí esas filas.
+
+-- Review no se particiona, pero también guarda su fecha de creación.
+ALTER TABLE Review ADD COLUMN IF NOT EXISTS created_at TIMESTAMP;
+UPDATE Review SET created_at = review_date WHERE created_at IS NULL;
+ALTER TABLE Review ALTER COLUMN created_at SET DEFAULT NOW(), ALTER COLUMN created_at SET NOT NULL;
+
+-- Crea la partición {parent}_pAAAAMM del mes indicado si no existe. Si la
+-- partición por defecto ya tiene filas de ese mes, se mueven a la nueva.
+CREATE OR REPLACE FUNCTION create_month_partition(parent TEXT, target_month DATE) RETURNS BOOLEAN AS $$
+DECLARE
+    first_day TIMESTAMP := date_trunc('month', target_month);
+    next_first_day TIMESTAMP := date_trunc('month', target_month) + INTERVAL '1 month';
+    partition_name TEXT := format('%s_p%s', parent, to_char(target_month, 'YYYYMM'));
+    default_name TEXT := parent || '_default';
+    has_rows BOOLEAN;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE created_at >= %L AND created_at < %L)',
+                   default_name, first_day, next_first_day) INTO has_rows;
+    IF NOT has_rows THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, parent, first_day, next_first_day);
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', partition_name, parent);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                       default_name, first_day, next_first_day, partition_name);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, partition_name, first_day, next_first_day);
+    END IF;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crea las particiones de cada mes desde `since` (o el mes actual) hasta
+-- `months_ahead` meses después del actual, más las de los meses que tengan
+-- filas en la partición por defecto. Devuelve cuántas ha creado.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(since DATE DEFAULT NULL, months_ahead INT DEFAULT 3) RETURNS INT AS $$
+DECLARE
+    parent TEXT;
+    target_month DATE;
+    created INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('monthly_partitions'));
+    FOREACH parent IN ARRAY ARRAY['orders', 'order_items', 'search_history'] LOOP
+        FOR target_month IN EXECUTE format(
+            'SELECT date_trunc(''month'', created_at)::date FROM %I
+             UNION
+             SELECT generate_series(date_trunc(''month'', %L::date), date_trunc(''month'', CURRENT_DATE) + %s * INTERVAL ''1 month'', INTERVAL ''1 month'')::date
+             ORDER BY 1',
+            parent || '_default', COALESCE(since, CURRENT_DATE), months_ahead)
+        LOOP
+            IF create_month_partition(parent, target_month) THEN
+                created := created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Retención: borra las particiones de los meses que terminan antes de `cutoff`.
+-- Antes se borran las filas que dejarían referencias colgando: devoluciones y
+-- totales de esos pedidos, e ítems añadidos más tarde a esos pedidos.
+CREATE OR REPLACE FUNCTION drop_partitions_before(cutoff DATE) RETURNS INT AS $$
+DECLARE
+    part RECORD;
+    dropped INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('monthly_partitions'));
+    FOR part IN
+        SELECT c.relname AS partition_name, p.relname AS parent
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname IN ('orders', 'order_items', 'search_history')
+          AND c.relname ~ '_p[0-9]{6}$'
+          AND to_date(right(c.relname, 6), 'YYYYMM') + INTERVAL '1 month' <= cutoff
+        ORDER BY CASE p.relname WHEN 'order_items' THEN 1 WHEN 'orders' THEN 2 ELSE 3 END, c.relname
+    LOOP
+        IF part.parent = 'order_items' THEN
+            EXECUTE format('DELETE FROM Returns r USING %I oi WHERE r.order_item_id = oi.order_item_id', part.partition_name);
+        ELSIF part.parent = 'orders' THEN
+            EXECUTE format('DELETE FROM Returns r USING Order_Items oi, %I o WHERE r.order_item_id = oi.order_item_id AND oi.orders_id = o.orders_id', part.partition_name);
+            EXECUTE format('DELETE FROM Order_Items oi USING %I o WHERE oi.orders_id = o.orders_id', part.partition_name);
+            EXECUTE format('DELETE FROM order_totals t USING %I o WHERE t.orders_id = o.orders_id', part.partition_name);
+        END IF;
+        EXECUTE format('DROP TABLE %I', part.partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- La clave primaria de una tabla particionada debe incluir la columna de
+-- partición, así que Orders y Order_Items ya no pueden ser el destino de una
+-- clave foránea. Estas funciones hacen las mismas comprobaciones con
+-- triggers por sentencia: bloquean las filas padre con FOR KEY SHARE, igual
+-- que una clave foránea, para que un borrado concurrente no deje huérfanos.
+CREATE OR REPLACE FUNCTION order_items_check_orders() RETURNS trigger AS $$
+DECLARE
+    missing INT;
+BEGIN
+    PERFORM 1 FROM Orders WHERE orders_id IN (SELECT orders_id FROM new_rows) FOR KEY SHARE;
+    SELECT n.orders_id INTO missing
+    FROM new_rows n
+    WHERE n.orders_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Orders o WHERE o.orders_id = n.orders_id)
+    LIMIT 1;
+    IF missing IS NOT NULL THEN
+        RAISE EXCEPTION 'insert or update on table "order_items" violates foreign key constraint "order_items_orders_id_fkey"'
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key (orders_id)=(%s) is not present in table "orders".', missing);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION returns_check_order_items() RETURNS trigger AS $$
+DECLARE
+    missing INT;
+BEGIN
+    PERFORM 1 FROM Order_Items WHERE order_item_id IN (SELECT order_item_id FROM new_rows) FOR KEY SHARE;
+    SELECT n.order_item_id INTO missing
+    FROM new_rows n
+    WHERE n.order_item_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM Order_Items oi WHERE oi.order_item_id = n.order_item_id)
+    LIMIT 1;
+    IF missing IS NOT NULL THEN
+        RAISE EXCEPTION 'insert or update on table "returns" violates foreign key constraint "returns_order_item_id_fkey"'
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key (order_item_id)=(%s) is not present in table "order_items".', missing);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Borrar un pedido con ítems falla, como con la clave foránea original, y
+-- sus totales se borran con él (antes ON DELETE CASCADE).
+CREATE OR REPLACE FUNCTION orders_delete_dependents() RETURNS trigger AS $$
+DECLARE
+    referenced INT;
+BEGIN
+    SELECT oi.orders_id INTO referenced
+    FROM Order_Items oi
+    WHERE oi.orders_id IN (SELECT orders_id FROM old_rows)
+    LIMIT 1;
+    IF referenced IS NOT NULL THEN
+        RAISE EXCEPTION 'update or delete on table "orders" violates foreign key constraint "order_items_orders_id_fkey" on table "order_items"'
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key (orders_id)=(%s) is still referenced from table "order_items".', referenced);
+    END IF;
+    DELETE FROM order_totals WHERE orders_id IN (SELECT orders_id FROM old_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION order_items_restrict_returns() RETURNS trigger AS $$
+DECLARE
+    referenced INT;
+BEGIN
+    SELECT r.order_item_id INTO referenced
+    FROM Returns r
+    WHERE r.order_item_id IN (SELECT order_item_id FROM old_rows)
+    LIMIT 1;
+    IF referenced IS NOT NULL THEN
+        RAISE EXCEPTION 'update or delete on table "order_items" violates foreign key constraint "returns_order_item_id_fkey" on table "returns"'
+            USING ERRCODE = 'foreign_key_violation',
+                  DETAIL = format('Key (order_item_id)=(%s) is still referenced from table "returns".', referenced);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Conversión: las tablas actuales se renombran, se crean las particionadas
+-- con las mismas columnas (y los mismos valores por defecto y secuencias),
+-- se copian las filas y se borran las antiguas.
+ALTER TABLE Returns DROP CONSTRAINT IF EXISTS returns_order_item_id_fkey;
+ALTER TABLE order_totals DROP CONSTRAINT IF EXISTS order_totals_orders_id_fkey;
+ALTER TABLE Order_Items DROP CONSTRAINT IF EXISTS order_items_orders_id_fkey;
+
+ALTER TABLE Orders RENAME TO orders_unpartitioned;
+ALTER TABLE Order_Items RENAME TO order_items_unpartitioned;
+ALTER TABLE Search_History RENAME TO search_history_unpartitioned;
+
+CREATE TABLE Orders (LIKE orders_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at);
+CREATE TABLE orders_default PARTITION OF Orders DEFAULT;
+
+-- Los ítems toman la fecha de su pedido, para caer en el mismo mes.
+CREATE TABLE Order_Items (
+    LIKE order_items_unpartitioned INCLUDING DEFAULTS,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (created_at);
+CREATE TABLE order_items_default PARTITION OF Order_Items DEFAULT;
+
+CREATE TABLE Search_History (
+    LIKE search_history_unpartitioned INCLUDING DEFAULTS,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+) PARTITION BY RANGE (created_at);
+CREATE TABLE search_history_default PARTITION OF Search_History DEFAULT;
+
+-- Un mes por partición desde el dato más antiguo hasta tres meses vista.
+SELECT ensure_monthly_partitions(LEAST(
+    (SELECT MIN(created_at) FROM orders_unpartitioned)::date,
+    (SELECT MIN(search_date) FROM search_history_unpartitioned)
+));
+
+INSERT INTO Orders SELECT * FROM orders_unpartitioned;
+INSERT INTO Order_Items
+SELECT oi.*, COALESCE(o.created_at, NOW())
+FROM order_items_unpartitioned oi
+LEFT JOIN orders_unpartitioned o ON o.orders_id = oi.orders_id;
+INSERT INTO Search_History SELECT s.*, s.search_date FROM search_history_unpartitioned s;
+
+DO $$
+BEGIN
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY Orders.orders_id', pg_get_serial_sequence('orders_unpartitioned', 'orders_id'));
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY Order_Items.order_item_id', pg_get_serial_sequence('order_items_unpartitioned', 'order_item_id'));
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY Search_History.search_history_id', pg_get_serial_sequence('search_history_unpartitioned', 'search_history_id'));
+END;
+$$;
+
+DROP TABLE orders_unpartitioned, order_items_unpartitioned, search_history_unpartitioned;
+
+-- Claves e índices, creados después de la copia. Las búsquedas por ID sin
+-- fecha siguen usando la clave primaria de cada partición.
+ALTER TABLE Orders
+    ADD PRIMARY KEY (orders_id, created_at),
+    ADD FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
+    ADD FOREIGN KEY (payment_method_id) REFERENCES Payment_Method(payment_method_id),
+    ADD FOREIGN KEY (shipping_id) REFERENCES Shipping(shipping_id);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_id_orders_id ON Orders (customer_id, orders_id);
+
+ALTER TABLE Order_Items
+    ADD PRIMARY KEY (order_item_id, created_at),
+    ADD FOREIGN KEY (product_id) REFERENCES Product(product_id),
+    ADD FOREIGN KEY (coupon_id) REFERENCES Coupons(coupons_id),
+    ADD FOREIGN KEY (offer_id) REFERENCES Offer(offer_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_orders_id_product_id ON Order_Items (orders_id, product_id);
+
+ALTER TABLE Search_History
+    ADD PRIMARY KEY (search_history_id, created_at),
+    ADD FOREIGN KEY (customer_id) REFERENCES Customer(customer_id);
+CREATE INDEX IF NOT EXISTS idx_search_history_customer_id ON Search_History (customer_id);
+
+-- Triggers: los totales de la migración 003 y las comprobaciones de las
+-- claves foráneas que ya no se pueden declarar.
+CREATE TRIGGER order_items_totals_insert AFTER INSERT ON Order_Items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+CREATE TRIGGER order_items_totals_update AFTER UPDATE ON Order_Items
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+CREATE TRIGGER order_items_totals_delete AFTER DELETE ON Order_Items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_refresh_totals();
+
+CREATE TRIGGER order_items_orders_insert AFTER INSERT ON Order_Items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_check_orders();
+CREATE TRIGGER order_items_orders_update AFTER UPDATE ON Order_Items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_check_orders();
+CREATE TRIGGER order_items_returns_delete AFTER DELETE ON Order_Items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_restrict_returns();
+CREATE TRIGGER orders_dependents_delete AFTER DELETE ON Orders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_delete_dependents();
+
+DROP TRIGGER IF EXISTS returns_order_items_insert ON Returns;
+CREATE TRIGGER returns_order_items_insert AFTER INSERT ON Returns
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION returns_check_order_items();
+DROP TRIGGER IF EXISTS returns_order_items_update ON Returns;
+CREATE TRIGGER returns_order_items_update AFTER UPDATE ON Returns
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION returns_check_order_items();
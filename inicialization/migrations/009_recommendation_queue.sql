@@ -0,0 +1,37 @@
+-- Cola de líneas de pedido pendientes de procesar por el motor de
+-- recomendaciones. Sustituye a la marca de agua last_order_item_id: los IDs
+-- de una secuencia se reparten al insertar pero se hacen visibles al hacer
+-- commit, así que una línea con un ID menor que la marca podía confirmarse
+-- después de una ejecución y no procesarse nunca. La cola se llena en la
+-- misma transacción que la línea y cada ejecución vacía lo que ve.
+CREATE TABLE IF NOT EXISTS recommendation_queue (
+    order_item_id INT PRIMARY KEY,
+    orders_id INT NOT NULL
+);
+
+-- Trigger por sentencia con tabla de transición: una carga masiva encola
+-- todas sus líneas con un solo INSERT.
+CREATE OR REPLACE FUNCTION order_items_queue_recommendations() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO recommendation_queue (order_item_id, orders_id)
+    SELECT order_item_id, orders_id FROM new_rows
+    WHERE orders_id IS NOT NULL AND product_id IS NOT NULL
+    ON CONFLICT (order_item_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS order_items_recommendation_queue ON Order_Items;
+CREATE TRIGGER order_items_recommendation_queue AFTER INSERT ON Order_Items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_items_queue_recommendations();
+
+-- Encolar lo que la marca de agua aún no había cubierto.
+INSERT INTO recommendation_queue (order_item_id, orders_id)
+SELECT order_item_id, orders_id
+FROM Order_Items
+WHERE order_item_id > (SELECT COALESCE(MAX(last_order_item_id), 0) FROM recommendation_runs)
+  AND orders_id IS NOT NULL AND product_id IS NOT NULL
+ON CONFLICT (order_item_id) DO NOTHING;
+
+COMMENT ON COLUMN recommendation_runs.last_order_item_id IS 'Mayor order_item_id procesado en la ejecución (informativo; la cola decide qué se procesa)';
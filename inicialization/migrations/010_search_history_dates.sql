@@ -0,0 +1,7 @@
+-- Las búsquedas se fechan por search_date: created_at, la clave de partición,
+-- vale lo mismo, como en la copia de datos de la migración 008. Las filas
+-- escritas desde entonces con la hora de inserción (o del volcado del búfer)
+-- se mueven a la partición de su fecha de búsqueda.
+UPDATE Search_History
+SET created_at = search_date
+WHERE created_at <> search_date;
@@ -0,0 +1,34 @@
+-- Versión de las tablas del catálogo para los ETag de los listados. Cada
+-- sentencia que escribe en Product, Category o Seller suma 1 a un contador
+-- de la tabla, y la versión es la suma de sus contadores: la ven igual todos
+-- los workers y cambia con cualquier escritura, pase o no por la API.
+-- Se reparte en 32 contadores por tabla, elegidos por el proceso
+-- del servidor, para que dos transacciones concurrentes (varios checkouts,
+-- por ejemplo) casi nunca esperen por la misma fila hasta el commit.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT NOT NULL,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions AS v (table_name, shard, version)
+    VALUES (TG_TABLE_NAME, pg_backend_pid() % 32, 1)
+    ON CONFLICT (table_name, shard) DO UPDATE SET version = v.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_table_version ON Product;
+CREATE TRIGGER product_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Product
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS category_table_version ON Category;
+CREATE TRIGGER category_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS seller_table_version ON Seller;
+CREATE TRIGGER seller_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Seller
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
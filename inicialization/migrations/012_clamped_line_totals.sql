@@ -0,0 +1,31 @@
+-- El total de una línea no baja de cero, como en el checkout, que ya lo
+-- limitaba con GREATEST(..., 0). refresh_order_totals restaba los descuentos
+-- sin ese límite, así que order_totals no coincidía con total_amount cuando
+-- los descuentos superaban el importe de la línea. Es la misma expresión que
+-- line_total en crud/orders.py.
+CREATE OR REPLACE FUNCTION refresh_order_totals(order_ids INT[]) RETURNS void AS $$
+    INSERT INTO order_totals (orders_id, item_count, calculated_total, updated_at)
+    SELECT
+        o.orders_id,
+        COUNT(oi.product_id),
+        COALESCE(SUM(GREATEST(oi.price_at_purchase * oi.quantity - COALESCE(c.discount_value, 0) - COALESCE(ofr.discount, 0), 0))
+                 FILTER (WHERE oi.product_id IS NOT NULL), 0),
+        NOW()
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON oi.orders_id = o.orders_id
+    LEFT JOIN Coupons c ON c.coupons_id = oi.coupon_id
+    LEFT JOIN Offer ofr ON ofr.offer_id = oi.offer_id
+    WHERE o.orders_id = ANY(order_ids)
+    GROUP BY o.orders_id
+    ON CONFLICT (orders_id) DO UPDATE
+    SET item_count = EXCLUDED.item_count,
+        calculated_total = EXCLUDED.calculated_total,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
+
+-- Recalcular solo los pedidos con alguna línea con descuento: en los demás
+-- el resultado no cambia.
+SELECT refresh_order_totals(ARRAY(
+    SELECT DISTINCT orders_id FROM Order_Items
+    WHERE orders_id IS NOT NULL AND (coupon_id IS NOT NULL OR offer_id IS NOT NULL)
+));
@@ -0,0 +1,69 @@
+-- Los triggers que actualizan product_rating_stats y order_totals bloquean
+-- sus filas en el orden en que salía el GROUP BY, que no está definido. Dos
+-- escrituras masivas concurrentes con productos (o pedidos) en común podían
+-- bloquearlas en órdenes distintos y acabar en un deadlock, por ejemplo
+-- /review/bulk_create o los trozos paralelos de reseñas de
+-- generate_data_scaled. Ahora se bloquean por orden de clave, como hace el
+-- checkout con su FOR UPDATE.
+CREATE OR REPLACE FUNCTION review_rating_stats() RETURNS trigger AS $$
+DECLARE
+    added Review[] := '{}';
+    removed Review[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        added := ARRAY(SELECT r FROM new_rows r);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        removed := ARRAY(SELECT r FROM old_rows r);
+    END IF;
+    INSERT INTO product_rating_stats AS s
+        (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+    SELECT
+        product_id,
+        SUM(sign),
+        SUM(sign * rating),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 1), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 2), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 3), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 4), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 5), 0)
+    FROM (
+        SELECT product_id, rating, 1 AS sign FROM unnest(added)
+        UNION ALL
+        SELECT product_id, rating, -1 AS sign FROM unnest(removed)
+    ) AS changes
+    WHERE product_id IS NOT NULL
+    GROUP BY product_id
+    ORDER BY product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET review_count = s.review_count + EXCLUDED.review_count,
+        rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+        rating_1 = s.rating_1 + EXCLUDED.rating_1,
+        rating_2 = s.rating_2 + EXCLUDED.rating_2,
+        rating_3 = s.rating_3 + EXCLUDED.rating_3,
+        rating_4 = s.rating_4 + EXCLUDED.rating_4,
+        rating_5 = s.rating_5 + EXCLUDED.rating_5;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_order_totals(order_ids INT[]) RETURNS void AS $$
+    INSERT INTO order_totals (orders_id, item_count, calculated_total, updated_at)
+    SELECT
+        o.orders_id,
+        COUNT(oi.product_id),
+        COALESCE(SUM(GREATEST(oi.price_at_purchase * oi.quantity - COALESCE(c.discount_value, 0) - COALESCE(ofr.discount, 0), 0))
+                 FILTER (WHERE oi.product_id IS NOT NULL), 0),
+        NOW()
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON oi.orders_id = o.orders_id
+    LEFT JOIN Coupons c ON c.coupons_id = oi.coupon_id
+    LEFT JOIN Offer ofr ON ofr.offer_id = oi.offer_id
+    WHERE o.orders_id = ANY(order_ids)
+    GROUP BY o.orders_id
+    ORDER BY o.orders_id
+    ON CONFLICT (orders_id) DO UPDATE
+    SET item_count = EXCLUDED.item_count,
+        calculated_total = EXCLUDED.calculated_total,
+        updated_at = EXCLUDED.updated_at;
+$$ LANGUAGE sql;
@@ -0,0 +1,438 @@
+-- Esquema para DB_BACKEND=mysql: las tablas de postgres_init.sql con las
+-- columnas, índices y resúmenes que añaden las migraciones 001 a 008.
+-- Requiere MySQL 8.0.14 o posterior (LATERAL, JSON_TABLE) y un servidor
+-- iniciado con lower_case_table_names=1, porque las consultas escriben los
+-- nombres de tabla con mayúsculas distintas (Shopping_Cart y shopping_cart).
+-- Lo que es propio de Postgres no tiene equivalente aquí: el particionado
+-- mensual (008) y el search_vector (002), que se sustituye por un índice
+-- FULLTEXT sobre el nombre y la descripción del producto.
+CREATE DATABASE IF NOT EXISTS amazon;
+USE amazon;
+
+-- Crear tablas independientes primero
+CREATE TABLE IF NOT EXISTS Category (
+    category_id INT AUTO_INCREMENT PRIMARY KEY,
+    category_name VARCHAR(255) NOT NULL,
+    description TEXT,
+    -- Versión de la fila para los ETag (lo que xmin hace en Postgres)
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
+
+CREATE TABLE IF NOT EXISTS Seller (
+    seller_id INT AUTO_INCREMENT PRIMARY KEY,
+    seller_name VARCHAR(255) NOT NULL,
+    seller_type VARCHAR(50),
+    seller_rating DECIMAL(3, 2),
+    -- Versión de la fila para los ETag (lo que xmin hace en Postgres)
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
+
+CREATE TABLE IF NOT EXISTS Customer (
+    customer_id INT AUTO_INCREMENT PRIMARY KEY,
+    full_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    shipping_address VARCHAR(500) NOT NULL,
+    phone VARCHAR(15) NOT NULL,
+    registration_date DATE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Payment_Method (
+    payment_method_id INT AUTO_INCREMENT PRIMARY KEY,
+    payment_type VARCHAR(50) NOT NULL,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS Shipping (
+    shipping_id INT AUTO_INCREMENT PRIMARY KEY,
+    shipping_company VARCHAR(255) NOT NULL,
+    shipping_date DATE,
+    estimated_delivery DATE,
+    shipping_cost DECIMAL(10, 2)
+);
+
+CREATE TABLE IF NOT EXISTS Coupons (
+    coupons_id INT AUTO_INCREMENT PRIMARY KEY,
+    discount_code VARCHAR(50) NOT NULL,
+    discount_value DECIMAL(10, 2) NOT NULL,
+    expiration_date DATE NOT NULL
+);
+
+-- Crear tablas que dependen de las anteriores
+CREATE TABLE IF NOT EXISTS Product (
+    product_id INT AUTO_INCREMENT PRIMARY KEY,
+    product_name VARCHAR(255) NOT NULL,
+    description TEXT,
+    price DECIMAL(10, 2) NOT NULL,
+    quantity_available INT NOT NULL,
+    category_id INT,
+    FOREIGN KEY (category_id) REFERENCES Category(category_id),
+    seller_id INT,
+    FOREIGN KEY (seller_id) REFERENCES Seller(seller_id),
+    -- Versión de la fila para los ETag (lo que xmin hace en Postgres)
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    -- ProductCRUD.search: búsqueda por prefijos en modo booleano (en lugar de la migración 002)
+    FULLTEXT INDEX idx_product_fulltext (product_name, description)
+);
+
+-- Una oferta puede aplicarse a un producto concreto (migración 007)
+CREATE TABLE IF NOT EXISTS Offer (
+    offer_id INT AUTO_INCREMENT PRIMARY KEY,
+    discount DECIMAL(10, 2) NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    product_id INT,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE
+);
+
+-- created_at: fecha de creación para el historial de pedidos (migraciones 004 y 008)
+CREATE TABLE IF NOT EXISTS Orders (
+    orders_id INT AUTO_INCREMENT PRIMARY KEY,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    order_status VARCHAR(50) NOT NULL,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
+    payment_method_id INT,
+    FOREIGN KEY (payment_method_id) REFERENCES Payment_Method(payment_method_id),
+    shipping_id INT,
+    FOREIGN KEY (shipping_id) REFERENCES Shipping(shipping_id),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Order_Items (
+    order_item_id INT AUTO_INCREMENT PRIMARY KEY,
+    orders_id INT,
+    FOREIGN KEY (orders_id) REFERENCES Orders(orders_id),
+    product_id INT,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id),
+    quantity INT NOT NULL,
+    price_at_purchase DECIMAL(10, 2) NOT NULL,
+    coupon_id INT,  -- FK a Coupons
+    FOREIGN KEY (coupon_id) REFERENCES Coupons(coupons_id),
+    offer_id INT,  -- FK a Offer
+    FOREIGN KEY (offer_id) REFERENCES Offer(offer_id),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Shopping_Cart (
+    shopping_cart_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS Shopping_Cart_Product (
+    cart_id INT,
+    FOREIGN KEY (cart_id) REFERENCES Shopping_Cart(shopping_cart_id),
+    product_id INT,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id),
+    quantity INT NOT NULL,
+    PRIMARY KEY (cart_id, product_id)
+);
+
+CREATE TABLE IF NOT EXISTS Review (
+    review_id INT AUTO_INCREMENT PRIMARY KEY,
+    rating INT NOT NULL,
+    comment TEXT,
+    review_date DATE NOT NULL,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
+    product_id INT,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Returns (
+    returns_id INT AUTO_INCREMENT PRIMARY KEY,
+    return_date DATE NOT NULL,
+    return_reason VARCHAR(255),
+    return_status VARCHAR(50),
+    order_item_id INT, -- Relacionado con Order_Items
+    FOREIGN KEY (order_item_id) REFERENCES Order_Items(order_item_id)
+);
+
+-- score: puntuación del motor de recomendaciones (migración 006)
+CREATE TABLE IF NOT EXISTS Product_Recommendations (
+    product_Recommendation_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
+    recommended_product_id INT,
+    FOREIGN KEY (recommended_product_id) REFERENCES Product(product_id),
+    recommendation_date DATE, -- Fecha de recomendación
+    score FLOAT
+);
+
+CREATE TABLE IF NOT EXISTS Search_History (
+    search_History_id INT AUTO_INCREMENT PRIMARY KEY,
+    search_term VARCHAR(255) NOT NULL,
+    search_date DATE NOT NULL,
+    customer_id INT,
+    FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Índices de la migración 001 (MySQL ya indexa cada columna con FK, pero
+-- estos índices compuestos o sin FK los usan los filtros de crud/*.py)
+CREATE INDEX idx_order_items_orders_id_product_id ON Order_Items (orders_id, product_id);
+CREATE INDEX idx_order_items_created_at ON Order_Items (created_at);
+CREATE INDEX idx_product_price ON Product (price);
+CREATE INDEX idx_returns_return_status ON Returns (return_status);
+CREATE INDEX idx_coupons_discount_code ON Coupons (discount_code);
+CREATE INDEX idx_shipping_company ON Shipping (shipping_company);
+CREATE INDEX idx_shipping_date ON Shipping (shipping_date);
+CREATE INDEX idx_seller_rating ON Seller (seller_rating);
+-- Historial de pedidos de un cliente, del más reciente al más antiguo (migración 004)
+CREATE INDEX idx_orders_customer_id_orders_id ON Orders (customer_id, orders_id);
+-- Consultas por rango de fechas (en Postgres las resuelve el particionado)
+CREATE INDEX idx_orders_created_at ON Orders (created_at);
+CREATE INDEX idx_search_history_created_at ON Search_History (created_at);
+-- get_by_customer: una sola lectura del índice, ya en orden de puntuación (migración 006)
+CREATE INDEX idx_product_recommendations_customer_score ON Product_Recommendations (customer_id, score DESC);
+-- OfferCRUD.get_by_product y la vista del carrito (migración 007)
+CREATE INDEX idx_offer_product_id ON Offer (product_id, end_date);
+
+-- Resumen del total de cada pedido (migración 003). MySQL solo tiene
+-- triggers por fila, así que cada línea recalcula su pedido.
+CREATE TABLE IF NOT EXISTS order_totals (
+    orders_id INT PRIMARY KEY,
+    FOREIGN KEY (orders_id) REFERENCES Orders(orders_id) ON DELETE CASCADE,
+    item_count INT NOT NULL,
+    calculated_total DECIMAL(12, 2) NOT NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Resumen de valoraciones por producto (migración 005)
+CREATE TABLE IF NOT EXISTS product_rating_stats (
+    product_id INT PRIMARY KEY,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    rating_1 INT NOT NULL DEFAULT 0,
+    rating_2 INT NOT NULL DEFAULT 0,
+    rating_3 INT NOT NULL DEFAULT 0,
+    rating_4 INT NOT NULL DEFAULT 0,
+    rating_5 INT NOT NULL DEFAULT 0
+);
+
+-- Tablas del motor de recomendaciones (migración 006). El motor solo corre
+-- sobre Postgres, pero las lecturas de ProductRecommendationsCRUD sí usan
+-- product_similarities, así que pueden cargarse desde allí.
+CREATE TABLE IF NOT EXISTS product_co_purchases (
+    product_id INT NOT NULL,
+    other_product_id INT NOT NULL,
+    orders_count INT NOT NULL,
+    PRIMARY KEY (product_id, other_product_id),
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE,
+    FOREIGN KEY (other_product_id) REFERENCES Product(product_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS product_purchase_counts (
+    product_id INT PRIMARY KEY,
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE,
+    orders_count INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS product_similarities (
+    product_id INT NOT NULL,
+    similar_product_id INT NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (product_id, similar_product_id),
+    FOREIGN KEY (product_id) REFERENCES Product(product_id) ON DELETE CASCADE,
+    FOREIGN KEY (similar_product_id) REFERENCES Product(product_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS recommendation_runs (
+    run_id INT AUTO_INCREMENT PRIMARY KEY,
+    last_order_item_id INT NOT NULL,
+    orders_folded INT NOT NULL,
+    products_updated INT NOT NULL,
+    customers_updated INT NOT NULL,
+    finished_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Versión de Product, Category y Seller para los ETag de los listados
+-- (migración 011): suma de 32 contadores por tabla, elegidos por conexión.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) NOT NULL,
+    shard SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, shard)
+);
+
+DELIMITER //
+
+-- Recalcula un pedido. El total de una línea es price_at_purchase * quantity
+-- menos los descuentos del cupón y la oferta, nunca negativo, igual que en
+-- OrdersCRUD (migración 012).
+CREATE PROCEDURE refresh_order_total(IN p_orders_id INT)
+BEGIN
+    INSERT INTO order_totals (orders_id, item_count, calculated_total, updated_at)
+    SELECT
+        o.orders_id,
+        COUNT(oi.product_id),
+        COALESCE(SUM(CASE WHEN oi.product_id IS NOT NULL
+            THEN GREATEST(oi.price_at_purchase * oi.quantity - COALESCE(c.discount_value, 0) - COALESCE(ofr.discount, 0), 0) END), 0),
+        NOW()
+    FROM Orders o
+    LEFT JOIN Order_Items oi ON oi.orders_id = o.orders_id
+    LEFT JOIN Coupons c ON c.coupons_id = oi.coupon_id
+    LEFT JOIN Offer ofr ON ofr.offer_id = oi.offer_id
+    WHERE o.orders_id = p_orders_id
+    GROUP BY o.orders_id
+    ON DUPLICATE KEY UPDATE
+        item_count = VALUES(item_count),
+        calculated_total = VALUES(calculated_total),
+        updated_at = VALUES(updated_at);
+END //
+
+-- Recalcula los pedidos con alguna línea que use el cupón o la oferta indicados.
+CREATE PROCEDURE refresh_order_totals_for_discount(IN p_coupon_id INT, IN p_offer_id INT)
+BEGIN
+    DECLARE done BOOLEAN DEFAULT FALSE;
+    DECLARE v_orders_id INT;
+    DECLARE affected CURSOR FOR
+        SELECT DISTINCT orders_id FROM Order_Items
+        WHERE orders_id IS NOT NULL AND (coupon_id = p_coupon_id OR offer_id = p_offer_id);
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
+    OPEN affected;
+    refresh: LOOP
+        FETCH affected INTO v_orders_id;
+        IF done THEN
+            LEAVE refresh;
+        END IF;
+        CALL refresh_order_total(v_orders_id);
+    END LOOP;
+    CLOSE affected;
+END //
+
+CREATE TRIGGER order_items_totals_insert AFTER INSERT ON Order_Items FOR EACH ROW
+BEGIN
+    IF NEW.orders_id IS NOT NULL THEN
+        CALL refresh_order_total(NEW.orders_id);
+    END IF;
+END //
+
+CREATE TRIGGER order_items_totals_update AFTER UPDATE ON Order_Items FOR EACH ROW
+BEGIN
+    IF NEW.orders_id IS NOT NULL THEN
+        CALL refresh_order_total(NEW.orders_id);
+    END IF;
+    IF OLD.orders_id IS NOT NULL AND NOT (OLD.orders_id <=> NEW.orders_id) THEN
+        CALL refresh_order_total(OLD.orders_id);
+    END IF;
+END //
+
+CREATE TRIGGER order_items_totals_delete AFTER DELETE ON Order_Items FOR EACH ROW
+BEGIN
+    IF OLD.orders_id IS NOT NULL THEN
+        CALL refresh_order_total(OLD.orders_id);
+    END IF;
+END //
+
+-- Si cambia el descuento de un cupón o una oferta, cambian los pedidos que lo usan.
+CREATE TRIGGER coupons_totals_update AFTER UPDATE ON Coupons FOR EACH ROW
+BEGIN
+    IF NOT (OLD.discount_value <=> NEW.discount_value) THEN
+        CALL refresh_order_totals_for_discount(NEW.coupons_id, NULL);
+    END IF;
+END //
+
+CREATE TRIGGER offer_totals_update AFTER UPDATE ON Offer FOR EACH ROW
+BEGIN
+    IF NOT (OLD.discount <=> NEW.discount) THEN
+        CALL refresh_order_totals_for_discount(NULL, NEW.offer_id);
+    END IF;
+END //
+
+-- Aplica a las estadísticas una reseña añadida (p_sign = 1) o quitada (p_sign = -1).
+CREATE PROCEDURE apply_review_rating(IN p_product_id INT, IN p_rating INT, IN p_sign INT)
+BEGIN
+    IF p_product_id IS NOT NULL THEN
+        INSERT INTO product_rating_stats
+            (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5)
+        VALUES (
+            p_product_id, p_sign, p_sign * p_rating,
+            IF(p_rating = 1, p_sign, 0), IF(p_rating = 2, p_sign, 0), IF(p_rating = 3, p_sign, 0),
+            IF(p_rating = 4, p_sign, 0), IF(p_rating = 5, p_sign, 0)
+        )
+        ON DUPLICATE KEY UPDATE
+            review_count = review_count + VALUES(review_count),
+            rating_sum = rating_sum + VALUES(rating_sum),
+            rating_1 = rating_1 + VALUES(rating_1),
+            rating_2 = rating_2 + VALUES(rating_2),
+            rating_3 = rating_3 + VALUES(rating_3),
+            rating_4 = rating_4 + VALUES(rating_4),
+            rating_5 = rating_5 + VALUES(rating_5);
+    END IF;
+END //
+
+CREATE TRIGGER review_rating_stats_insert AFTER INSERT ON Review FOR EACH ROW
+BEGIN
+    CALL apply_review_rating(NEW.product_id, NEW.rating, 1);
+END //
+
+CREATE TRIGGER review_rating_stats_update AFTER UPDATE ON Review FOR EACH ROW
+BEGIN
+    CALL apply_review_rating(OLD.product_id, OLD.rating, -1);
+    CALL apply_review_rating(NEW.product_id, NEW.rating, 1);
+END //
+
+CREATE TRIGGER review_rating_stats_delete AFTER DELETE ON Review FOR EACH ROW
+BEGIN
+    CALL apply_review_rating(OLD.product_id, OLD.rating, -1);
+END //
+
+-- Los triggers de MySQL son por fila, así que una carga masiva suma una vez
+-- por fila; solo importa que la versión cambie. TRUNCATE no los dispara.
+CREATE PROCEDURE bump_table_version(IN p_table_name VARCHAR(64))
+BEGIN
+    INSERT INTO table_versions (table_name, shard, version)
+    VALUES (p_table_name, CONNECTION_ID() % 32, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END //
+
+CREATE TRIGGER product_table_version_insert AFTER INSERT ON Product FOR EACH ROW
+BEGIN
+    CALL bump_table_version('product');
+END //
+
+CREATE TRIGGER product_table_version_update AFTER UPDATE ON Product FOR EACH ROW
+BEGIN
+    CALL bump_table_version('product');
+END //
+
+CREATE TRIGGER product_table_version_delete AFTER DELETE ON Product FOR EACH ROW
+BEGIN
+    CALL bump_table_version('product');
+END //
+
+CREATE TRIGGER category_table_version_insert AFTER INSERT ON Category FOR EACH ROW
+BEGIN
+    CALL bump_table_version('category');
+END //
+
+CREATE TRIGGER category_table_version_update AFTER UPDATE ON Category FOR EACH ROW
+BEGIN
+    CALL bump_table_version('category');
+END //
+
+CREATE TRIGGER category_table_version_delete AFTER DELETE ON Category FOR EACH ROW
+BEGIN
+    CALL bump_table_version('category');
+END //
+
+CREATE TRIGGER seller_table_version_insert AFTER INSERT ON Seller FOR EACH ROW
+BEGIN
+    CALL bump_table_version('seller');
+END //
+
+CREATE TRIGGER seller_table_version_update AFTER UPDATE ON Seller FOR EACH ROW
+BEGIN
+    CALL bump_table_version('seller');
+END //
+
+CREATE TRIGGER seller_table_version_delete AFTER DELETE ON Seller FOR EACH ROW
+BEGIN
+    CALL bump_table_version('seller');
+END //
+
+DELIMITER ;
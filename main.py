@@ -1,11 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from connections import close_pools, open_pools
+from crud.partitions import create_maintainer
+from crud.write_buffer import close_buffers
+
 # Import Routers
 from services import (customer, payment_method, product, category, coupons, seller, 
                       offer, orders, product_recommendations, returns, review, search_history,
-                      shipping, shopping_cart, shopping_cart_product, order_items)  # Adjust paths if necessary
+                      shipping, shopping_cart, shopping_cart_product, order_items, cache, metrics, slow_queries, read_routing, health)  # Adjust paths if necessary
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens the database pools before serving and keeps the monthly partitions created while the server runs.
+
+    On shutdown the write-behind buffers are flushed before the pools are closed.
+    """
+    await open_pools()
+    partition_maintainer = create_maintainer()
+    partition_maintainer.start()
+    yield
+    partition_maintainer.stop()
+    close_buffers()
+    await close_pools()
 
-app = FastAPI(title="My Amazon API")
+app = FastAPI(title="My Amazon API", lifespan=lifespan)
+app.add_middleware(read_routing.ReadYourWritesMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 """Include Routers"""
 app.include_router(customer.router)
@@ -24,6 +46,10 @@ app.include_router(shipping.router)
 app.include_router(shopping_cart.router)
 app.include_router(shopping_cart_product.router)
 app.include_router(order_items.router)
+app.include_router(cache.router)
+app.include_router(metrics.router)
+app.include_router(slow_queries.router)
+app.include_router(health.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,18 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guards the admin routes with the ADMIN_TOKEN environment variable.
+
+    Without ADMIN_TOKEN the routes answer 404, as if they did not exist, so
+    they are off unless an operator turns them on. With it, a request must
+    send the same value in the X-Admin-Token header.
+    """
+    token = os.getenv("ADMIN_TOKEN", "")
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode("utf-8"), token.encode("utf-8")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing X-Admin-Token")
@@ -0,0 +1,83 @@
+import json
+from typing import Callable, List, Optional, Type
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+MAX_BULK_ROWS = 10000
+
+class BulkError(BaseModel):
+    """Why one row of a bulk request was not inserted."""
+    index: int
+    error: str
+
+class BulkResult(BaseModel):
+    """Generated ids in input order (null for rejected rows) and the per-row errors."""
+    ids: List[Optional[int]]
+    errors: List[BulkError]
+
+def bulk_openapi(model: Type[BaseModel]) -> dict:
+    """Documents a bulk body (a JSON array or NDJSON of `model`) in the OpenAPI schema."""
+    schema = {"type": "array", "items": model.model_json_schema(), "maxItems": MAX_BULK_ROWS}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": schema},
+        "application/x-ndjson": {"schema": {"type": "string", "description": f"One {model.__name__} JSON object per line"}},
+    }}}
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(": ".join(filter(None, [".".join(map(str, detail["loc"])), detail["msg"]])) for detail in error.errors())
+
+async def read_bulk_body(request: Request) -> list:
+    """Reads a JSON array body, or an NDJSON body when sent as application/x-ndjson.
+
+    Unparseable NDJSON lines are kept as their raw text, so they are reported
+    as row errors instead of failing the whole request.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        rows = []
+        for line in body.decode("utf-8").splitlines():
+            if line.strip():
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    rows.append(line)
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} rows per request")
+    return rows
+
+async def bulk_create(request: Request, model: Type[BaseModel], create_many: Callable) -> dict:
+    """Validates every row of a bulk body with `model` and inserts the valid ones with `create_many`.
+
+    Args:
+        request (Request): The request carrying a JSON array or NDJSON body.
+        model (Type[BaseModel]): The model each row must satisfy.
+        create_many (Callable): A CRUD `bulk_create` taking the list of valid models.
+
+    Returns:
+        dict: The BulkResult, indexed by the position of each row in the body.
+    """
+    rows = await read_bulk_body(request)
+    ids = [None] * len(rows)
+    errors = []
+    valid, positions = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append(model.model_validate(row))
+            positions.append(index)
+        except ValidationError as e:
+            errors.append({"index": index, "error": _format_validation_error(e)})
+    result = await run_in_threadpool(create_many, valid)
+    for position, row_id in zip(positions, result["ids"]):
+        ids[position] = row_id
+    errors.extend({"index": positions[error["index"]], "error": error["error"]} for error in result["errors"])
+    errors.sort(key=lambda error: error["index"])
+    return {"ids": ids, "errors": errors}
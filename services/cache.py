@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from crud.cache import get_cache
+
+router = APIRouter()
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Gets the hit, miss, eviction and invalidation counters of the catalog cache."""
+    return get_cache().get_stats()
@@ -1,10 +1,18 @@
-from typing import List
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Request, Response
 from crud.category import CategoryData, CategoryCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.etags import conditional, make_etag
 
 router = APIRouter()
 crud = CategoryCRUD()
 
+def _list_etag(route: str, *params) -> Optional[str]:
+    """ETag of a category list: the Category table version plus the route and its parameters."""
+    version = crud.version()
+    return make_etag("category", route, version, *params) if version is not None else None
+
 @router.post("/category/create", response_model=int)
 def create_category(data: CategoryData):
     """Creates a new category."""
@@ -21,16 +29,23 @@ def delete_category(category_id: int):
     return crud.delete(category_id)
 
 @router.get("/category/get_by_id/{category_id}", response_model=CategoryData)
-def get_category_by_id(category_id: int):
-    """Gets a category by ID."""
-    return crud.get_by_id(category_id)
+def get_category_by_id(category_id: int, request: Request, response: Response):
+    """Gets a category by ID; answers 304 if If-None-Match has the ETag of its current row."""
+    category, version = crud.get_by_id_with_version(category_id)
+    etag = make_etag("category", category_id, version) if version else None
+    return conditional(request, response, etag, lambda: category, encode=None)
 
-@router.get("/category/get_all", response_model=List[CategoryData])
-def get_all_categories():
-    """Gets all categories."""
-    return crud.get_all()
+@router.get("/category/get_all", response_model=Page[CategoryData])
+def get_all_categories(request: Request, response: Response, limit: int = LimitParam,
+                       after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all categories, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    etag = _list_etag("get_all", limit, after)
+    return conditional(request, response, etag, lambda: crud.get_all(limit, after))
 
 @router.get("/category/get_by_name/{category_name}", response_model=List[CategoryData])
-def get_category_by_name(category_name: str):
+def get_category_by_name(category_name: str, request: Request, response: Response):
     """Gets categories by name."""
-    return crud.get_by_name(category_name)
\ No newline at end of file
+    etag = _list_etag("get_by_name", category_name)
+    return conditional(request, response, etag, lambda: crud.get_by_name(category_name))
\ No newline at end of file
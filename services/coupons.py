@@ -1,6 +1,9 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter
 from crud.coupons import CouponsData, CouponsCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = CouponsCRUD()
@@ -25,10 +28,12 @@ def get_coupon_by_id(coupons_id: int):
     """Gets a coupon by ID."""
     return crud.get_by_id(coupons_id)
 
-@router.get("/coupons/get_all", response_model=List[CouponsData])
-def get_all_coupons():
-    """Gets all coupons."""
-    return crud.get_all()
+@router.get("/coupons/get_all", response_model=Page[CouponsData])
+def get_all_coupons(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all coupons, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/coupons/get_by_code/{discount_code}", response_model=CouponsData)
 def get_coupon_by_code(discount_code: str):
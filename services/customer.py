@@ -1,9 +1,15 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 from fastapi import APIRouter
 from crud.customer import CustomerData, CustomerCRUD
+from crud.orders import OrdersCRUD, OrderWithItems
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = CustomerCRUD()
+orders_crud = OrdersCRUD()
 
 @router.post("/customer/create", response_model=int)
 def create_customer(data: CustomerData):
@@ -25,10 +31,18 @@ def get_customer_by_id(customer_id: int):
     """Gets a customer by ID."""
     return crud.get_by_id(customer_id)
 
-@router.get("/customer/get_all", response_model=List[CustomerData])
-def get_all_customers():
-    """Gets all customers."""
-    return crud.get_all()
+@router.get("/customer/get_all", response_model=Page[CustomerData])
+def get_all_customers(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all customers, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
+
+@router.get("/customer/{customer_id}/orders", response_model=Page[OrderWithItems])
+def get_customer_orders(customer_id: int, limit: int = LimitParam, after: Optional[int] = AfterParam,
+                        status: Optional[str] = None, since: Optional[date] = None, until: Optional[date] = None):
+    """Gets a customer's orders with their items, newest first, one page at a time."""
+    return fast_json(orders_crud.get_by_customer(customer_id, limit, after, status, since, until))
 
 @router.get("/customer/get_by_email/{email}", response_model=CustomerData)
 def get_customer_by_email(email: str):
@@ -38,4 +52,4 @@ def get_customer_by_email(email: str):
 @router.get("/customer/get_by_name/{full_name}", response_model=List[CustomerData])
 def get_customer_by_name(full_name: str):
     """Gets customers by name."""
-    return crud.get_by_name(full_name)
\ No newline at end of file
+    return fast_json(crud.get_by_name(full_name))
\ No newline at end of file
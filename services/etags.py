@@ -0,0 +1,54 @@
+import hashlib
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+
+from services.responses import fast_json
+
+# Clients may keep a copy but must revalidate it with If-None-Match before using it.
+CACHE_CONTROL = "no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """Builds a strong ETag from the versions and parameters a response depends on."""
+    return '"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compares an If-None-Match header with an ETag, ignoring W/ prefixes as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _is_empty(content: Any) -> bool:
+    """True for None, an empty list or a page without items."""
+    if isinstance(content, dict) and "items" in content:
+        return not content["items"]
+    return not content
+
+def conditional(request: Request, response: Response, etag: Optional[str], load: Callable,
+                encode: Optional[Callable] = fast_json):
+    """Answers 304 Not Modified when the client already has `etag`, without loading or encoding the content.
+
+    Otherwise the content is loaded, encoded and sent with the ETag. Empty
+    results are sent without one, because the CRUD classes also return them
+    when a query failed. The ETag is computed before loading, so a write that
+    commits in between only makes the client download the content again.
+
+    Args:
+        request (Request): The request, for its If-None-Match header.
+        response (Response): The response FastAPI builds when `encode` returns plain content.
+        etag (str, optional): The ETag of the current content; None disables the check.
+        load (Callable): Reads the content.
+        encode (Callable, optional): Turns the content into the route's return value;
+            None returns it as it is, for FastAPI to validate against the response model.
+    """
+    if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    content = load()
+    result = encode(content) if encode else content
+    if etag is not None and not _is_empty(content):
+        headers = result.headers if isinstance(result, Response) else response.headers
+        headers["ETag"] = etag
+        headers["Cache-Control"] = CACHE_CONTROL
+    return result
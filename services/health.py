@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from connections import check_readiness
+
+router = APIRouter()
+
+@router.get("/health")
+async def get_health():
+    """Liveness: the process is up and serving, whatever the state of the database."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def get_readiness():
+    """Readiness: 200 once every database pool answers a query, 503 with the failing checks otherwise."""
+    readiness = await check_readiness()
+    content = {"status": "ready" if readiness["ready"] else "unavailable", "checks": readiness["checks"]}
+    return JSONResponse(content, status_code=200 if readiness["ready"] else 503)
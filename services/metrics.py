@@ -0,0 +1,42 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from connections.metrics import http_request_duration, registry
+
+router = APIRouter()
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every HTTP request.
+
+    Requests are labelled by route template (e.g. /product/get_by_id/{product_id}),
+    not by the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]  # Reported if the app fails before sending a response
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")  # Set by the router once a route matches
+            http_request_duration.observe(
+                time.perf_counter() - start, scope["method"], route.path if route is not None else "unmatched", str(status[0])
+            )
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Gets the request, query and pool metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,6 +1,9 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter
 from crud.offer import OfferData, OfferCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = OfferCRUD()
@@ -25,12 +28,14 @@ def get_offer_by_id(offer_id: int):
     """Gets an offer by ID."""
     return crud.get_by_id(offer_id)
 
-@router.get("/offer/get_all", response_model=List[OfferData])
-def get_all_offers():
-    """Gets all offers."""
-    return crud.get_all()
+@router.get("/offer/get_all", response_model=Page[OfferData])
+def get_all_offers(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all offers, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/offer/get_by_product/{product_id}", response_model=List[OfferData])
 def get_offers_by_product(product_id: int):
     """Gets offers by product."""
-    return crud.get_by_product(product_id)
\ No newline at end of file
+    return fast_json(crud.get_by_product(product_id))
\ No newline at end of file
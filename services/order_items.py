@@ -1,8 +1,9 @@
 from typing import List, Dict, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from crud.order_items import OrderItemData, OrderItemCRUD  # Import the CRUD and the model
+from services.bulk import BulkResult, bulk_create, bulk_openapi
 
 router = APIRouter()
 crud = OrderItemCRUD()
@@ -12,6 +13,11 @@ def create_order_item(data: OrderItemData):
     """Creates a new order item."""
     return crud.create(data)
 
+@router.post("/order_items/bulk_create", response_model=BulkResult, openapi_extra=bulk_openapi(OrderItemData))
+async def bulk_create_order_items(request: Request):
+    """Creates many order items in one transaction from a JSON array or an NDJSON body."""
+    return await bulk_create(request, OrderItemData, crud.bulk_create)
+
 @router.put("/order_items/update/{order_item_id}")
 def update_order_item(order_item_id: int, data: OrderItemData):
     """Updates an existing order item."""
@@ -1,17 +1,38 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
 
-from crud.orders import OrdersData, OrdersCRUD
+from crud.orders import OrdersData, OrdersCRUD, AsyncOrdersCRUD, CheckoutData, OrderWithItems, MAX_ORDERS_PER_BATCH
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = OrdersCRUD()
+async_crud = AsyncOrdersCRUD()
+
+class CheckoutResult(BaseModel):
+    """The order placed by a checkout."""
+    orders_id: int
+    total_amount: float
 
 @router.post("/orders/create", response_model=int)
 def create_order(data: OrdersData):
     """Creates a new order."""
     return crud.create(data)
 
+@router.post("/orders/checkout", status_code=status.HTTP_201_CREATED, response_model=CheckoutResult)
+def checkout(data: CheckoutData):
+    """Places an order with its items, decrementing stock and applying coupon and offer discounts."""
+    result = crud.checkout(data)
+    if "unavailable_products" in result:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=result)
+    if "error" in result:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result["error"])
+    return result
+
 @router.put("/orders/update/{orders_id}")
 def update_order(orders_id: int, data: OrdersData):
     """Updates an existing order."""
@@ -27,7 +48,34 @@ def get_order_by_id(orders_id: int):
     """Gets an order by ID."""
     return crud.get_by_id(orders_id)
 
-@router.get("/orders/get_all", response_model=List[OrdersData])
-def get_all_orders():
-    """Gets all orders."""
-    return crud.get_all()
\ No newline at end of file
+@router.get("/orders/get_many", response_model=List[OrderWithItems])
+def get_many_orders(ids: List[int] = Query(..., max_length=MAX_ORDERS_PER_BATCH, description="Order IDs, e.g. ?ids=1&ids=2")):
+    """Gets several orders with their items and totals in one query."""
+    orders = crud.get_many(ids)
+    if orders is None:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to retrieve orders")
+    return fast_json(orders)
+
+@router.get("/orders/date_range", response_model=Page[OrderWithItems])
+def get_orders_by_date_range(since: date, until: date, limit: int = LimitParam, after: Optional[int] = AfterParam):
+    """Gets the orders created from `since` to `until` (both included) with their items, one page at a time."""
+    return fast_json(crud.get_by_date_range(since, until, limit, after))
+
+@router.get("/orders/get_all", response_model=Page[OrdersData])
+def get_all_orders(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all orders, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
+
+# Async routes: same queries on the asyncpg pool, so one worker can keep many queries in flight.
+
+@router.get("/async/orders/get_by_id/{orders_id}", response_model=OrdersData)
+async def get_order_by_id_async(orders_id: int):
+    """Gets an order by ID without blocking the event loop."""
+    return await async_crud.get_by_id(orders_id)
+
+@router.get("/async/orders/get_all", response_model=Page[OrdersData])
+async def get_all_orders_async(limit: int = LimitParam, after: Optional[int] = AfterParam):
+    """Gets all orders without blocking the event loop, one page at a time."""
+    return fast_json(await async_crud.get_all(limit, after))
\ No newline at end of file
@@ -0,0 +1,19 @@
+from typing import Iterator
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+
+from crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.responses import dumps
+
+# Shared query parameters for the list endpoints.
+LimitParam = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items in the page")
+AfterParam = Query(None, description="Cursor returned as `next_cursor` by the previous page")
+StreamParam = Query(False, description="Stream every row as NDJSON instead of returning a page")
+
+def ndjson_response(items: Iterator) -> StreamingResponse:
+    """Streams items as newline-delimited JSON, one object per line."""
+    def encode():
+        for item in items:
+            yield dumps(item) + b"\n"
+    return StreamingResponse(encode(), media_type="application/x-ndjson")
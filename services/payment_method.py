@@ -3,6 +3,9 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException, status
 
 from crud.payment_method import PaymentMethodData, PaymentMethodCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = PaymentMethodCRUD()
@@ -23,15 +26,17 @@ def get_payment_method_by_id(payment_method_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment method not found")
     return payment_method
 
-@router.get("/payment_method/", response_model=List[PaymentMethodData])  # GET a /payment_method/
-def get_all_payment_methods():
-    """Gets all payment methods."""
-    return crud.get_all()
+@router.get("/payment_method/", response_model=Page[PaymentMethodData])  # GET a /payment_method/
+def get_all_payment_methods(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all payment methods, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/payment_method/customer/{customer_id}", response_model=List[PaymentMethodData])  # GET a /payment_method/customer/{id}
 def get_payment_methods_by_customer(customer_id: int):
     """Gets payment methods for a specific customer."""
-    return crud.get_by_customer(customer_id)
+    return fast_json(crud.get_by_customer(customer_id))
 
 @router.put("/payment_method/update/{payment_method_id}")  # PUT a /payment_method/{id}
 def update_payment_method(payment_method_id: int, data: PaymentMethodData):
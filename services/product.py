@@ -1,17 +1,40 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request, Response
 
-from crud.product import ProductData, ProductCRUD  # Import your Product classes
+from crud.product import ProductData, ProductWithRating, ProductCRUD, AsyncProductCRUD, ProductSearchResult  # Import your Product classes
+from crud.pagination import Page
+from services.etags import conditional, make_etag
+from services.bulk import BulkResult, bulk_create, bulk_openapi
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
+
+IncludeRatingParam = Query(False, description="Also return average_rating and review_count for each product")
 
 router = APIRouter()
 crud = ProductCRUD()
+async_crud = AsyncProductCRUD()
+
+def _list_etag(route: str, *params, include_rating: bool = False) -> Optional[str]:
+    """ETag of a product list: the Product table version plus the route and its parameters.
+
+    Lists with ratings get none, because reviews change them without writing to Product.
+    """
+    if include_rating:
+        return None
+    version = crud.version()
+    return make_etag("product", route, version, *params) if version is not None else None
 
 @router.post("/product/create", response_model=int)
 def create_product(data: ProductData):
     """Creates a new product."""
     return crud.create(data)
 
+@router.post("/product/bulk_create", response_model=BulkResult, openapi_extra=bulk_openapi(ProductData))
+async def bulk_create_products(request: Request):
+    """Creates many products in one transaction from a JSON array or an NDJSON body."""
+    return await bulk_create(request, ProductData, crud.bulk_create)
+
 @router.put("/product/update/{product_id}")
 def update_product(product_id: int, data: ProductData):
     """Updates an existing product."""
@@ -22,42 +45,107 @@ def delete_product(product_id: int):
     """Deletes a product."""
     return crud.delete(product_id)
 
-@router.get("/product/get_by_id/{product_id}", response_model=ProductData)
-def get_product_by_id(product_id: int):
-    """Gets a product by ID."""
-    return crud.get_by_id(product_id)
+@router.get("/product/get_by_id/{product_id}", response_model=ProductWithRating, response_model_exclude_unset=True)
+def get_product_by_id(product_id: int, request: Request, response: Response, include_rating: bool = IncludeRatingParam):
+    """Gets a product by ID; answers 304 if If-None-Match has the ETag of its current row."""
+    product, version = crud.get_by_id_with_version(product_id, include_rating)
+    etag = make_etag("product", product_id, include_rating, version) if version else None
+    return conditional(request, response, etag, lambda: product, encode=None)
 
-@router.get("/product/get_all", response_model=List[ProductData])
-def get_all_products():
-    """Gets all products."""
-    return crud.get_all()
+@router.get("/product/get_all", response_model=Page[ProductWithRating], response_model_exclude_unset=True)
+def get_all_products(request: Request, response: Response, limit: int = LimitParam, after: Optional[int] = AfterParam,
+                     stream: bool = StreamParam, include_rating: bool = IncludeRatingParam):
+    """Gets all products, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return conditional(request, response, _list_etag("get_all", limit, after, include_rating=include_rating),
+                       lambda: crud.get_all(limit, after, include_rating))
 
 @router.get("/product/get_by_name/{product_name}", response_model=List[ProductData])
-def get_product_by_name(product_name: str):
+def get_product_by_name(product_name: str, request: Request, response: Response):
     """Gets products by name."""
-    return crud.get_by_name(product_name)
+    return conditional(request, response, _list_etag("get_by_name", product_name), lambda: crud.get_by_name(product_name))
 
-@router.get("/product/get_by_category/{category_id}", response_model=List[ProductData])
-def get_product_by_category(category_id: int):
+@router.get("/product/search", response_model=ProductSearchResult)
+def search_products(request: Request, response: Response,
+                    q: str = Query(..., min_length=1, description="Words to search for in name and description"),
+                    category_id: Optional[int] = None, min_price: Optional[float] = None,
+                    max_price: Optional[float] = None, limit: int = LimitParam,
+                    offset: int = Query(0, ge=0, description="Number of hits to skip")):
+    """Searches products by name and description, best matches first, with category and price facets."""
+    etag = _list_etag("search", q, category_id, min_price, max_price, limit, offset)
+    return conditional(request, response, etag, lambda: crud.search(q, category_id, min_price, max_price, limit, offset),
+                       encode=None)
+
+@router.get("/product/get_by_category/{category_id}", response_model=List[ProductWithRating], response_model_exclude_unset=True)
+def get_product_by_category(category_id: int, request: Request, response: Response,
+                            include_rating: bool = IncludeRatingParam):
     """Gets products by category."""
-    return crud.get_by_category(category_id)
+    if include_rating:
+        return conditional(request, response, None, lambda: crud.get_by_category(category_id, include_rating))
+    # The cached list carries the version it was read at, which may be older than the table's.
+    products, version = crud.get_by_category_with_version(category_id)
+    etag = make_etag("product", "get_by_category", version, category_id) if version is not None else None
+    return conditional(request, response, etag, lambda: products)
 
 @router.get("/product/get_cheaper/{max_price}", response_model=List[ProductData])
-def get_products_by_price(max_price: float):
+def get_products_by_price(max_price: float, request: Request, response: Response):
     """Gets products with a price lower than or equal to the given value."""
-    return crud.get_cheaper(max_price)
+    return conditional(request, response, _list_etag("get_cheaper", max_price), lambda: crud.get_cheaper(max_price))
 
 @router.get("/product/get_expensive/{min_price}", response_model=List[ProductData])
-def get_products_expensive(min_price: float):
+def get_products_expensive(min_price: float, request: Request, response: Response):
     """Gets products with a price lower than or equal to the given value."""
-    return crud.get_expensive(min_price)
+    return conditional(request, response, _list_etag("get_expensive", min_price), lambda: crud.get_expensive(min_price))
 
 @router.get("/product/get_by_price_ascendent", response_model=List[ProductData])
-def get_products_by_price_ascendent():
+def get_products_by_price_ascendent(request: Request, response: Response):
     """Gets products ordered by price in ascending order."""
-    return crud.get_by_price_ascendent()
+    return conditional(request, response, _list_etag("get_by_price_ascendent"), crud.get_by_price_ascendent)
 
 @router.get("/product/get_by_price_descendent", response_model=List[ProductData])
-def get_products_by_price_descendent():
+def get_products_by_price_descendent(request: Request, response: Response):
     """Gets products ordered by price in descending order."""
-    return crud.get_by_price_descendent()
+    return conditional(request, response, _list_etag("get_by_price_descendent"), crud.get_by_price_descendent)
+
+# Async routes: same queries on the asyncpg pool, so one worker can keep many queries in flight.
+
+@router.get("/async/product/get_by_id/{product_id}", response_model=ProductData)
+async def get_product_by_id_async(product_id: int):
+    """Gets a product by ID without blocking the event loop."""
+    return await async_crud.get_by_id(product_id)
+
+@router.get("/async/product/get_all", response_model=Page[ProductData])
+async def get_all_products_async(limit: int = LimitParam, after: Optional[int] = AfterParam):
+    """Gets all products without blocking the event loop, one page at a time."""
+    return fast_json(await async_crud.get_all(limit, after))
+
+@router.get("/async/product/get_by_name/{product_name}", response_model=List[ProductData])
+async def get_product_by_name_async(product_name: str):
+    """Gets products by name without blocking the event loop."""
+    return fast_json(await async_crud.get_by_name(product_name))
+
+@router.get("/async/product/get_by_category/{category_id}", response_model=List[ProductData])
+async def get_product_by_category_async(category_id: int):
+    """Gets products by category without blocking the event loop."""
+    return fast_json(await async_crud.get_by_category(category_id))
+
+@router.get("/async/product/get_cheaper/{max_price}", response_model=List[ProductData])
+async def get_products_by_price_async(max_price: float):
+    """Gets products with a price lower than or equal to the given value without blocking the event loop."""
+    return fast_json(await async_crud.get_cheaper(max_price))
+
+@router.get("/async/product/get_expensive/{min_price}", response_model=List[ProductData])
+async def get_products_expensive_async(min_price: float):
+    """Gets products with a price higher than or equal to the given value without blocking the event loop."""
+    return fast_json(await async_crud.get_expensive(min_price))
+
+@router.get("/async/product/get_by_price_ascendent", response_model=List[ProductData])
+async def get_products_by_price_ascendent_async():
+    """Gets products ordered by price in ascending order without blocking the event loop."""
+    return fast_json(await async_crud.get_by_price_ascendent())
+
+@router.get("/async/product/get_by_price_descendent", response_model=List[ProductData])
+async def get_products_by_price_descendent_async():
+    """Gets products ordered by price in descending order without blocking the event loop."""
+    return fast_json(await async_crud.get_by_price_descendent())
@@ -2,7 +2,8 @@ from typing import List
 
 from fastapi import APIRouter
 
-from crud.product_recommendations import ProductRecommendationsData, ProductRecommendationsCRUD
+from crud.product_recommendations import ProductRecommendationsData, ProductRecommendationsCRUD, SimilarProduct
+from services.responses import fast_json
 
 router = APIRouter()
 crud = ProductRecommendationsCRUD()
@@ -30,9 +31,14 @@ def get_product_recommendation_by_id(product_recommendation_id: int):
 @router.get("/product_recommendations/customer/{customer_id}", response_model=List[ProductRecommendationsData])
 def get_product_recomendation_by_customer_(customer_id : int):
     """Gets all product recommendations."""
-    return crud.get_by_customer(customer_id)
+    return fast_json(crud.get_by_customer(customer_id))
 
 @router.get("/product_recommendations/product/{product_id}", response_model=List[ProductRecommendationsData])
 def get_product_recomendation_by_product_(product_id : int):
     """Gets all product recommendations."""
-    return crud.get_recommendations_for_product(product_id)
\ No newline at end of file
+    return fast_json(crud.get_recommendations_for_product(product_id))
+
+@router.get("/product_recommendations/similar/{product_id}", response_model=List[SimilarProduct])
+def get_similar_products(product_id: int):
+    """Gets the products most often bought together with a product."""
+    return fast_json(crud.get_similar_products(product_id))
\ No newline at end of file
@@ -0,0 +1,53 @@
+import math
+import os
+import time
+
+from connections.replicas import ReadSession, begin_session, end_session
+
+PRIMARY_COOKIE = "db_read_primary_until"
+
+def _primary_until(scope) -> float:
+    """Reads the pinning deadline from the request's cookie, 0 if absent or invalid."""
+    for name, value in scope["headers"]:
+        if name != b"cookie":
+            continue
+        for pair in value.decode("latin-1").split(";"):
+            key, _, cookie = pair.strip().partition("=")
+            if key == PRIMARY_COOKIE:
+                try:
+                    return float(cookie)
+                except ValueError:
+                    return 0.0
+    return 0.0
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware keeping a client's reads on the primary right after it writes.
+
+    A request that writes gets a cookie holding a deadline `window` seconds
+    ahead; until it passes, that client's read-only queries skip the replicas,
+    which may not have replayed the write yet. Does nothing unless
+    PG_REPLICA_DSNS is set.
+    """
+
+    def __init__(self, app, window: float = None):
+        self.app = app
+        self.window = window if window is not None else float(os.getenv("PG_READ_YOUR_WRITES_SECONDS", "5"))
+        self.enabled = bool(os.getenv("PG_REPLICA_DSNS", "").strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+        # The client can send any deadline; never trust one beyond the window.
+        session = ReadSession(min(_primary_until(scope), time.time() + self.window))
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and session.wrote:
+                cookie = f"{PRIMARY_COOKIE}={time.time() + self.window:.3f}; Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        token = begin_session(session)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            end_session(token)
@@ -0,0 +1,48 @@
+import json
+import os
+from decimal import Decimal
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder.
+    orjson = None
+
+# FAST_JSON=0 hands results back to FastAPI for response_model validation instead.
+FAST_JSON = os.getenv("FAST_JSON", "1") != "0"
+
+def _default(value: Any) -> Any:
+    """Encodes the types orjson does not know: NUMERIC columns and models built by the CRUD mappers."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encodes CRUD results (dicts, lists, models, Decimal, dates) to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(jsonable_encoder(content, custom_encoder={Decimal: float})).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """JSON response encoded straight from CRUD results, without response_model validation."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def fast_json(content: Any):
+    """Returns CRUD results as they are built, encoded once.
+
+    The CRUD classes map each database row to the route's response model
+    shape, and the database already enforces the column types, so validating
+    the payload again is pure overhead on large lists. Routes keep their
+    response_model for the OpenAPI schema; returning a Response makes FastAPI
+    skip validating and serializing it.
+    """
+    return FastJSONResponse(content) if FAST_JSON else content
@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, status
 
 from crud.returns import ReturnsData, ReturnsCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = ReturnsCRUD()
@@ -23,20 +26,22 @@ def get_return_by_id(returns_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Return not found")
     return return_item
 
-@router.get("/returns/", response_model=List[ReturnsData])
-def get_all_returns():
-    """Gets all returns."""
-    return crud.get_all()
+@router.get("/returns/", response_model=Page[ReturnsData])
+def get_all_returns(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all returns, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/returns/order_item/{order_item_id}", response_model=List[ReturnsData])
 def get_returns_by_order_item(order_item_id: int):
     """Gets returns for a specific order item."""
-    return crud.get_by_order_item(order_item_id)
+    return fast_json(crud.get_by_order_item(order_item_id))
 
 @router.get("/returns/status/{return_status}", response_model=List[ReturnsData])
 def get_returns_by_status(return_status: str):
     """Gets returns by status."""
-    return crud.get_by_status(return_status)
+    return fast_json(crud.get_by_status(return_status))
 
 @router.put("/returns/update/{returns_id}")
 def update_return(returns_id: int, data: ReturnsData):
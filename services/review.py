@@ -1,8 +1,12 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Request
 
-from crud.review import ReviewData, ReviewCRUD
+from crud.review import ReviewData, ReviewCRUD, RatingSummary
+from crud.pagination import Page
+from services.bulk import BulkResult, bulk_create, bulk_openapi
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = ReviewCRUD()
@@ -15,6 +19,11 @@ def create_review(data: ReviewData):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create review")
     return review_id
 
+@router.post("/review/bulk_create", response_model=BulkResult, openapi_extra=bulk_openapi(ReviewData))
+async def bulk_create_reviews(request: Request):
+    """Creates many reviews in one transaction from a JSON array or an NDJSON body."""
+    return await bulk_create(request, ReviewData, crud.bulk_create)
+
 @router.get("/review/{review_id}", response_model=ReviewData)
 def get_review_by_id(review_id: int):
     """Gets a review by ID."""
@@ -23,20 +32,30 @@ def get_review_by_id(review_id: int):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
     return review
 
-@router.get("/review/", response_model=List[ReviewData])
-def get_all_reviews():
-    """Gets all reviews."""
-    return crud.get_all()
+@router.get("/review/", response_model=Page[ReviewData])
+def get_all_reviews(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all reviews, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/review/product/{product_id}", response_model=List[ReviewData])
 def get_reviews_by_product(product_id: int):
     """Gets reviews for a specific product."""
-    return crud.get_by_product(product_id)
+    return fast_json(crud.get_by_product(product_id))
+
+@router.get("/review/product/{product_id}/summary", response_model=RatingSummary)
+def get_review_summary(product_id: int):
+    """Gets the review count, average rating and rating histogram of a product."""
+    summary = crud.get_summary(product_id)
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read rating summary")
+    return summary
 
 @router.get("/review/customer/{customer_id}", response_model=List[ReviewData])
 def get_reviews_by_customer(customer_id: int):
     """Gets reviews for a specific customer."""
-    return crud.get_by_customer(customer_id)
+    return fast_json(crud.get_by_customer(customer_id))
 
 @router.put("/review/{review_id}")
 def update_review(review_id: int, data: ReviewData):
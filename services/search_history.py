@@ -1,8 +1,12 @@
+from datetime import date
 from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, status
 
 from crud.search_history import SearchHistoryData, SearchHistoryCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = SearchHistoryCRUD()
@@ -15,6 +19,23 @@ def create_search_history(data: SearchHistoryData):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create search history entry")
     return search_history_id
 
+@router.post("/search_history/log", status_code=status.HTTP_202_ACCEPTED)
+def log_search(data: SearchHistoryData):
+    """Queues a search history entry; it is inserted with the next batch."""
+    if not crud.log(data):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Search history buffer is full")
+    return {"message": "Search history entry queued"}
+
+@router.get("/search_history/buffer/stats")
+def get_search_history_buffer_stats():
+    """Gets the queued, written and dropped counters of the search history buffer."""
+    return crud.buffer.get_stats()
+
+@router.get("/search_history/date_range", response_model=Page[SearchHistoryData])
+def get_search_history_by_date_range(since: date, until: date, limit: int = LimitParam, after: Optional[int] = AfterParam):
+    """Gets the entries recorded from `since` to `until` (both included), one page at a time."""
+    return fast_json(crud.get_by_date_range(since, until, limit, after))
+
 @router.get("/search_history/{search_history_id}", response_model=SearchHistoryData)  # GET to /search_history/{id}
 def get_search_history_by_id(search_history_id: int):
     """Gets a search history entry by ID."""
@@ -24,15 +45,17 @@ def get_search_history_by_id(search_history_id: int):
     return search_history_entry
 
 
-@router.get("/search_history/", response_model=List[SearchHistoryData])  # GET to /search_history/
-def get_all_search_history():
-    """Gets all search history entries."""
-    return crud.get_all()
+@router.get("/search_history/", response_model=Page[SearchHistoryData])  # GET to /search_history/
+def get_all_search_history(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all search history entries, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/search_history/customer/{customer_id}", response_model=List[SearchHistoryData]) # GET to /search_history/customer/{id}
 def get_search_history_by_customer(customer_id: int):
     """Gets all search history entries for a customer."""
-    return crud.get_by_customer(customer_id)
+    return fast_json(crud.get_by_customer(customer_id))
 
 @router.put("/search_history/{search_history_id}")  # PUT to /search_history/{id}
 def update_search_history(search_history_id: int, data: SearchHistoryData):
@@ -1,12 +1,20 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from crud.seller import SellerData, SellerCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.etags import conditional, make_etag
 
 router = APIRouter()
 crud = SellerCRUD()
 
+def _list_etag(route: str, *params) -> Optional[str]:
+    """ETag of a seller list: the Seller table version plus the route and its parameters."""
+    version = crud.version()
+    return make_etag("seller", route, version, *params) if version is not None else None
+
 @router.post("/seller/create", response_model=int)
 def create_seller(data: SellerData):
     """Creates a new seller."""
@@ -23,21 +31,29 @@ def delete_seller(seller_id: int):
     return crud.delete(seller_id)
 
 @router.get("/seller/get_by_id/{seller_id}", response_model=SellerData)
-def get_seller_by_id(seller_id: int):
-    """Gets a seller by ID."""
-    return crud.get_by_id(seller_id)
-
-@router.get("/seller/get_all", response_model=List[SellerData])
-def get_all_sellers():
-    """Gets all sellers."""
-    return crud.get_all()
+def get_seller_by_id(seller_id: int, request: Request, response: Response):
+    """Gets a seller by ID; answers 304 if If-None-Match has the ETag of its current row."""
+    seller, version = crud.get_by_id_with_version(seller_id)
+    etag = make_etag("seller", seller_id, version) if version else None
+    return conditional(request, response, etag, lambda: seller, encode=None)
+
+@router.get("/seller/get_all", response_model=Page[SellerData])
+def get_all_sellers(request: Request, response: Response, limit: int = LimitParam,
+                    after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all sellers, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    etag = _list_etag("get_all", limit, after)
+    return conditional(request, response, etag, lambda: crud.get_all(limit, after))
 
 @router.get("/seller/get_by_name/{seller_name}", response_model=List[SellerData])
-def get_seller_by_name(seller_name: str):
+def get_seller_by_name(seller_name: str, request: Request, response: Response):
     """Gets sellers by name."""
-    return crud.get_by_name(seller_name)
+    etag = _list_etag("get_by_name", seller_name)
+    return conditional(request, response, etag, lambda: crud.get_by_name(seller_name))
 
 @router.get("/seller/get_by_rating/{seller_rating}", response_model=List[SellerData])
-def get_seller_by_rating(seller_rating: str):
+def get_seller_by_rating(seller_rating: str, request: Request, response: Response):
     """Gets sellers by rating."""
-    return crud.get_by_rating(seller_rating)
\ No newline at end of file
+    etag = _list_etag("get_by_rating", seller_rating)
+    return conditional(request, response, etag, lambda: crud.get_by_rating(seller_rating))
\ No newline at end of file
@@ -1,8 +1,11 @@
-from typing import List
+from typing import List, Optional
 from datetime import date 
 from fastapi import APIRouter
 
 from crud.shipping import ShippingData, ShippingCRUD
+from crud.pagination import Page
+from services.pagination import LimitParam, AfterParam, StreamParam, ndjson_response
+from services.responses import fast_json
 
 router = APIRouter()
 crud = ShippingCRUD()
@@ -27,17 +30,19 @@ def get_shipping_by_id(shipping_id: int):
     """Gets a shipping entry by ID."""
     return crud.get_by_id(shipping_id)
 
-@router.get("/shipping/get_all", response_model=List[ShippingData])
-def get_all_shipping():
-    """Gets all shipping entries."""
-    return crud.get_all()
+@router.get("/shipping/get_all", response_model=Page[ShippingData])
+def get_all_shipping(limit: int = LimitParam, after: Optional[int] = AfterParam, stream: bool = StreamParam):
+    """Gets all shipping entries, one page at a time or as an NDJSON stream."""
+    if stream:
+        return ndjson_response(crud.stream_all())
+    return fast_json(crud.get_all(limit, after))
 
 @router.get("/shipping/get_by_shipping_company/{shipping_company}", response_model=List[ShippingData])
 def get_shipping_by_shipping_company(shipping_company: str):
     """Gets all shipping entries."""
-    return crud.get_by_shipping_company(shipping_company)
+    return fast_json(crud.get_by_shipping_company(shipping_company))
 
 @router.get("/shipping/get_by_shipping_date/{shipping_date}", response_model=List[ShippingData])
 def get_shipping_by_shipping_date(shipping_date: date):
     """Gets all shipping entries."""
-    return crud.get_by_shipping_date(shipping_date)
\ No newline at end of file
+    return fast_json(crud.get_by_shipping_date(shipping_date))
\ No newline at end of file
@@ -1,8 +1,8 @@
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
 
-from crud.shopping_cart import ShoppingCartData, ShoppingCartCRUD
+from crud.shopping_cart import ShoppingCartData, ShoppingCartCRUD, CartView
 
 router = APIRouter()
 crud = ShoppingCartCRUD()
@@ -10,4 +10,14 @@ crud = ShoppingCartCRUD()
 @router.post("/shopping_cart/create", response_model=int)
 def create_shopping_cart(data: ShoppingCartData):
     """Creates a new shopping cart."""
-    return crud.create(data)
\ No newline at end of file
+    return crud.create(data)
+
+@router.get("/shopping_cart/{shopping_cart_id}/view", response_model=CartView)
+def view_shopping_cart(shopping_cart_id: int):
+    """Gets the products in a cart with names, prices, active offers, line totals and the subtotal."""
+    cart = crud.get_view(shopping_cart_id)
+    if cart is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shopping cart not found")
+    if "error" in cart:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=cart["error"])
+    return cart
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+
+from connections.slow_query_log import slow_query_log
+from services.admin import require_admin
+
+# Captures contain SQL, plans and possibly parameter values: admins only.
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/admin/slow_queries")
+def get_slow_queries():
+    """Gets the captured slow queries, newest first, with their plans and the log counters."""
+    return {"stats": slow_query_log.get_stats(), "queries": slow_query_log.get_entries()}
+
+@router.delete("/admin/slow_queries")
+def clear_slow_queries():
+    """Empties the slow query log."""
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
@@ -0,0 +1,285 @@
+"""Fixtures shared by the tests, which run against real database servers.
+
+The servers are the ones the PG_* and MYSQL_* variables point at, as for the
+API. The session creates a scratch database on each, PG_TEST_DBNAME and
+MYSQL_TEST_DBNAME (amazon_test by default), from postgres_init.sql and the
+migrations or from mysql_init.sql, and drops it at the end. Every test starts
+from empty tables and an empty cache. The tests are skipped when the server
+cannot be reached, or fail if TEST_REQUIRE_SERVERS=1, as in CI.
+
+Tests run on Postgres. The CRUD and route tests marked with `both_backends`
+also run on MySQL: their `db` fixture then connects to MySQL, and the CRUD
+objects, those the routers created at import time included, use it too.
+
+A copy of the Postgres database, PG_TEST_DBNAME_replica, stands in for a
+replica that has not replayed anything yet: the `replica` fixture routes
+reads to it, and it only receives the rows a test seeds into both databases.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+import psycopg2
+import pytest
+
+TEST_DBNAME = os.getenv("PG_TEST_DBNAME", "amazon_test")
+REPLICA_DBNAME = TEST_DBNAME + "_replica"
+INIT_SQL = Path(__file__).resolve().parent.parent / "inicialization" / "postgres_init.sql"
+MYSQL_TEST_DBNAME = os.getenv("MYSQL_TEST_DBNAME", "amazon_test")
+MYSQL_INIT_SQL = INIT_SQL.with_name("mysql_init.sql")
+
+REQUIRE_SERVERS = os.getenv("TEST_REQUIRE_SERVERS", "0") == "1"
+BACKENDS = ["postgresql", "mysql"]
+both_backends = pytest.mark.parametrize("backend", BACKENDS, indirect=True)
+
+# The CRUD classes read their settings when they are created, at import time.
+os.environ["PG_DBNAME"] = TEST_DBNAME
+os.environ["MYSQL_DBNAME"] = MYSQL_TEST_DBNAME
+os.environ.pop("PG_DSN", None)
+os.environ.pop("PG_REPLICA_DSNS", None)
+os.environ["DB_BACKEND"] = "postgresql"
+os.environ["CACHE_BACKEND"] = "local"
+os.environ["SLOW_QUERY_SAMPLE_RATE"] = "0"
+os.environ["PARTITION_CHECK_HOURS"] = "0"
+
+def server_connection(dbname: str = "postgres"):
+    """Opens an autocommit connection to the test server."""
+    connection = psycopg2.connect(
+        dbname=dbname,
+        user=os.getenv("PG_USER", "postgres"),
+        password=os.getenv("PG_PASSWORD", "admin123"),
+        host=os.getenv("PG_HOST", "localhost"),
+        port=os.getenv("PG_PORT", "5432"),
+    )
+    connection.autocommit = True
+    return connection
+
+def mysql_server_connection(dbname: str = None):
+    """Opens an autocommit connection to the MySQL test server, with buffered cursors."""
+    from connections.mysql_connection import mysql_driver
+    return mysql_driver().connect(
+        database=dbname,
+        user=os.getenv("MYSQL_USER", "usql"),
+        password=os.getenv("MYSQL_PASSWORD", "admin123"),
+        host=os.getenv("MYSQL_HOST", "localhost"),
+        port=os.getenv("MYSQL_PORT", "3306"),
+        autocommit=True,
+        buffered=True,
+    )
+
+def insert(db, query: str, values, key: str) -> int:
+    """Runs an INSERT of one row on a `db` connection of either engine and returns its generated `key`."""
+    from connections.dialect import MYSQL, POSTGRESQL
+    dialect = POSTGRESQL if isinstance(db, psycopg2.extensions.connection) else MYSQL
+    with db.cursor() as cursor:
+        return dialect.insert(cursor, query, values, key)
+
+def _unreachable(message: str):
+    """Skips the test, or fails it when TEST_REQUIRE_SERVERS=1."""
+    if REQUIRE_SERVERS:
+        pytest.fail(message)
+    pytest.skip(message)
+
+def _drop_database(cursor, dbname: str):
+    cursor.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE);')
+
+def _mysql_statements(script: str) -> list:
+    """Splits mysql_init.sql into statements, following its DELIMITER commands as the mysql client does."""
+    statements, lines, delimiter = [], [], ";"
+    for line in script.splitlines():
+        command = re.match(r"\s*DELIMITER\s+(\S+)\s*$", line, re.IGNORECASE)
+        if command:
+            delimiter = command.group(1)
+            continue
+        lines.append(line)
+        if line.rstrip().endswith(delimiter):
+            statement = "\n".join(lines).rstrip()[:-len(delimiter)].strip()
+            lines = []
+            # The schema is created in the scratch database instead of amazon.
+            if statement and not re.match(r"(?:--.*\n\s*)*(CREATE DATABASE|USE)\b", statement, re.IGNORECASE):
+                statements.append(statement)
+    return statements
+
+@pytest.fixture(scope="session")
+def database():
+    """Creates the test database with the full schema; yields its name."""
+    try:
+        admin = server_connection()
+    except psycopg2.OperationalError as e:
+        _unreachable(f"PostgreSQL is not reachable: {e}")
+    with admin.cursor() as cursor:
+        _drop_database(cursor, TEST_DBNAME)
+        cursor.execute(f'CREATE DATABASE "{TEST_DBNAME}";')
+    schema = INIT_SQL.read_text(encoding="utf-8").replace("CREATE DATABASE amazon;", "", 1)
+    with server_connection(TEST_DBNAME) as connection, connection.cursor() as cursor:
+        cursor.execute(schema)
+    connection.close()
+
+    from connections import PostgresDatabaseConnection, close_pool
+    from inicialization.migrate import migrate
+    migrate(PostgresDatabaseConnection())
+    close_pool()  # The replica database is copied from this one, which needs it idle
+    with admin.cursor() as cursor:
+        _drop_database(cursor, REPLICA_DBNAME)
+        cursor.execute(f'CREATE DATABASE "{REPLICA_DBNAME}" TEMPLATE "{TEST_DBNAME}";')
+    yield TEST_DBNAME
+
+    from crud.write_buffer import close_buffers
+    close_buffers()
+    close_pool()
+    with admin.cursor() as cursor:
+        _drop_database(cursor, TEST_DBNAME)
+        _drop_database(cursor, REPLICA_DBNAME)
+    admin.close()
+
+def _truncate_all(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT string_agg(format('%I', c.relname), ', ')
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+              AND NOT c.relispartition AND c.relname <> 'schema_migrations';
+        """)
+        cursor.execute(f"TRUNCATE {cursor.fetchone()[0]} RESTART IDENTITY CASCADE;")
+
+@pytest.fixture(scope="session")
+def mysql_database():
+    """Creates the MySQL test database with the schema of mysql_init.sql; yields its name."""
+    try:
+        admin = mysql_server_connection()
+    except Exception as e:
+        _unreachable(f"MySQL is not reachable: {e}")
+    cursor = admin.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{MYSQL_TEST_DBNAME}`;")
+    cursor.execute(f"CREATE DATABASE `{MYSQL_TEST_DBNAME}`;")
+    cursor.execute(f"USE `{MYSQL_TEST_DBNAME}`;")
+    for statement in _mysql_statements(MYSQL_INIT_SQL.read_text(encoding="utf-8")):
+        cursor.execute(statement)
+    yield MYSQL_TEST_DBNAME
+
+    from connections import close_mysql_pool
+    close_mysql_pool()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{MYSQL_TEST_DBNAME}`;")
+    cursor.close()
+    admin.close()
+
+def _truncate_all_mysql(connection):
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_type = 'BASE TABLE';
+    """)
+    tables = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
+    for table in tables:
+        cursor.execute(f"TRUNCATE TABLE `{table}`;")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
+    cursor.close()
+
+def _use_mysql(monkeypatch):
+    """Points DB_BACKEND, and the CRUD objects the routers created at import time, at MySQL."""
+    import main  # noqa: F401 -- imports every router, and so creates their CRUD objects
+    from connections import MySQLDatabaseConnection, PostgresDatabaseConnection
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    connection = MySQLDatabaseConnection()
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("services."):
+            continue
+        for value in list(vars(module).values()):
+            if isinstance(getattr(value, "db_connection", None), PostgresDatabaseConnection):
+                monkeypatch.setattr(value, "db_connection", connection)
+
+@pytest.fixture
+def backend(request):
+    """The engine of the test: "postgresql", or each of BACKENDS in tests marked with `both_backends`."""
+    return getattr(request, "param", "postgresql")
+
+@pytest.fixture
+def db(backend, request, monkeypatch):
+    """An autocommit connection to the test database, with every table emptied first."""
+    from crud.cache import get_cache
+    if backend == "mysql":
+        from connections import close_mysql_pool
+        connection = mysql_server_connection(request.getfixturevalue("mysql_database"))
+        _use_mysql(monkeypatch)
+        _truncate_all_mysql(connection)
+        get_cache().clear()
+        yield connection
+        close_mysql_pool()  # Its idle connections would hold metadata locks that TRUNCATE waits for
+        connection.close()
+        return
+    connection = server_connection(request.getfixturevalue("database"))
+    _truncate_all(connection)
+    get_cache().clear()
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def client(db):
+    """A client for the API, without its lifespan: the pools open on first use."""
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app, raise_server_exceptions=False)
+
+@pytest.fixture
+def catalog(db):
+    """A category, a seller and three products, as a dict of their IDs."""
+    category_id = insert(db, "INSERT INTO Category (category_name) VALUES ('Books');", (), "category_id")
+    seller_id = insert(db, "INSERT INTO Seller (seller_name) VALUES ('Acme');", (), "seller_id")
+    products = [
+        insert(db, """
+            INSERT INTO Product (product_name, price, quantity_available, category_id, seller_id)
+            VALUES (%s, %s, %s, %s, %s);
+        """, (name, price, quantity, category_id, seller_id), "product_id")
+        for name, price, quantity in [("Book A", "10.00", 5), ("Book B", "20.00", 5), ("Book C", "30.00", 1)]
+    ]
+    return {"category_id": category_id, "seller_id": seller_id, "products": products}
+
+@pytest.fixture
+def customer(db):
+    """A customer with a payment method, a shipping and a shopping cart, as a dict of their IDs."""
+    customer_id = insert(db, """
+        INSERT INTO Customer (full_name, email, shipping_address, phone, registration_date)
+        VALUES ('Ana', 'ana@example.com', 'Calle 1', '555', '2024-01-01');
+    """, (), "customer_id")
+    payment_method_id = insert(db, "INSERT INTO Payment_Method (payment_type, customer_id) VALUES ('card', %s);",
+                               (customer_id,), "payment_method_id")
+    shipping_id = insert(db, "INSERT INTO Shipping (shipping_company) VALUES ('Post');", (), "shipping_id")
+    cart_id = insert(db, "INSERT INTO Shopping_Cart (customer_id) VALUES (%s);", (customer_id,), "shopping_cart_id")
+    return {"customer_id": customer_id, "payment_method_id": payment_method_id,
+            "shipping_id": shipping_id, "cart_id": cart_id}
+
+@pytest.fixture
+def replica(db, monkeypatch):
+    """Routes read-only queries to the replica database, emptied; yields a `seed` function.
+
+    `seed(sql, vars)` runs a statement on both the primary and the replica,
+    for the rows the replica is supposed to have replayed already.
+    """
+    from connections import close_pool
+    from main import app
+    connection = server_connection(REPLICA_DBNAME)
+    _truncate_all(connection)
+    dsn = " ".join([
+        f"dbname={REPLICA_DBNAME}",
+        f"user={os.getenv('PG_USER', 'postgres')}",
+        f"password={os.getenv('PG_PASSWORD', 'admin123')}",
+        f"host={os.getenv('PG_HOST', 'localhost')}",
+        f"port={os.getenv('PG_PORT', '5432')}",
+    ])
+    monkeypatch.setenv("PG_REPLICA_DSNS", dsn)
+    close_pool()
+    app.middleware_stack = None  # Rebuilt on the next request, with read routing enabled
+
+    def seed(sql: str, vars=None):
+        for target in (db, connection):
+            with target.cursor() as cursor:
+                cursor.execute(sql, vars)
+
+    yield seed
+    monkeypatch.delenv("PG_REPLICA_DSNS")
+    close_pool()
+    app.middleware_stack = None
+    connection.close()
@@ -0,0 +1,21 @@
+import asyncio
+
+from connections.async_pg_connection import AsyncPostgresDatabaseConnection, close_async_pool
+
+def _backends(db) -> int:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid();")
+        return cursor.fetchone()[0]
+
+async def _read(connection: AsyncPostgresDatabaseConnection):
+    async with connection.acquire() as pg:
+        return await pg.fetchval("SELECT 1;")
+
+def test_pool_of_a_finished_event_loop_is_terminated(db):
+    connection = AsyncPostgresDatabaseConnection()
+    before = _backends(db)
+    for _ in range(3):
+        assert asyncio.run(_read(connection)) == 1
+    # Only the pool of the last loop is still connected.
+    assert _backends(db) - before == 1
+    asyncio.run(close_async_pool())
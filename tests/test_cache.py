@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from conftest import both_backends, insert
+from crud.cache import _MISSING, InMemoryClient, LRUCache, SharedCache
+from crud.category import CategoryCRUD, CategoryData
+from crud.product import ProductCRUD, ProductData
+
+def _set_price_behind_the_cache(db, product_id: int, price: str):
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE Product SET price = %s WHERE product_id = %s;", (price, product_id))
+
+def _product_data(crud, product_id: int, **changes) -> ProductData:
+    return ProductData(**{**crud.get_by_id(product_id), **changes})
+
+@both_backends
+def test_reads_are_served_from_the_cache(db, catalog):
+    crud = ProductCRUD()
+    product_id = catalog["products"][0]
+    assert crud.get_by_id(product_id)["price"] == Decimal("10.00")
+    _set_price_behind_the_cache(db, product_id, "99.00")
+    assert crud.get_by_id(product_id)["price"] == Decimal("10.00")
+
+@both_backends
+def test_update_invalidates_the_product(db, catalog):
+    crud = ProductCRUD()
+    product_id = catalog["products"][0]
+    crud.get_by_id(product_id)
+    assert crud.update(product_id, _product_data(crud, product_id, price=12.5))
+    assert crud.get_by_id(product_id)["price"] == Decimal("12.50")
+
+@both_backends
+def test_moving_a_product_invalidates_both_category_lists(db, catalog):
+    crud = ProductCRUD()
+    product_id = catalog["products"][0]
+    other = insert(db, "INSERT INTO Category (category_name) VALUES ('Music');", (), "category_id")
+    assert len(crud.get_by_category(catalog["category_id"])) == 3
+    assert crud.get_by_category(other) == []
+    crud.update(product_id, _product_data(crud, product_id, category_id=other))
+    assert len(crud.get_by_category(catalog["category_id"])) == 2
+    assert [product["product_name"] for product in crud.get_by_category(other)] == ["Book A"]
+
+@both_backends
+def test_delete_invalidates_the_product_and_its_category_list(db, catalog):
+    crud = ProductCRUD()
+    product_id = catalog["products"][2]
+    crud.get_by_id(product_id)
+    assert len(crud.get_by_category(catalog["category_id"])) == 3
+    assert crud.delete(product_id)
+    assert crud.get_by_id(product_id) is None
+    assert len(crud.get_by_category(catalog["category_id"])) == 2
+
+@both_backends
+def test_category_update_invalidates_the_category(db, catalog):
+    crud = CategoryCRUD()
+    crud.get_by_id(catalog["category_id"])
+    crud.update(catalog["category_id"], CategoryData(category_name="Novels"))
+    assert crud.get_by_id(catalog["category_id"]).category_name == "Novels"
+
+@both_backends
+def test_invalidation_reaches_other_workers_through_the_shared_cache(db, catalog):
+    shared = SharedCache(InMemoryClient())
+    worker_a, worker_b = ProductCRUD(), ProductCRUD()
+    worker_a.cache = worker_b.cache = shared
+    product_id = catalog["products"][0]
+    assert worker_b.get_by_id(product_id)["price"] == Decimal("10.00")
+    worker_a.update(product_id, _product_data(worker_a, product_id, price=11))
+    assert worker_b.get_by_id(product_id)["price"] == Decimal("11.00")
+
+def test_lru_cache_evicts_and_expires():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is _MISSING and cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+    expiring = LRUCache(ttl=-1)
+    expiring.set("a", 1)
+    assert expiring.get("a") is _MISSING
+    assert expiring.get_stats()["expirations"] == 1
@@ -0,0 +1,104 @@
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+from conftest import both_backends, insert
+from crud.orders import CheckoutData, CheckoutItem, OrdersCRUD
+from crud.product import ProductCRUD
+
+pytestmark = both_backends
+
+def _checkout(customer, *items) -> dict:
+    return OrdersCRUD().checkout(CheckoutData(
+        customer_id=customer["customer_id"],
+        payment_method_id=customer["payment_method_id"],
+        shipping_id=customer["shipping_id"],
+        items=[CheckoutItem(product_id=product_id, quantity=quantity) for product_id, quantity in items],
+    ))
+
+def _stock(db, product_id: int) -> int:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT quantity_available FROM Product WHERE product_id = %s;", (product_id,))
+        return cursor.fetchone()[0]
+
+def _count(db, table: str) -> int:
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table};")
+        return cursor.fetchone()[0]
+
+def test_checkout_decrements_stock_and_stores_the_total(db, catalog, customer):
+    book_a, book_b, _ = catalog["products"]
+    result = _checkout(customer, (book_a, 2), (book_b, 1))
+    assert result["total_amount"] == Decimal("40.00")
+    assert _stock(db, book_a) == 3 and _stock(db, book_b) == 4
+    with db.cursor() as cursor:
+        cursor.execute("SELECT product_id, quantity, price_at_purchase FROM Order_Items WHERE orders_id = %s ORDER BY order_item_id;",
+                       (result["orders_id"],))
+        assert cursor.fetchall() == [(book_a, 2, Decimal("10.00")), (book_b, 1, Decimal("20.00"))]
+
+def test_insufficient_stock_rejects_the_whole_order(db, catalog, customer):
+    book_a, _, book_c = catalog["products"]
+    result = _checkout(customer, (book_a, 1), (book_c, 2))
+    assert result["unavailable_products"] == [book_c]
+    assert _stock(db, book_a) == 5 and _stock(db, book_c) == 1
+    assert _count(db, "Orders") == 0 and _count(db, "Order_Items") == 0
+
+def test_repeated_lines_are_checked_against_their_combined_quantity(db, catalog, customer):
+    book_a = catalog["products"][0]
+    assert _checkout(customer, (book_a, 3), (book_a, 3))["unavailable_products"] == [book_a]
+    assert _stock(db, book_a) == 5
+
+def test_unknown_product_is_unavailable(db, catalog, customer):
+    assert _checkout(customer, (catalog["products"][0], 1), (999999, 1))["unavailable_products"] == [999999]
+    assert _count(db, "Orders") == 0
+
+def test_concurrent_checkouts_never_oversell(db, catalog, customer):
+    book_c = catalog["products"][2]  # One unit in stock
+    start = threading.Barrier(8)
+    results = []
+
+    def buy():
+        start.wait()
+        results.append(_checkout(customer, (book_c, 1)))
+
+    threads = [threading.Thread(target=buy) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum("orders_id" in result for result in results) == 1
+    assert sum(result.get("unavailable_products") == [book_c] for result in results) == 7
+    assert _stock(db, book_c) == 0
+    assert _count(db, "Order_Items") == 1
+
+def test_checkout_invalidates_the_cached_stock(db, catalog, customer):
+    products = ProductCRUD()
+    book_a = catalog["products"][0]
+    assert products.get_by_id(book_a)["quantity_available"] == 5
+    _checkout(customer, (book_a, 2))
+    assert products.get_by_id(book_a)["quantity_available"] == 3
+
+def test_checkout_route_answers_409_when_out_of_stock(client, catalog, customer):
+    body = {"customer_id": customer["customer_id"], "payment_method_id": customer["payment_method_id"],
+            "shipping_id": customer["shipping_id"], "items": [{"product_id": catalog["products"][2], "quantity": 5}]}
+    response = client.post("/orders/checkout", json=body)
+    assert response.status_code == 409
+    assert response.json()["detail"]["unavailable_products"] == [catalog["products"][2]]
+    body["items"][0]["quantity"] = 1
+    assert client.post("/orders/checkout", json=body).status_code == 201
+
+def test_discount_larger_than_the_line_gives_the_same_total_everywhere(client, db, catalog, customer):
+    book_a, book_b, _ = catalog["products"]
+    coupon_id = insert(db, "INSERT INTO Coupons (discount_code, discount_value, expiration_date) VALUES ('BIG', 15, %s);",
+                       (date.today() + timedelta(days=1),), "coupons_id")
+    result = OrdersCRUD().checkout(CheckoutData(
+        customer_id=customer["customer_id"], payment_method_id=customer["payment_method_id"], shipping_id=customer["shipping_id"],
+        items=[CheckoutItem(product_id=book_a, quantity=1, coupon_id=coupon_id), CheckoutItem(product_id=book_b, quantity=1)],
+    ))
+    assert result["total_amount"] == Decimal("20.00")
+    order = client.get(f"/orders/get_by_id/{result['orders_id']}").json()
+    assert order["calculated_total"] == order["total_amount"] == 20
+    assert [line["total_price"] for line in order["order_items"]] == [0, 20]
+    with db.cursor() as cursor:
+        cursor.execute("SELECT calculated_total FROM order_totals WHERE orders_id = %s;", (result["orders_id"],))
+        assert cursor.fetchone()[0] == Decimal("20.00")
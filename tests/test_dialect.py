@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from conftest import both_backends
+from connections import MySQLDatabaseConnection, close_mysql_pool, get_database_connection
+from connections.dialect import MYSQL
+from crud.bulk import bulk_insert
+from crud.orders import _order_with_items_from_row
+
+class AutoIncrementCursor:
+    """Stands in for a MySQL cursor: hands out the given AUTO_INCREMENT keys, one per inserted row."""
+
+    def __init__(self, lock_mode: int, increment: int, keys):
+        self.settings = (lock_mode, increment)
+        self.keys = iter(keys)
+        self.statements = []
+        self.lastrowid = None
+
+    def execute(self, query: str, values=None):
+        self.statements.append(query)
+        if query.startswith("INSERT"):
+            rows = query.count("(") - 1  # The column list, then one group of placeholders per row
+            allocated = [next(self.keys) for _ in range(rows)]
+            self.lastrowid = allocated[0]
+
+    def fetchone(self):
+        return self.settings
+
+ROWS = [("Books",), ("Music",), ("Games",)]
+
+def test_interleaved_keys_are_read_back_row_by_row():
+    # Another session took 11 and 12 while these rows were being inserted.
+    cursor = AutoIncrementCursor(lock_mode=2, increment=1, keys=[10, 13, 14])
+    assert MYSQL.insert_rows(cursor, "Category", ["category_name"], "category_id", ROWS, 1000) == [10, 13, 14]
+    assert len([query for query in cursor.statements if query.startswith("INSERT")]) == len(ROWS)
+
+def test_consecutive_keys_step_by_the_increment():
+    cursor = AutoIncrementCursor(lock_mode=1, increment=2, keys=[5, 7, 9, 11])
+    assert MYSQL.insert_rows(cursor, "Category", ["category_name"], "category_id", ROWS + [("Films",)], 3) == [5, 7, 9, 11]
+    assert len([query for query in cursor.statements if query.startswith("INSERT")]) == 2
+
+def test_order_items_aggregated_as_a_binary_string_are_parsed():
+    # mysql-connector may return the GROUP_CONCAT of ORDERS_WITH_ITEMS_QUERY as bytes.
+    row = (20, "Pending", 1, 1, 1, b'[{"product_id": 3, "total_price": 20.00}]', 20, None, 7)
+    assert _order_with_items_from_row(row)["order_items"] == [{"product_id": 3, "total_price": 20.0}]
+
+@both_backends
+def test_width_bucket_of_null_is_null(db):
+    bucket, bounds = get_database_connection().dialect.width_bucket("CAST(%s AS DECIMAL(10, 2))", [10, 50, 100])
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT {bucket};", [75] + bounds)
+        assert cursor.fetchone() == (2,)
+        cursor.execute(f"SELECT {bucket};", [None] + bounds)
+        assert cursor.fetchone() == (None,)
+
+@pytest.fixture
+def mysql(mysql_database):
+    """The MySQL test database, with the schema of mysql_init.sql."""
+    connection = MySQLDatabaseConnection()
+    yield connection
+    with connection.acquire() as mysql_connection:
+        cursor = mysql_connection.cursor()
+        cursor.execute("DELETE FROM Category WHERE category_name LIKE 'bulk-test-%';")
+        mysql_connection.commit()
+        cursor.close()
+    close_mysql_pool()
+
+def test_concurrent_bulk_inserts_return_their_own_keys(mysql):
+    results = {}
+
+    def insert(worker: int):
+        rows = [(f"bulk-test-{worker}-{index}",) for index in range(200)]
+        results[worker] = (rows, bulk_insert(mysql, "Category", ["category_name"], "category_id", rows))
+
+    workers = [threading.Thread(target=insert, args=(worker,)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    with mysql.acquire() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT category_id, category_name FROM Category WHERE category_name LIKE 'bulk-test-%';")
+        names = dict(cursor.fetchall())
+        cursor.close()
+    for rows, result in results.values():
+        assert result["errors"] == []
+        assert [names[key] for key in result["ids"]] == [row[0] for row in rows]
@@ -0,0 +1,93 @@
+import pytest
+
+from conftest import both_backends
+from connections.replicas import PRIMARY, ReadSession, Replica, ReplicaSet, begin_session, end_session
+
+def _get(client, url: str, etag: str = None):
+    return client.get(url, headers={"If-None-Match": etag} if etag else {})
+
+@pytest.mark.parametrize("url", ["/product/get_all", "/category/get_all", "/seller/get_all"])
+@both_backends
+def test_unchanged_list_is_not_modified(client, catalog, url):
+    etag = _get(client, url).headers["ETag"]
+    response = _get(client, url, etag)
+    assert response.status_code == 304 and response.content == b""
+
+@pytest.mark.parametrize("url, write", [
+    ("/product/get_all", "UPDATE Product SET price = price + 1 WHERE product_id = {product};"),
+    ("/product/get_cheaper/100", "DELETE FROM Product WHERE product_id = {product};"),
+    ("/category/get_all", "UPDATE Category SET description = 'Paper' WHERE category_id = {category};"),
+    ("/seller/get_all", "INSERT INTO Seller (seller_name) VALUES ('Other');"),
+])
+@both_backends
+def test_write_from_another_worker_changes_the_list_etag(client, db, catalog, url, write):
+    etag = _get(client, url).headers["ETag"]
+    # A write this worker never saw: another worker, a script or plain SQL.
+    with db.cursor() as cursor:
+        cursor.execute(write.format(product=catalog["products"][2], category=catalog["category_id"]))
+    response = _get(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@both_backends
+def test_checkout_changes_the_product_list_etag(client, catalog, customer):
+    etag = _get(client, "/product/get_all").headers["ETag"]
+    order = client.post("/orders/checkout", json={
+        "customer_id": customer["customer_id"], "payment_method_id": customer["payment_method_id"],
+        "shipping_id": customer["shipping_id"], "items": [{"product_id": catalog["products"][0], "quantity": 1}],
+    })
+    assert "orders_id" in order.json()
+    assert _get(client, "/product/get_all", etag).status_code == 200
+
+@both_backends
+def test_cached_category_list_keeps_the_etag_it_was_read_with(client, db, catalog):
+    url = f"/product/get_by_category/{catalog['category_id']}"
+    first = _get(client, url)
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE Product SET price = 99 WHERE product_id = %s;", (catalog["products"][0],))
+    # Until the cached list is dropped it is served as it was, so it keeps its
+    # tag: the newer table version must not be paired with the older rows.
+    cached = _get(client, url)
+    assert cached.json() == first.json() and cached.headers["ETag"] == first.headers["ETag"]
+    client.put(f"/product/update/{catalog['products'][1]}", json={
+        "product_name": "Book B", "price": 21, "quantity_available": 5,
+        "category_id": catalog["category_id"], "seller_id": catalog["seller_id"]})
+    fresh = _get(client, url, first.headers["ETag"])
+    assert fresh.status_code == 200
+    assert {product["product_name"]: float(product["price"]) for product in fresh.json()} == {
+        "Book A": 99, "Book B": 21, "Book C": 30}
+
+class _Pool:
+    def __init__(self, name: str):
+        self.name = name
+
+    def getconn(self):
+        return self.name
+
+def _replica(name: str, lag: float = 0.0) -> Replica:
+    replica = Replica(name, _Pool(name))
+    replica.lag, replica.checked_at = lag, float("inf")  # Never measured again
+    return replica
+
+def _servers(replicas: ReplicaSet, session: ReadSession, reads: int) -> list:
+    token = begin_session(session)
+    try:
+        return [replicas.checkout()[1] for _ in range(reads)]
+    finally:
+        end_session(token)
+
+def test_a_request_reads_from_one_replica():
+    replicas = ReplicaSet([_replica("a"), _replica("b")])
+    assert _servers(replicas, ReadSession(), 3) == ["a", "a", "a"]
+    assert _servers(replicas, ReadSession(), 3) == ["b", "b", "b"]
+
+def test_a_request_that_fell_back_to_the_primary_stays_there():
+    a = _replica("a")
+    replicas = ReplicaSet([a, _replica("b", lag=10)])
+    session = ReadSession()
+    assert _servers(replicas, session, 1) == ["a"]
+    a.lag = 10
+    assert _servers(replicas, session, 1) == [None]
+    a.lag = 0
+    assert _servers(replicas, session, 2) == [None, None]
+    assert session.server is PRIMARY
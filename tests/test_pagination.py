@@ -0,0 +1,59 @@
+import json
+
+from conftest import both_backends
+from crud.category import CategoryCRUD
+
+pytestmark = both_backends
+
+def _add_categories(db, count: int):
+    with db.cursor() as cursor:
+        cursor.executemany("INSERT INTO Category (category_name) VALUES (%s);", [(f"Category {n}",) for n in range(1, count + 1)])
+
+def _walk(crud, limit: int):
+    """Follows next_cursor from the first page to the last; returns the pages."""
+    pages, after = [], None
+    while True:
+        page = crud.get_all(limit, after)
+        pages.append(page)
+        after = page["next_cursor"]
+        if after is None:
+            return pages
+
+def test_pages_cover_every_row_once(db):
+    _add_categories(db, 7)
+    pages = _walk(CategoryCRUD(), limit=3)
+    names = [item.category_name for page in pages for item in page["items"]]
+    assert names == [f"Category {n}" for n in range(1, 8)]
+    assert [len(page["items"]) for page in pages] == [3, 3, 1]
+
+def test_full_last_page_is_followed_by_an_empty_one(db):
+    _add_categories(db, 4)
+    crud = CategoryCRUD()
+    first = crud.get_all(4, None)
+    assert len(first["items"]) == 4 and first["next_cursor"] == 4
+    assert crud.get_all(4, first["next_cursor"]) == {"items": [], "next_cursor": None}
+
+def test_cursor_is_stable_under_concurrent_writes(db):
+    _add_categories(db, 6)
+    crud = CategoryCRUD()
+    first = crud.get_all(3, None)
+    with db.cursor() as cursor:
+        # Deleting a row already seen would shift an OFFSET page; a keyset page is unaffected.
+        cursor.execute("DELETE FROM Category WHERE category_id = 1;")
+    second = crud.get_all(3, first["next_cursor"])
+    assert [item.category_name for item in second["items"]] == ["Category 4", "Category 5", "Category 6"]
+
+def test_list_route_pages_and_streams(client, db):
+    _add_categories(db, 5)
+    page = client.get("/category/get_all", params={"limit": 2, "after": 2}).json()
+    assert [item["category_name"] for item in page["items"]] == ["Category 3", "Category 4"]
+    assert page["next_cursor"] == 4
+
+    response = client.get("/category/get_all", params={"stream": True})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["category_name"] for line in lines] == [f"Category {n}" for n in range(1, 6)]
+
+def test_limit_is_bounded(client, db):
+    assert client.get("/category/get_all", params={"limit": 0}).status_code == 422
+    assert client.get("/category/get_all", params={"limit": 1001}).status_code == 422
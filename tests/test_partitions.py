@@ -0,0 +1,67 @@
+import threading
+from datetime import date, datetime
+
+from conftest import server_connection
+from crud.order_items import OrderItemCRUD, OrderItemData
+from crud.partitions import PartitionMaintenance
+
+ORDER_DATE = datetime(2025, 1, 15, 10, 30)
+
+def _old_order(db, customer) -> int:
+    with db.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id, created_at)
+            VALUES (0, 'Pending', %s, %s, %s, %s) RETURNING orders_id;
+        """, (customer["customer_id"], customer["payment_method_id"], customer["shipping_id"], ORDER_DATE))
+        return cursor.fetchone()[0]
+
+def _created_at(db, order_item_ids) -> list:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT created_at FROM Order_Items WHERE order_item_id = ANY(%s) ORDER BY order_item_id;",
+                       (list(order_item_ids),))
+        return [row[0] for row in cursor.fetchall()]
+
+def test_order_item_takes_the_date_of_its_order(db, catalog, customer):
+    orders_id = _old_order(db, customer)
+    order_item_id = OrderItemCRUD().create(OrderItemData(
+        orders_id=orders_id, product_id=catalog["products"][0], quantity=1, price_at_purchase=10))
+    assert _created_at(db, [order_item_id]) == [ORDER_DATE]
+
+def test_bulk_order_items_take_the_dates_of_their_orders(db, catalog, customer):
+    old_order = _old_order(db, customer)
+    with db.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
+            VALUES (0, 'Pending', %s, %s, %s) RETURNING orders_id, created_at;
+        """, (customer["customer_id"], customer["payment_method_id"], customer["shipping_id"]))
+        new_order, new_order_date = cursor.fetchone()
+    rows = [OrderItemData(orders_id=orders_id, product_id=catalog["products"][0], quantity=1, price_at_purchase=10)
+            for orders_id in (old_order, new_order, 999999)]
+    result = OrderItemCRUD().bulk_create(rows)
+    assert [error["index"] for error in result["errors"]] == [2]
+    assert "orders" in result["errors"][0]["error"].lower()
+    assert _created_at(db, [key for key in result["ids"] if key is not None]) == [ORDER_DATE, new_order_date]
+
+def test_order_items_are_read_from_the_month_of_their_order(db, catalog, customer):
+    orders_id = _old_order(db, customer)
+    OrderItemCRUD().create(OrderItemData(orders_id=orders_id, product_id=catalog["products"][0], quantity=1, price_at_purchase=10))
+    with db.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM Order_Items;")
+        partition = cursor.fetchone()[0]
+        cursor.execute("SELECT tableoid::regclass::text FROM Orders WHERE orders_id = %s;", (orders_id,))
+        assert partition.replace("order_items", "") == cursor.fetchone()[0].replace("orders", "")
+    assert date(2025, 1, 1) <= _created_at(db, [1])[0].date() < date(2025, 2, 1)
+
+def test_partition_pass_is_skipped_while_another_one_runs(database, db):
+    maintenance = PartitionMaintenance()
+    other_worker = server_connection(database)
+    with other_worker.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(hashtext('monthly_partitions'));")
+    results = []
+    attempt = threading.Thread(target=lambda: results.append(maintenance.ensure(6, wait=False)))
+    attempt.start()
+    attempt.join(5)
+    other_worker.close()  # Releases the lock, unblocking the pass if it waited for it
+    attempt.join()
+    assert results == [0]
+    assert maintenance.ensure(6, wait=False) is not None
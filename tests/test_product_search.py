@@ -0,0 +1,25 @@
+from conftest import both_backends
+
+pytestmark = both_backends
+
+def _add_product(db, name: str, price: float, category_id=None, seller_id=None):
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO Product (product_name, price, quantity_available, category_id, seller_id) VALUES (%s, %s, 1, %s, %s);",
+                       (name, price, category_id, seller_id))
+
+def test_search_ranks_matches_and_counts_facets(client, db, catalog):
+    response = client.get("/product/search", params={"q": "book"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 3
+    assert result["categories"] == [{"category_id": catalog["category_id"], "count": 3}]
+    assert sum(bucket["count"] for bucket in result["price_ranges"]) == 3
+
+def test_uncategorized_products_get_their_own_facet(client, db, catalog):
+    _add_product(db, "Loose book", 5)
+    response = client.get("/product/search", params={"q": "book"})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 4
+    assert {"category_id": None, "count": 1} in result["categories"]
+    assert sum(facet["count"] for facet in result["categories"]) == result["total"]
@@ -0,0 +1,63 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from connections.replicas import ReadSession, begin_session, end_session
+from crud.category import CategoryCRUD, CategoryData
+from main import app
+from services.read_routing import PRIMARY_COOKIE
+
+def _in_session(session: ReadSession, call):
+    token = begin_session(session)
+    try:
+        return call()
+    finally:
+        end_session(token)
+
+def _names(page: dict) -> list:
+    return [category.category_name for category in page["items"]]
+
+def test_reads_go_to_the_replica_outside_a_session(replica):
+    replica("INSERT INTO Category (category_name) VALUES ('Books');")
+    crud = CategoryCRUD()
+    crud.create(CategoryData(category_name="Music"))
+    assert _names(crud.get_all()) == ["Books"]  # The replica has not replayed the insert
+
+def test_a_session_that_wrote_reads_from_the_primary(replica):
+    replica("INSERT INTO Category (category_name) VALUES ('Books');")
+    crud = CategoryCRUD()
+    session = ReadSession()
+    _in_session(session, lambda: crud.create(CategoryData(category_name="Music")))
+    assert session.wrote
+    assert _names(_in_session(session, crud.get_all)) == ["Books", "Music"]
+    assert _names(_in_session(ReadSession(), crud.get_all)) == ["Books"]
+
+def test_a_session_within_its_window_reads_from_the_primary(replica):
+    CategoryCRUD().create(CategoryData(category_name="Music"))
+    assert _names(_in_session(ReadSession(time.time() + 5), CategoryCRUD().get_all)) == ["Music"]
+    assert _names(_in_session(ReadSession(time.time() - 1), CategoryCRUD().get_all)) == []
+
+def test_writer_gets_a_cookie_that_pins_its_reads(replica):
+    writer, other = TestClient(app), TestClient(app)
+    assert writer.post("/category/create", json={"category_name": "Music"}).status_code == 200
+    assert float(writer.cookies[PRIMARY_COOKIE]) > time.time()
+    assert [c["category_name"] for c in writer.get("/category/get_all").json()["items"]] == ["Music"]
+    assert other.get("/category/get_all").json()["items"] == []
+    assert PRIMARY_COOKIE not in other.cookies
+
+def test_a_forged_cookie_pins_reads_no_longer_than_the_window(replica, monkeypatch):
+    monkeypatch.setenv("PG_READ_YOUR_WRITES_SECONDS", "0")
+    app.middleware_stack = None
+    CategoryCRUD().create(CategoryData(category_name="Music"))
+    client = TestClient(app, cookies={PRIMARY_COOKIE: "1e12"})
+    assert client.get("/category/get_all").json()["items"] == []  # Read from the replica
+
+def test_cache_is_not_filled_from_a_lagging_replica(replica):
+    replica("INSERT INTO Category (category_name) VALUES ('Books');")
+    crud = CategoryCRUD()
+    writer = ReadSession()
+    _in_session(writer, lambda: crud.update(1, CategoryData(category_name="Novels")))
+    # Another client misses the cache right after the write and reloads the category.
+    _in_session(ReadSession(), lambda: crud.get_by_id(1))
+    assert _in_session(writer, lambda: crud.get_by_id(1)).category_name == "Novels"
+    assert _in_session(ReadSession(), lambda: crud.get_by_id_with_version(1))[0].category_name == "Novels"
@@ -0,0 +1,74 @@
+from conftest import server_connection
+from crud.recommendation_engine import RecommendationEngine
+
+def _order(cursor, customer) -> int:
+    cursor.execute("""
+        INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
+        VALUES (0, 'Pending', %s, %s, %s) RETURNING orders_id;
+    """, (customer["customer_id"], customer["payment_method_id"], customer["shipping_id"]))
+    return cursor.fetchone()[0]
+
+def _item(cursor, orders_id: int, product_id: int) -> int:
+    cursor.execute("""
+        INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase)
+        VALUES (%s, %s, 1, 1) RETURNING order_item_id;
+    """, (orders_id, product_id))
+    return cursor.fetchone()[0]
+
+def _matrix(db) -> tuple:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT product_id, orders_count FROM product_purchase_counts ORDER BY 1;")
+        counts = cursor.fetchall()
+        cursor.execute("SELECT product_id, other_product_id, orders_count FROM product_co_purchases ORDER BY 1, 2;")
+        return counts, cursor.fetchall()
+
+def test_item_committed_after_a_run_with_a_lower_id_is_folded_in(database, db, catalog, customer):
+    book_a, book_b, book_c = catalog["products"]
+    engine = RecommendationEngine()
+    with db.cursor() as cursor:
+        first_order, second_order = _order(cursor, customer), _order(cursor, customer)
+        _item(cursor, first_order, book_a)
+
+    late = server_connection(database)
+    late.autocommit = False
+    with late.cursor() as cursor:
+        late_id = _item(cursor, first_order, book_b)  # Draws its ID before the next item, commits after the run
+    with db.cursor() as cursor:
+        assert _item(cursor, second_order, book_c) > late_id
+    assert "error" not in engine.run()
+    late.commit()
+    late.close()
+    assert "error" not in engine.run()
+
+    counts, pairs = _matrix(db)
+    assert counts == [(book_a, 1), (book_b, 1), (book_c, 1)]
+    assert pairs == [(book_a, book_b, 1), (book_b, book_a, 1)]
+
+def test_incremental_runs_match_a_full_rebuild(db, catalog, customer):
+    book_a, book_b, book_c = catalog["products"]
+    engine = RecommendationEngine()
+    with db.cursor() as cursor:
+        first_order = _order(cursor, customer)
+        _item(cursor, first_order, book_a)
+        _item(cursor, first_order, book_b)
+    engine.run()
+    with db.cursor() as cursor:
+        _item(cursor, first_order, book_c)  # Added to an order that was already folded in
+        second_order = _order(cursor, customer)
+        _item(cursor, second_order, book_a)
+        _item(cursor, second_order, book_c)
+    engine.run()
+    incremental = _matrix(db)
+
+    assert "error" not in engine.run(full=True)
+    assert _matrix(db) == incremental
+    assert incremental[0] == [(book_a, 2), (book_b, 1), (book_c, 2)]
+
+def test_a_run_without_new_items_changes_nothing(db, catalog, customer):
+    engine = RecommendationEngine()
+    with db.cursor() as cursor:
+        _item(cursor, _order(cursor, customer), catalog["products"][0])
+    engine.run()
+    before = _matrix(db)
+    assert engine.run()["orders_folded"] == 0
+    assert _matrix(db) == before
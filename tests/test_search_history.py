@@ -0,0 +1,31 @@
+from datetime import date
+
+from conftest import both_backends
+from crud.search_history import SearchHistoryCRUD, SearchHistoryData
+
+pytestmark = both_backends
+
+SEARCH_DATE = date(2025, 3, 10)
+
+def _terms(page: dict) -> list:
+    return [entry.search_term for entry in page["items"]]
+
+def test_buffered_searches_are_found_by_their_search_date(db, customer):
+    crud = SearchHistoryCRUD()
+    assert crud.log(SearchHistoryData(search_term="lamp", search_date=SEARCH_DATE, customer_id=customer["customer_id"]))
+    crud.buffer.flush()
+    assert _terms(crud.get_by_date_range(SEARCH_DATE, SEARCH_DATE)) == ["lamp"]
+    assert _terms(crud.get_by_date_range(date.today(), date.today())) == []
+
+def test_created_searches_are_found_by_their_search_date(db, customer):
+    crud = SearchHistoryCRUD()
+    crud.create(SearchHistoryData(search_term="desk", search_date=SEARCH_DATE, customer_id=customer["customer_id"]))
+    assert _terms(crud.get_by_date_range(date(2025, 3, 1), date(2025, 3, 31))) == ["desk"]
+
+def test_changing_the_search_date_moves_the_entry(db, customer):
+    crud = SearchHistoryCRUD()
+    search_id = crud.create(SearchHistoryData(search_term="desk", search_date=SEARCH_DATE, customer_id=customer["customer_id"]))
+    moved = date(2025, 5, 2)
+    assert crud.update(search_id, SearchHistoryData(search_term="desk", search_date=moved, customer_id=customer["customer_id"]))
+    assert _terms(crud.get_by_date_range(SEARCH_DATE, SEARCH_DATE)) == []
+    assert _terms(crud.get_by_date_range(moved, moved)) == ["desk"]
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+
+import psycopg2
+
+from conftest import both_backends
+from services import shopping_cart as shopping_cart_service
+
+pytestmark = both_backends
+
+def test_view_prices_the_cart(client, db, catalog, customer):
+    book_a, book_b, _ = catalog["products"]
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO Shopping_Cart_Product (cart_id, product_id, quantity) VALUES (%s, %s, 2), (%s, %s, 1);",
+                       (customer["cart_id"], book_a, customer["cart_id"], book_b))
+    response = client.get(f"/shopping_cart/{customer['cart_id']}/view")
+    assert response.status_code == 200
+    view = response.json()
+    assert [(line["product_id"], line["line_total"]) for line in view["items"]] == [(book_a, 20.0), (book_b, 20.0)]
+    assert view["subtotal"] == 40.0
+
+def test_empty_cart_has_no_items(client, customer):
+    response = client.get(f"/shopping_cart/{customer['cart_id']}/view")
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+def test_unknown_cart_is_404(client, db):
+    assert client.get("/shopping_cart/999999/view").status_code == 404
+
+def test_database_error_is_500_not_404(client, customer, monkeypatch):
+    @contextmanager
+    def unavailable(read_only: bool = False):
+        raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        yield
+
+    monkeypatch.setattr(shopping_cart_service.crud.db_connection, "acquire", unavailable)
+    response = client.get(f"/shopping_cart/{customer['cart_id']}/view")
+    assert response.status_code == 500
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from connections import PostgresDatabaseConnection
+from connections.slow_query_log import SlowQueryLog
+
+@pytest.fixture
+def log():
+    """A log that captures and analyzes every query."""
+    return SlowQueryLog(threshold_ms=0, sample_rate=1)
+
+def _capture(log, connection, sql: str, vars=None) -> dict:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, vars)
+        log.record(cursor, sql, vars, 1.0, "test")
+    return log.get_entries()[0]
+
+def _stock(db, product_id: int) -> int:
+    with db.cursor() as cursor:
+        cursor.execute("SELECT quantity_available FROM Product WHERE product_id = %s;", (product_id,))
+        return cursor.fetchone()[0]
+
+def test_plain_selects_are_analyzed(log, catalog):
+    with PostgresDatabaseConnection().acquire() as connection:
+        entry = _capture(log, connection, "SELECT * FROM Product WHERE product_id = %s;", (catalog["products"][0],))
+    assert entry["analyzed"] and "actual time" in entry["plan"]
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM Product WHERE product_id = %s FOR UPDATE;",
+    "SELECT * FROM Product WHERE product_id = %s FOR NO KEY UPDATE OF Product;",
+    "SELECT pg_try_advisory_lock(%s);",
+])
+def test_locking_selects_are_not_run_again(log, catalog, sql):
+    with PostgresDatabaseConnection().acquire() as connection:
+        entry = _capture(log, connection, sql, (catalog["products"][0],))
+        assert not entry["analyzed"] and "actual time" not in entry["plan"]
+        connection.rollback()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock_all();")
+
+def test_writes_hidden_in_a_select_are_not_run_again(log, db, catalog):
+    product_id = catalog["products"][0]
+    sql = """
+        WITH sold AS (
+            UPDATE Product SET quantity_available = quantity_available - 1 WHERE product_id = %s RETURNING product_id
+        )
+        SELECT product_id FROM sold;
+    """
+    with PostgresDatabaseConnection().acquire() as connection:
+        entry = _capture(log, connection, sql, (product_id,))
+        connection.commit()
+    assert not entry["analyzed"]
+    assert _stock(db, product_id) == 4
+
+def test_analyze_runs_read_only_and_leaves_the_transaction_writable(log, db, catalog):
+    product_id = catalog["products"][0]
+    with PostgresDatabaseConnection().acquire() as connection:
+        # A function with a side effect that the SQL text does not reveal.
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE FUNCTION pg_temp.sell(id INT) RETURNS INT AS $$
+                    UPDATE Product SET quantity_available = quantity_available - 1 WHERE product_id = id RETURNING id;
+                $$ LANGUAGE sql;
+            """)
+        entry = _capture(log, connection, "SELECT pg_temp.sell(%s);", (product_id,))
+        assert "read-only" in entry["explain_error"]
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE Product SET price = price WHERE product_id = %s;", (product_id,))
+        connection.commit()
+    assert _stock(db, product_id) == 4
+
+@pytest.fixture
+def admin():
+    """A client for the admin routes, which read the log and never touch the database."""
+    from main import app
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_admin_routes_are_off_without_a_token(admin, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert admin.get("/admin/slow_queries").status_code == 404
+    assert admin.delete("/admin/slow_queries").status_code == 404
+
+def test_admin_routes_require_the_token(admin, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert admin.get("/admin/slow_queries").status_code == 401
+    assert admin.get("/admin/slow_queries", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    response = admin.get("/admin/slow_queries", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and "stats" in response.json()
+    assert admin.delete("/admin/slow_queries", headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from conftest import server_connection
+
+KEYS = 50
+
+def _unlocked_while_waiting(database, table: str, key: str, statement: str, values) -> int:
+    """Runs `statement` while another transaction holds the lowest `key` row of `table`.
+
+    Returns how many of the other rows the statement had left unlocked once it
+    started waiting. When rows are locked in key order, it waits on the lowest
+    one before touching any other.
+    """
+    holder, writer, probe = (server_connection(database) for _ in range(3))
+    holder.autocommit = False
+    probe.autocommit = False
+    with holder.cursor() as cursor:
+        cursor.execute(f"SELECT {key} FROM {table} ORDER BY {key} LIMIT 1 FOR UPDATE;")
+        lowest = cursor.fetchone()[0]
+    write = threading.Thread(target=lambda: writer.cursor().execute(statement, values))
+    write.start()
+    with probe.cursor() as cursor:
+        for _ in range(100):
+            cursor.execute("SELECT wait_event_type FROM pg_stat_activity WHERE pid = %s;", (writer.get_backend_pid(),))
+            if cursor.fetchone()[0] == "Lock":
+                break
+            time.sleep(0.05)
+        cursor.execute(f"SELECT count(*) FROM (SELECT 1 FROM {table} WHERE {key} <> %s FOR UPDATE SKIP LOCKED) AS free;",
+                       (lowest,))
+        unlocked = cursor.fetchone()[0]
+    probe.rollback()
+    holder.rollback()
+    write.join()
+    for connection in (holder, writer, probe):
+        connection.close()
+    return unlocked
+
+def test_review_writes_lock_rating_stats_in_product_order(database, db, catalog):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO Product (product_name, price, quantity_available, category_id, seller_id)
+            SELECT 'Book ' || n, 10, 1, %s, %s FROM generate_series(4, %s) AS n;
+        """, (catalog["category_id"], catalog["seller_id"], KEYS))
+        cursor.execute("INSERT INTO Review (rating, review_date, product_id) SELECT 5, CURRENT_DATE, product_id FROM Product;")
+    statement = "INSERT INTO Review (rating, review_date, product_id) SELECT 4, CURRENT_DATE, product_id FROM Product;"
+    assert _unlocked_while_waiting(database, "product_rating_stats", "product_id", statement, ()) == KEYS - 1
+
+def test_order_item_writes_lock_order_totals_in_order_order(database, db, catalog, customer):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO Orders (total_amount, order_status, customer_id, payment_method_id, shipping_id)
+            SELECT 10, 'Pending', %s, %s, %s FROM generate_series(1, %s);
+        """, (customer["customer_id"], customer["payment_method_id"], customer["shipping_id"], KEYS))
+    statement = """
+        INSERT INTO Order_Items (orders_id, product_id, quantity, price_at_purchase)
+        SELECT orders_id, %s, 1, 10 FROM Orders;
+    """
+    with db.cursor() as cursor:
+        cursor.execute(statement, (catalog["products"][1],))  # Creates the order_totals rows
+    assert _unlocked_while_waiting(database, "order_totals", "orders_id", statement, (catalog["products"][0],)) == KEYS - 1